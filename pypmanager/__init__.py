@@ -61,3 +61,7 @@ LOGGING_CONFIG = {
 logging.config.dictConfig(LOGGING_CONFIG)
 
 pd.set_option("display.max_columns", None)
+
+# Data frames are only copied when modified, which lets the transaction pipeline
+# assign columns in place without copying the whole frame at each stage
+pd.set_option("mode.copy_on_write", True)  # noqa: FBT003
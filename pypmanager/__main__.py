@@ -3,11 +3,26 @@
 import argparse
 import asyncio
 
+from pypmanager.database import DATABASE_ENGINE
 from pypmanager.helpers.market_data import (
     async_download_market_data,
     async_sync_csv_to_db,
 )
 
+
+async def async_main(*, load: bool, sync: bool, backfill: bool = False) -> None:
+    """Run the selected commands."""
+    try:
+        if load:
+            await async_download_market_data(backfill=backfill)
+
+        if sync:
+            await async_sync_csv_to_db()
+    finally:
+        # Pooled connections keep the process alive until closed
+        await DATABASE_ENGINE.async_dispose()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Analyse portfolio data.")
 
@@ -25,10 +40,19 @@ if __name__ == "__main__":
         help="Sync market data from csv into database",
     )
 
-    all_args = parser.parse_args()
+    parser.add_argument(
+        "--backfill",
+        "-b",
+        action="store_true",
+        help="Load the full history of market data, not only new data",
+    )
 
-    if all_args.load:
-        asyncio.run(async_download_market_data())
+    all_args = parser.parse_args()
 
-    if all_args.sync:
-        asyncio.run(async_sync_csv_to_db())
+    asyncio.run(
+        async_main(
+            load=all_args.load or all_args.backfill,
+            sync=all_args.sync,
+            backfill=all_args.backfill,
+        )
+    )
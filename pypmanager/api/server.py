@@ -11,6 +11,7 @@ from fastapi import FastAPI, Request, Response
 from fastapi.responses import FileResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 
+from pypmanager.database import DATABASE_ENGINE
 from pypmanager.database.helpers import sync_security_files_to_db
 from pypmanager.settings import (
     APP_DATA,
@@ -18,6 +19,7 @@ from pypmanager.settings import (
     APP_ROOT,
     Settings,
 )
+from pypmanager.utils.executor import shutdown_executor
 
 from .graphql import graphql_app
 from .scheduler import scheduler
@@ -27,7 +29,7 @@ _LOGGER = logging.getLogger("pypmanager.startup")
 
 @asynccontextmanager
 async def async_lifespan(_: FastAPI) -> AsyncGenerator[None]:
-    """Start and shutdown the scheduler."""
+    """Start and shutdown the database engine and the scheduler."""
     for folder, name in [
         (APP_ROOT, "App folder"),
         (APP_DATA, "User data folder"),
@@ -42,10 +44,13 @@ async def async_lifespan(_: FastAPI) -> AsyncGenerator[None]:
 
     _LOGGER.info(f"Database file: {Settings.database_local}")
 
+    await DATABASE_ENGINE.async_start()
     scheduler.start()
     await sync_security_files_to_db()
     yield
     scheduler.shutdown()
+    shutdown_executor()
+    await DATABASE_ENGINE.async_dispose()
 
 
 app = FastAPI(lifespan=async_lifespan)
@@ -1 +1,21 @@
 """Database."""
+
+# The models are imported so the schema created by the engine includes all tables
+from .daily_portfolio_holding import (
+    AsyncDbDailyPortfolioHolding,
+    DailyPortfolioMoldingModel,
+)
+from .engine import DATABASE_ENGINE
+from .market_data import AsyncMarketDataDB, LatestMarketDataModel, MarketDataModel
+from .security import AsyncDbSecurity, SecurityModel
+
+__all__ = [
+    "DATABASE_ENGINE",
+    "AsyncDbDailyPortfolioHolding",
+    "AsyncDbSecurity",
+    "AsyncMarketDataDB",
+    "DailyPortfolioMoldingModel",
+    "LatestMarketDataModel",
+    "MarketDataModel",
+    "SecurityModel",
+]
@@ -6,20 +6,16 @@ from datetime import date  # noqa: TC003
 from typing import TYPE_CHECKING, Any, Self
 
 from sqlalchemy import delete, text
-from sqlalchemy.ext.asyncio import (
-    AsyncSession,
-    async_sessionmaker,
-    create_async_engine,
-)
 from sqlalchemy.orm import Mapped, mapped_column
 
-from pypmanager.settings import Settings
-
-from .utils import LOGGER, AsyncBase, async_upsert_data, check_table_exists
+from .engine import DATABASE_ENGINE
+from .utils import AsyncBase, async_upsert_data
 
 if TYPE_CHECKING:
     from types import TracebackType
 
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
 
 class DailyPortfolioMoldingModel(AsyncBase):
     """SQLAlchemy model for daily portfolio holdings."""
@@ -43,27 +39,11 @@ class AsyncDbDailyPortfolioHolding:
 
     def __init__(self) -> None:
         """Initialize the daily portfolio holdings database."""
-        self.engine = create_async_engine(
-            f"sqlite+aiosqlite:///{Settings.database_local}"
-        )
-        self.async_session = async_sessionmaker(
-            bind=self.engine,
-            class_=AsyncSession,
-            expire_on_commit=False,
-        )
+        self.async_session: async_sessionmaker[AsyncSession]
 
     async def __aenter__(self) -> Self:
         """Enter context manager."""
-        async with self.engine.begin() as conn:
-            table_exists = await conn.run_sync(
-                check_table_exists,
-                DailyPortfolioMoldingModel.__tablename__,
-            )
-
-            if not table_exists:
-                await conn.run_sync(AsyncBase.metadata.create_all)
-                LOGGER.info("Daily portfolio holdings database schema created")
-
+        self.async_session = await DATABASE_ENGINE.async_get_session_factory()
         return self
 
     async def __aexit__(
@@ -73,21 +53,22 @@ class AsyncDbDailyPortfolioHolding:
         tb: TracebackType | None,
     ) -> None:
         """Exit context manager."""
-        await self.engine.dispose()
 
     async def async_store_data(self, data: list[DailyPortfolioMoldingModel]) -> None:
         """Store data in the database."""
-        models = [
-            DailyPortfolioMoldingModel(
-                isin_code=item.isin_code,
-                report_date=item.report_date,
-                no_held=item.no_held,
-            )
+        rows = [
+            {
+                "isin_code": item.isin_code,
+                "report_date": item.report_date,
+                "no_held": item.no_held,
+            }
             for item in data
         ]
 
         async with self.async_session() as session, session.begin():
-            await async_upsert_data(session=session, data_list=models)
+            await async_upsert_data(
+                session=session, model=DailyPortfolioMoldingModel, data=rows
+            )
 
     async def async_filter_all(
         self,
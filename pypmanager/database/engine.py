@@ -0,0 +1,165 @@
+"""Process-wide database engine."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from pypmanager.settings import Settings
+
+from .utils import LOGGER, AsyncBase, check_table_exists
+
+if TYPE_CHECKING:
+    from sqlalchemy import Connection
+
+
+SQLITE_PRAGMA_NAMES = {
+    "synchronous": {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"},
+    "temp_store": {0: "DEFAULT", 1: "FILE", 2: "MEMORY"},
+}
+"""Names of the values that SQLite returns as numbers."""
+
+
+def _sqlite_pragmas() -> dict[str, str | int]:
+    """Return the SQLite settings applied to every connection."""
+    return {
+        "journal_mode": Settings.database_journal_mode,
+        "synchronous": Settings.database_synchronous,
+        "mmap_size": Settings.database_mmap_size,
+        "cache_size": Settings.database_cache_size,
+        "temp_store": Settings.database_temp_store,
+    }
+
+
+def _apply_sqlite_pragmas(dbapi_connection: Any, _: Any) -> None:  # noqa: ANN401
+    """Apply the SQLite settings when the pool opens a connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in _sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def _create_schema(connection: Connection) -> None:
+    """Create the tables that are missing in the database."""
+    missing_tables = [
+        table.name
+        for table in AsyncBase.metadata.sorted_tables
+        if not check_table_exists(connection, table.name)
+    ]
+
+    if missing_tables:
+        AsyncBase.metadata.create_all(connection)
+        LOGGER.info(f"Database tables created: {', '.join(missing_tables)}")
+
+
+class DatabaseEngine:
+    """
+    Share one engine and connection pool between all database classes.
+
+    The engine is created on first use, or when the app starts, and the schema is
+    created once per engine. Sessions check out a pooled connection instead of
+    connecting to the database. The SQLite settings are applied to every connection
+    opened by the pool.
+
+    Pooled connections belong to the event loop they were opened in, so a new engine
+    is created if the database or the event loop changes.
+    """
+
+    def __init__(self: DatabaseEngine) -> None:
+        """Init class."""
+        self.engines_created = 0
+        self._engine: AsyncEngine | None = None
+        self._session_factory: async_sessionmaker[AsyncSession] | None = None
+        self._key: tuple[str, asyncio.AbstractEventLoop] | None = None
+        self._schema_task: asyncio.Task[None] | None = None
+
+    async def async_start(self: DatabaseEngine) -> None:
+        """Create the engine and the schema, and log the effective SQLite settings."""
+        session_factory = await self.async_get_session_factory()
+
+        pragmas: dict[str, object] = {}
+        async with session_factory() as session:
+            for name in _sqlite_pragmas():
+                value = (await session.execute(text(f"PRAGMA {name}"))).scalar()
+                if isinstance(value, int):
+                    value = SQLITE_PRAGMA_NAMES.get(name, {}).get(value, value)
+                pragmas[name] = value
+
+        settings = ", ".join(f"{name}={value}" for name, value in pragmas.items())
+        LOGGER.info(f"SQLite settings: {settings}")
+
+    async def async_get_session_factory(
+        self: DatabaseEngine,
+    ) -> async_sessionmaker[AsyncSession]:
+        """Return the session factory of the engine, creating it if needed."""
+        key = (str(Settings.database_local), asyncio.get_running_loop())
+        session_factory, schema_task = self._session_factory, self._schema_task
+
+        if self._key != key or session_factory is None or schema_task is None:
+            previous_engine = self._engine
+            session_factory, schema_task = self._create_engine(key)
+
+            if previous_engine is not None:
+                await previous_engine.dispose()
+
+        try:
+            await schema_task
+        except Exception:
+            # Retry on next call
+            if schema_task is self._schema_task:
+                self._key = None
+            raise
+
+        return session_factory
+
+    async def async_dispose(self: DatabaseEngine) -> None:
+        """Close all pooled connections."""
+        engine = self._engine
+        self._engine = None
+        self._session_factory = None
+        self._key = None
+        self._schema_task = None
+
+        if engine is not None:
+            await engine.dispose()
+
+    def _create_engine(
+        self: DatabaseEngine, key: tuple[str, asyncio.AbstractEventLoop]
+    ) -> tuple[async_sessionmaker[AsyncSession], asyncio.Task[None]]:
+        """Create the engine and start creating the schema."""
+        engine = create_async_engine(f"sqlite+aiosqlite:///{key[0]}")
+        event.listen(engine.sync_engine, "connect", _apply_sqlite_pragmas)
+        session_factory = async_sessionmaker(
+            bind=engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
+        # Concurrent callers wait for the same schema creation
+        schema_task = asyncio.create_task(self._async_create_schema(engine))
+
+        self.engines_created += 1
+        self._engine = engine
+        self._session_factory = session_factory
+        self._schema_task = schema_task
+        self._key = key
+
+        return session_factory, schema_task
+
+    @staticmethod
+    async def _async_create_schema(engine: AsyncEngine) -> None:
+        """Create the tables that are missing in the database."""
+        async with engine.begin() as conn:
+            await conn.run_sync(_create_schema)
+
+
+DATABASE_ENGINE = DatabaseEngine()
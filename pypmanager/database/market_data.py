@@ -2,25 +2,31 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import UTC, date, datetime
-from typing import TYPE_CHECKING, Any, Self
+from typing import TYPE_CHECKING, Any, Self, cast
 
-from sqlalchemy import Row, delete, text
-from sqlalchemy.ext.asyncio import (
-    AsyncSession,
-    async_sessionmaker,
-    create_async_engine,
-)
+import numpy as np
+import pandas as pd
+from sqlalchemy import Row, bindparam, delete, event, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from pypmanager.settings import Settings
 
-from .utils import LOGGER, AsyncBase, async_upsert_data, check_table_exists
+from .engine import DATABASE_ENGINE
+from .utils import AsyncBase, async_upsert_data
 
 if TYPE_CHECKING:
     from collections.abc import Sequence
     from types import TracebackType
 
+    import aiosqlite
+    import numpy.typing as npt
+    from sqlalchemy import Connection, MetaData
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from .utils import UpsertData, UpsertResult
+
 
 class MarketDataModel(AsyncBase):
     """SQLAlchemy model for market data."""
@@ -45,32 +51,177 @@ class MarketDataModel(AsyncBase):
         )
 
 
+class LatestMarketDataModel(AsyncBase):
+    """
+    SQLAlchemy model for the latest market data of each ISIN code.
+
+    The table is maintained by triggers on the market data table, in the same
+    transaction as the change of the market data.
+    """
+
+    __tablename__ = "latest_market_data"
+
+    isin_code: Mapped[str] = mapped_column(primary_key=True)
+    report_date: Mapped[date] = mapped_column()
+    close_price: Mapped[float]
+
+    def __repr__(self) -> str:
+        """Return a string representation of the model."""
+        return (
+            f"<LatestMarketDataModel(isin_code={self.isin_code}, "
+            f"report_date={self.report_date}, close_price={self.close_price})>"
+        )
+
+
+def _refresh_latest_statements(isin_code: str) -> str:
+    """Return statements that refresh the latest market data of an ISIN code."""
+    return f"""
+        DELETE FROM latest_market_data WHERE isin_code = {isin_code};
+        INSERT INTO latest_market_data (isin_code, report_date, close_price)
+        SELECT isin_code, report_date, close_price
+        FROM market_data
+        WHERE isin_code = {isin_code}
+        ORDER BY report_date DESC
+        LIMIT 1;
+    """  # noqa: S608
+
+
+LATEST_MARKET_DATA_TRIGGERS = {
+    "market_data_latest_insert": f"""
+        AFTER INSERT ON market_data
+        BEGIN
+            {_refresh_latest_statements("NEW.isin_code")}
+        END
+    """,
+    "market_data_latest_update": f"""
+        AFTER UPDATE ON market_data
+        BEGIN
+            {_refresh_latest_statements("NEW.isin_code")}
+        END
+    """,
+    "market_data_latest_move": f"""
+        AFTER UPDATE OF isin_code ON market_data
+        WHEN OLD.isin_code <> NEW.isin_code
+        BEGIN
+            {_refresh_latest_statements("OLD.isin_code")}
+        END
+    """,
+    "market_data_latest_delete": f"""
+        AFTER DELETE ON market_data
+        BEGIN
+            {_refresh_latest_statements("OLD.isin_code")}
+        END
+    """,
+}
+"""Triggers keeping the latest_market_data table up to date."""
+
+
+@event.listens_for(AsyncBase.metadata, "after_create")
+def _create_latest_market_data_triggers(
+    _: MetaData,
+    connection: Connection,
+    **__: object,
+) -> None:
+    """Create the triggers and fill latest_market_data from the market data."""
+    for name, trigger in LATEST_MARKET_DATA_TRIGGERS.items():
+        connection.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {trigger}")
+
+    connection.exec_driver_sql(
+        """
+        INSERT OR REPLACE INTO latest_market_data (isin_code, report_date, close_price)
+        SELECT isin_code, MAX(report_date), close_price
+        FROM market_data
+        GROUP BY isin_code
+        """
+    )
+
+
+@dataclass(frozen=True)
+class MarketDataWriteResult:
+    """The outcome of storing changed market data."""
+
+    inserted: int
+    """Number of rows that were not stored before."""
+    updated: int
+    """Number of stored rows with a different price or source."""
+    unchanged: int
+    """Number of rows that were already stored, and therefore not written."""
+    failed: int = 0
+    """Number of inserted or updated rows that could not be stored."""
+
+
+MARKET_DATA_COLUMNS = (
+    "isin_code",
+    "report_date",
+    "close_price",
+    "currency",
+    "date_added",
+    "source",
+)
+"""The columns of the market data table."""
+
+_COLUMN_DTYPES: dict[str, npt.DTypeLike] = {
+    "isin_code": object,
+    "report_date": "datetime64[D]",
+    "close_price": np.float64,
+    "currency": object,
+    "date_added": "datetime64[D]",
+    "source": object,
+}
+
+
+def _differs(values: pd.Series, stored: pd.Series) -> np.ndarray:
+    """Return True where a value differs from the stored value. Two NaN are equal."""
+    return np.asarray(~(values.eq(stored) | (values.isna() & stored.isna())))
+
+
+def _to_iso_dates(values: pd.Series) -> np.ndarray:
+    """Format dates like they are stored, e.g. 2023-01-31."""
+    return np.asarray(pd.to_datetime(values).dt.strftime("%Y-%m-%d"), dtype=object)
+
+
+def _filter_query(
+    columns: Sequence[str],
+    *,
+    isin_code: str | None,
+    start_date: date | None,
+    end_date: date | None,
+) -> tuple[str, dict[str, Any]]:
+    """Return a query selecting market data, by report date descending."""
+    if unknown_columns := set(columns) - set(MARKET_DATA_COLUMNS):
+        msg = f"Unknown market data columns: {sorted(unknown_columns)}"
+        raise ValueError(msg)
+
+    query = f"SELECT {', '.join(columns)} FROM market_data WHERE 1=1"  # noqa: S608
+    params: dict[str, Any] = {}
+
+    # Add filters dynamically
+    if isin_code:
+        query += " AND isin_code = :isin_code"
+        params["isin_code"] = isin_code
+    if start_date:
+        query += " AND report_date >= :start_date"
+        params["start_date"] = start_date.isoformat()
+    if end_date:
+        query += " AND report_date <= :end_date"
+        params["end_date"] = end_date.isoformat()
+
+    # Add ordering
+    query += " ORDER BY report_date DESC"
+
+    return query, params
+
+
 class AsyncMarketDataDB:
     """Database operations for market data."""
 
     def __init__(self) -> None:
         """Initialize the market data database."""
-        self.engine = create_async_engine(
-            f"sqlite+aiosqlite:///{Settings.database_local}"
-        )
-        self.async_session = async_sessionmaker(
-            bind=self.engine,
-            class_=AsyncSession,
-            expire_on_commit=False,
-        )
+        self.async_session: async_sessionmaker[AsyncSession]
 
     async def __aenter__(self) -> Self:
         """Enter context manager."""
-        async with self.engine.begin() as conn:
-            table_exists = await conn.run_sync(
-                check_table_exists,
-                MarketDataModel.__tablename__,
-            )
-
-            if not table_exists:
-                await conn.run_sync(AsyncBase.metadata.create_all)
-                LOGGER.info("Market data database schema created")
-
+        self.async_session = await DATABASE_ENGINE.async_get_session_factory()
         return self
 
     async def __aexit__(
@@ -80,12 +231,90 @@ class AsyncMarketDataDB:
         tb: TracebackType | None,
     ) -> None:
         """Exit context manager."""
-        await self.engine.dispose()
 
-    async def async_store_market_data(self, data: list[MarketDataModel]) -> None:
-        """Store market data in the database."""
+    async def async_store_market_data(self, data: UpsertData) -> UpsertResult:
+        """
+        Store market data in the database.
+
+        The data may be models, or dicts or a data frame with the columns of the table.
+        """
         async with self.async_session() as session, session.begin():
-            await async_upsert_data(session=session, data_list=data)
+            return await async_upsert_data(
+                session=session, model=MarketDataModel, data=data
+            )
+
+    async def async_store_changed_market_data(
+        self, df_data: pd.DataFrame
+    ) -> MarketDataWriteResult:
+        """
+        Store new and changed market data, skipping rows that are already stored.
+
+        The rows are compared to the stored data on isin_code, report_date,
+        close_price and source, in one query. Unchanged rows are not written, so
+        their date_added is kept. Of rows with the same isin_code and report_date,
+        only the last one is stored.
+        """
+        if df_data.empty:
+            return MarketDataWriteResult(inserted=0, updated=0, unchanged=0)
+
+        df_keys = pd.DataFrame(
+            {
+                "isin_code": df_data["isin_code"].to_numpy(),
+                "report_date": _to_iso_dates(df_data["report_date"]),
+                "close_price": df_data["close_price"].to_numpy(),
+                "source": df_data["source"].to_numpy(),
+            }
+        )
+
+        # Sources may report the same day, the last row wins as it would when written
+        is_last = ~df_keys.duplicated(["isin_code", "report_date"], keep="last")
+        df_keys = df_keys[is_last].reset_index(drop=True)
+        df_data = df_data[is_last.to_numpy()]
+
+        async with self.async_session() as session, session.begin():
+            result = await session.execute(
+                text(
+                    "SELECT isin_code, report_date, close_price, source "
+                    "FROM market_data "
+                    "WHERE isin_code IN :isin_codes "
+                    "AND report_date BETWEEN :start_date AND :end_date"
+                ).bindparams(bindparam("isin_codes", expanding=True)),
+                {
+                    "isin_codes": df_keys["isin_code"].unique().tolist(),
+                    "start_date": df_keys["report_date"].min(),
+                    "end_date": df_keys["report_date"].max(),
+                },
+            )
+            df_stored = pd.DataFrame(
+                result.fetchall(),
+                columns=["isin_code", "report_date", "close_price", "source"],
+            )
+
+            df_compared = df_keys.merge(
+                df_stored,
+                on=["isin_code", "report_date"],
+                how="left",
+                suffixes=("", "_stored"),
+                indicator=True,
+            )
+            is_new = (df_compared["_merge"] == "left_only").to_numpy()
+            is_changed = ~is_new & (
+                _differs(df_compared["close_price"], df_compared["close_price_stored"])
+                | _differs(df_compared["source"], df_compared["source_stored"])
+            )
+
+            upsert_result = await async_upsert_data(
+                session=session,
+                model=MarketDataModel,
+                data=df_data[is_new | is_changed],
+            )
+
+        return MarketDataWriteResult(
+            inserted=int(is_new.sum()),
+            updated=int(is_changed.sum()),
+            unchanged=int((~is_new & ~is_changed).sum()),
+            failed=upsert_result.failed,
+        )
 
     async def async_filter_all(
         self,
@@ -94,24 +323,14 @@ class AsyncMarketDataDB:
         end_date: date | None = None,
     ) -> list[MarketDataModel]:
         """Return all market data."""
-        async with self.async_session() as session, session.begin():
-            query = "SELECT * FROM market_data WHERE 1=1"
-            params: dict[str, Any] = {}
-
-            # Add filters dynamically
-            if isin_code:
-                query += " AND isin_code = :isin_code"
-                params["isin_code"] = isin_code
-            if start_date:
-                query += " AND report_date >= :start_date"
-                params["start_date"] = start_date
-            if end_date:
-                query += " AND report_date <= :end_date"
-                params["end_date"] = end_date
-
-            # Add ordering
-            query += " ORDER BY report_date DESC"
+        query, params = _filter_query(
+            MARKET_DATA_COLUMNS,
+            isin_code=isin_code,
+            start_date=start_date,
+            end_date=end_date,
+        )
 
+        async with self.async_session() as session, session.begin():
             # Execute query
             result = await session.execute(text(query), params)
             rows = result.fetchall()
@@ -129,6 +348,71 @@ class AsyncMarketDataDB:
                 for row in rows
             ]
 
+    async def async_read_columns(
+        self,
+        columns: Sequence[str] = MARKET_DATA_COLUMNS,
+        isin_code: str | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> dict[str, np.ndarray]:
+        """
+        Return market data as one array per column, by report date descending.
+
+        The rows are read from the cursor without creating an object per row. Dates
+        are parsed once per column, to datetime64.
+        """
+        query, params = _filter_query(
+            columns, isin_code=isin_code, start_date=start_date, end_date=end_date
+        )
+
+        async with self.async_session() as session:
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = cast(
+                "aiosqlite.Connection", raw_connection.driver_connection
+            )
+            async with driver_connection.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+
+        values = zip(*rows, strict=True) if rows else [() for _ in columns]
+
+        return {
+            name: np.array(column, dtype=_COLUMN_DTYPES[name])
+            for name, column in zip(columns, values, strict=True)
+        }
+
+    async def async_read_df(
+        self,
+        columns: Sequence[str] = MARKET_DATA_COLUMNS,
+        isin_code: str | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> pd.DataFrame:
+        """
+        Return market data as a data frame, by report date descending.
+
+        The data frame is indexed by report date, localized to the system time zone.
+        """
+        if "report_date" not in columns:
+            columns = [*columns, "report_date"]
+
+        data = await self.async_read_columns(
+            columns, isin_code=isin_code, start_date=start_date, end_date=end_date
+        )
+
+        # Same resolution as pandas.to_datetime
+        data = {
+            name: values.astype("datetime64[ns]")
+            if values.dtype.kind == "M"
+            else values
+            for name, values in data.items()
+        }
+        report_date = pd.DatetimeIndex(
+            data.pop("report_date"), name="report_date"
+        ).tz_localize(Settings.system_time_zone)
+
+        return pd.DataFrame(data, index=report_date)
+
     async def async_get_market_data(
         self, isin_code: str, report_date: date
     ) -> MarketDataModel | None:
@@ -149,6 +433,9 @@ class AsyncMarketDataDB:
         """
         Return the last close price data on ISIN code level.
 
+        The data is read from the latest_market_data table, which has one row per
+        ISIN code.
+
         Example:
         report date | isin_code | price
         2023-01-01 | US0378331005 | 150.25
@@ -156,25 +443,10 @@ class AsyncMarketDataDB:
         """
         async with self.async_session() as session, session.begin():
             result = await session.execute(
-                text("""
-                        SELECT
-                            md.isin_code,
-                            md.report_date,
-                            md.close_price
-                        FROM
-                            market_data md
-                        JOIN (
-                            SELECT
-                                isin_code,
-                                MAX(report_date) AS latest_date
-                            FROM
-                                market_data
-                            GROUP BY
-                                isin_code
-                        ) latest_dates
-                            ON md.isin_code = latest_dates.isin_code
-                            AND md.report_date = latest_dates.latest_date;
-                        """)
+                text(
+                    "SELECT isin_code, report_date, close_price "
+                    "FROM latest_market_data ORDER BY isin_code"
+                )
             )
 
             return result.fetchall()
@@ -5,20 +5,20 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Self
 
 from sqlalchemy import delete, text
-from sqlalchemy.ext.asyncio import (
-    AsyncSession,
-    async_sessionmaker,
-    create_async_engine,
-)
 from sqlalchemy.orm import Mapped, mapped_column
 
-from pypmanager.settings import Settings
-
-from .utils import LOGGER, AsyncBase, async_upsert_data, check_table_exists
+from .engine import DATABASE_ENGINE
+from .utils import (
+    AsyncBase,
+    TableVersion,
+    async_upsert_data,
+)
 
 if TYPE_CHECKING:
     from types import TracebackType
 
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
 
 class SecurityModel(AsyncBase):
     """SQLAlchemy model for securities."""
@@ -37,32 +37,20 @@ class SecurityModel(AsyncBase):
         )
 
 
+SECURITY_TABLE_VERSION = TableVersion()
+"""Version of the content of the security table."""
+
+
 class AsyncDbSecurity:
     """Database operations for security."""
 
     def __init__(self) -> None:
         """Initialize the security database."""
-        self.engine = create_async_engine(
-            f"sqlite+aiosqlite:///{Settings.database_local}"
-        )
-        self.async_session = async_sessionmaker(
-            bind=self.engine,
-            class_=AsyncSession,
-            expire_on_commit=False,
-        )
+        self.async_session: async_sessionmaker[AsyncSession]
 
     async def __aenter__(self) -> Self:
         """Enter context manager."""
-        async with self.engine.begin() as conn:
-            table_exists = await conn.run_sync(
-                check_table_exists,
-                SecurityModel.__tablename__,
-            )
-
-            if not table_exists:
-                await conn.run_sync(AsyncBase.metadata.create_all)
-                LOGGER.info("Security database created")
-
+        self.async_session = await DATABASE_ENGINE.async_get_session_factory()
         return self
 
     async def __aexit__(
@@ -72,12 +60,22 @@ class AsyncDbSecurity:
         tb: TracebackType | None,
     ) -> None:
         """Exit context manager."""
-        await self.engine.dispose()
 
     async def async_store_data(self, data: list[SecurityModel]) -> None:
         """Store data in the database."""
+        existing_data = {
+            (security.isin_code, security.name, security.currency)
+            for security in await self.async_filter_all()
+        }
+
         async with self.async_session() as session, session.begin():
-            await async_upsert_data(session=session, data_list=data)
+            await async_upsert_data(session=session, model=SecurityModel, data=data)
+
+        if any(
+            (security.isin_code, security.name, security.currency) not in existing_data
+            for security in data
+        ):
+            SECURITY_TABLE_VERSION.bump()
 
     async def async_filter_all(self) -> list[SecurityModel]:
         """Return all data in table."""
@@ -108,3 +106,5 @@ class AsyncDbSecurity:
             stmt = delete(SecurityModel)
             await session.execute(stmt)
             await session.commit()
+
+        SECURITY_TABLE_VERSION.bump()
@@ -2,16 +2,24 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+from itertools import groupby
 import logging
-from typing import TypeVar
+from typing import TYPE_CHECKING, Any, TypeVar, cast
 
+import pandas as pd
+import pyarrow as pa
 from sqlalchemy import Connection, inspect
+from sqlalchemy.dialects.sqlite import Insert, insert
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
     AsyncSession,
 )
 from sqlalchemy.orm import DeclarativeBase
 
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -21,6 +29,40 @@ class AsyncBase(AsyncAttrs, DeclarativeBase):
 
 T = TypeVar("T", bound=AsyncBase)
 
+type UpsertData = (
+    Sequence[AsyncBase] | Sequence[Mapping[str, Any]] | pd.DataFrame | pa.Table
+)
+"""Rows to upsert, as models, dicts, or columns of a data frame or Arrow table."""
+
+UPSERT_BATCH_SIZE = 500
+"""Number of rows written per statement."""
+
+
+@dataclass
+class TableVersion:
+    """
+    Track changes to the content of a table.
+
+    The version is increased every time the content of the table changes in this
+    process and can be used to invalidate data derived from the table.
+    """
+
+    version: int = 0
+
+    def bump(self) -> None:
+        """Mark the table as changed."""
+        self.version += 1
+
+
+@dataclass(frozen=True)
+class UpsertResult:
+    """The outcome of an upsert."""
+
+    stored: int
+    """Number of rows inserted or updated."""
+    failed: int
+    """Number of rows that could not be stored."""
+
 
 def check_table_exists(connection: Connection, table_name: str) -> bool:
     """Check if a table exists in the database."""
@@ -28,46 +70,121 @@ def check_table_exists(connection: Connection, table_name: str) -> bool:
     return table_name in inspector.get_table_names()
 
 
-async def async_upsert_data[T: AsyncBase](
+def _to_rows(model: type[AsyncBase], data: UpsertData) -> list[dict[str, Any]]:
+    """Convert data to one dict per row, keyed by column."""
+    if isinstance(data, pa.Table):
+        return cast("list[dict[str, Any]]", data.to_pylist())
+
+    if isinstance(data, pd.DataFrame):
+        return cast(
+            "list[dict[str, Any]]",
+            data.astype(object).where(data.notna(), None).to_dict("records"),
+        )
+
+    columns = {attr.key for attr in inspect(model).column_attrs}
+
+    return [
+        # Only the attributes that are set, like when merging the model
+        {key: value for key, value in vars(item).items() if key in columns}
+        if isinstance(item, AsyncBase)
+        else dict(item)
+        for item in data
+    ]
+
+
+def _upsert_statement(model: type[AsyncBase], keys: tuple[str, ...]) -> Insert:
+    """Return an INSERT that updates the given columns of existing rows."""
+    primary_keys = [column.name for column in inspect(model).primary_key]
+    statement = insert(model)
+
+    if update_keys := [key for key in keys if key not in primary_keys]:
+        return statement.on_conflict_do_update(
+            index_elements=primary_keys,
+            set_={key: statement.excluded[key] for key in update_keys},
+        )
+
+    return statement.on_conflict_do_nothing(index_elements=primary_keys)
+
+
+async def _async_upsert_rows(
+    session: AsyncSession,
+    model: type[AsyncBase],
+    rows: list[dict[str, Any]],
+) -> int:
+    """
+    Upsert rows one by one, logging the rows that fail.
+
+    Returns the number of failed rows.
+    """
+    failed = 0
+
+    for row in rows:
+        try:
+            async with session.begin_nested():
+                await session.execute(_upsert_statement(model, tuple(row)), [row])
+        except Exception:
+            failed += 1
+            LOGGER.exception(f"Failed to upsert item ({model.__name__})")
+
+    return failed
+
+
+async def async_upsert_data(
     *,
     session: AsyncSession,
-    data_list: list[T],
-) -> None:
-    """Merge (upsert) or insert data."""
-    successful_merges = 0
-    failed_merges = 0
+    model: type[AsyncBase],
+    data: UpsertData,
+    batch_size: int = UPSERT_BATCH_SIZE,
+) -> UpsertResult:
+    """
+    Insert data, or update rows with the same primary key.
+
+    Rows are written in batches using INSERT ... ON CONFLICT DO UPDATE. Only the
+    columns present in the data are updated. If a batch fails, its rows are written
+    one by one so that only the failing rows are skipped.
+    """
+    rows = _to_rows(model, data)
+    successful_upserts = 0
+    failed_upserts = 0
 
     try:
-        for item in data_list:
-            try:
-                await session.merge(item)  # Merge (upsert)
-                successful_merges += 1
-            except ValueError:
-                # This is likely the NumPy array truth value error
-                failed_merges += 1
-                LOGGER.exception(f"Failed to merge item ({type(item).__name__})")
-                continue
-            except Exception:
-                failed_merges += 1
-                LOGGER.exception(
-                    f"Unexpected error merging item ({type(item).__name__})"
-                )
-                continue
+        # Rows with the same columns are written using the same statement
+        for keys, group in groupby(rows, key=tuple):
+            statement = _upsert_statement(model, keys)
+            group_rows = list(group)
+
+            for start in range(0, len(group_rows), batch_size):
+                batch = group_rows[start : start + batch_size]
+
+                try:
+                    async with session.begin_nested():
+                        await session.execute(statement, batch)
+                except Exception as err:  # noqa: BLE001
+                    LOGGER.debug(f"Batch upsert failed, upserting row by row: {err}")
+                    failed = await _async_upsert_rows(session, model, batch)
+                    failed_upserts += failed
+                    successful_upserts += len(batch) - failed
+                else:
+                    successful_upserts += len(batch)
 
         # Commit once after processing all items
-        if successful_merges > 0:
+        if successful_upserts > 0:
             await session.commit()
             LOGGER.debug(
-                f"Committed {successful_merges} items (skipped {failed_merges})"
+                f"Committed {successful_upserts} items (skipped {failed_upserts})"
             )
         else:
             await session.rollback()
-            LOGGER.warning(
-                f"No successful merges to commit, all {failed_merges} items failed"
-            )
+            if failed_upserts > 0:
+                LOGGER.warning(
+                    f"No successful upserts to commit, all {failed_upserts} items "
+                    "failed"
+                )
 
     except Exception:
         # If any exception occurs, roll back the transaction
         await session.rollback()
         LOGGER.exception("Error during upsert operation")
         raise
+
+    return UpsertResult(stored=successful_upserts, failed=failed_upserts)
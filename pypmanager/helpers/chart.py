@@ -20,6 +20,7 @@ from pypmanager.utils.dt import (
     async_filter_df_by_date_range,
     async_get_empty_df_with_datetime_index,
 )
+from pypmanager.utils.executor import async_run_cpu_bound
 
 
 @strawberry.type
@@ -68,10 +69,12 @@ async def async_get_market_data_and_transaction(
     async with TransactionRegistry() as registry_obj:
         df_transactions = await registry_obj.async_get_registry()
 
-    df_security_holding_history = await SecurityHoldingHistory(
+    security_holding_history = await async_run_cpu_bound(
+        SecurityHoldingHistory,
         isin_code=isin_code,
         df_transaction_registry=df_transactions,
-    ).async_get_data()
+    )
+    df_security_holding_history = await security_holding_history.async_get_data()
 
     # Create a date range between start_date and end_date, excluding weekends
     # Set start date to 1980-01-01 to ensure all dates are included
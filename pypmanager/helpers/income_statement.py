@@ -9,6 +9,7 @@ import numpy as np
 import strawberry
 
 from pypmanager.ingest.transaction.const import TransactionRegistryColNameValues
+from pypmanager.utils.executor import async_run_cpu_bound
 
 if TYPE_CHECKING:
     import pandas as pd
@@ -33,6 +34,17 @@ async def async_pnl_map_isin_to_pnl_data(
 
     The function returns a dictionary with isin_code as key and pnl_total as value.
     """
+    return await async_run_cpu_bound(
+        _pnl_map_isin_to_pnl_data,
+        df_transaction_registry_all=df_transaction_registry_all,
+    )
+
+
+def _pnl_map_isin_to_pnl_data(
+    *,
+    df_transaction_registry_all: pd.DataFrame,
+) -> dict[str, PnLData]:
+    """Extract PnL data from the transaction registry."""
     # Group data and sum pnl_realized and pnl_unrealized by isin_code
     df_pnl = cast(
         "pd.DataFrame",
@@ -73,6 +85,17 @@ class ResultStatementRow:
 async def async_pnl_by_year_from_tr(
     *,
     df_transaction_registry_all: pd.DataFrame,
+) -> list[ResultStatementRow]:
+    """Extract aggregate yearly PnL-data from the transaction registry."""
+    return await async_run_cpu_bound(
+        _pnl_by_year_from_tr,
+        df_transaction_registry_all=df_transaction_registry_all,
+    )
+
+
+def _pnl_by_year_from_tr(
+    *,
+    df_transaction_registry_all: pd.DataFrame,
 ) -> list[ResultStatementRow]:
     """Extract aggregate yearly PnL-data from the transaction registry."""
     output_list: list[ResultStatementRow] = []
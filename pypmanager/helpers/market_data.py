@@ -2,24 +2,28 @@
 
 from __future__ import annotations
 
-from asyncio import sleep
+import asyncio
 from dataclasses import dataclass
-from datetime import UTC, date, datetime
+from datetime import UTC, date, datetime, timedelta
 from importlib import import_module
 import logging
-from random import randint
+from time import perf_counter
 from typing import TYPE_CHECKING, cast
 
+import httpx
 import pandas as pd
 from requests import HTTPError
 import strawberry
 import yaml
 
-from pypmanager.database.market_data import AsyncMarketDataDB, MarketDataModel
+from pypmanager.database.market_data import AsyncMarketDataDB
 from pypmanager.error import DataError
 from pypmanager.helpers.security import async_security_map_isin_to_security
+from pypmanager.ingest.market_data.const import FETCH_OVERLAP_DAYS
+from pypmanager.ingest.market_data.fetcher import AsyncHttpFetcher
 from pypmanager.ingest.market_data.models import Source, Sources
 from pypmanager.settings import Settings
+from pypmanager.utils.compression import glob_with_compressed, open_source
 
 LOGGER = logging.getLogger(__name__)
 
@@ -30,39 +34,39 @@ if TYPE_CHECKING:
 async def async_sync_csv_to_db() -> None:
     """Sync CSV data to database.
 
-    This function reads market data from CSV files and stores it in the market data
-    database.
+    This function reads market data from CSV files, which may be compressed, and
+    stores it in the market data database.
     """
-    all_data: list[MarketDataModel] = []
     all_security = await async_security_map_isin_to_security()
-
-    for file in Settings.dir_market_data_local.glob("*.csv"):
-        df_market_data = pd.read_csv(file, sep=";")
-        # set report_date as index
-        df_market_data["report_date"] = pd.to_datetime(
-            df_market_data["report_date"]
-        ).dt.tz_localize(Settings.system_time_zone)
-        df_market_data = df_market_data.set_index("report_date")
-
-        # Loop over each row in df_market_data
-        for index, row in df_market_data.iterrows():
-            isin_code = row["isin_code"]
-
-            security_obj = all_security.get(isin_code)
-            all_data.append(
-                MarketDataModel(
-                    isin_code=isin_code,
-                    report_date=index,
-                    close_price=row["price"],
-                    source=row["source"],
-                    currency=security_obj.currency if security_obj else None,
-                )
+    currency_by_isin = {
+        isin_code: security.currency for isin_code, security in all_security.items()
+    }
+    all_data: list[pd.DataFrame] = []
+
+    for file in glob_with_compressed(Settings.dir_market_data_local, "*.csv"):
+        with open_source(file) as source:
+            df_market_data = pd.read_csv(source, sep=";")
+
+        all_data.append(
+            pd.DataFrame(
+                {
+                    "isin_code": df_market_data["isin_code"],
+                    "report_date": pd.to_datetime(
+                        df_market_data["report_date"]
+                    ).dt.tz_localize(Settings.system_time_zone),
+                    "close_price": df_market_data["price"],
+                    "source": df_market_data["source"],
+                    "currency": df_market_data["isin_code"].map(currency_by_isin),
+                }
             )
+        )
 
+    # Stored without building a model per row
+    df_all = pd.concat(all_data, ignore_index=True) if all_data else pd.DataFrame()
     async with AsyncMarketDataDB() as db:
-        await db.async_store_market_data(all_data)
+        await db.async_store_market_data(df_all)
 
-    LOGGER.info(f"Stored {len(all_data)} records from CSV files to the database")
+    LOGGER.info(f"Stored {len(df_all)} records from CSV files to the database")
 
 
 async def async_load_market_data_config() -> list[Source]:
@@ -95,33 +99,18 @@ async def async_get_market_data(isin_code: str | None = None) -> pd.DataFrame:
     """
     Get market data from database.
 
-    Returns df with columns isin_code, price, date_added_utc, source.
+    Returns df with columns isin_code, price, date_added_utc, source, indexed by
+    report_date.
     """
     async with AsyncMarketDataDB() as db:
-        data = await db.async_filter_all(isin_code=isin_code)
-
-        if not data:
-            return pd.DataFrame()
-
-        data_as_dict = [
-            {
-                "isin_code": record.isin_code,
-                "price": record.close_price,
-                "report_date": record.report_date,
-                "date_added_utc": record.date_added,
-                "source": record.source,
-            }
-            for record in data
-        ]
-
-        # Convert the data to a DataFrame
-        df_data = pd.DataFrame(data_as_dict)
-
-        # Convert the 'report_date' column to datetime and set it as the index
-        df_data["report_date"] = pd.to_datetime(df_data["report_date"]).dt.tz_localize(
-            Settings.system_time_zone
+        df_data = await db.async_read_df(
+            columns=("isin_code", "close_price", "date_added", "source"),
+            isin_code=isin_code,
         )
-        return df_data.set_index("report_date")
+
+    return df_data.rename(
+        columns={"close_price": "price", "date_added": "date_added_utc"}
+    )
 
 
 async def async_get_last_market_data_df() -> pd.DataFrame:
@@ -137,6 +126,22 @@ async def async_get_last_market_data_df() -> pd.DataFrame:
     return df_data.set_index("report_date")
 
 
+async def async_get_fetch_start_dates() -> dict[str, date]:
+    """
+    Return the first date to download per ISIN code.
+
+    The last stored report date is loaded again, with FETCH_OVERLAP_DAYS days before
+    it, to pick up prices revised by the source.
+    """
+    async with AsyncMarketDataDB() as db:
+        data = await db.async_get_last_close_price_by_isin()
+
+    return {
+        isin_code: date.fromisoformat(report_date) - timedelta(days=FETCH_OVERLAP_DAYS)
+        for isin_code, report_date, _ in data
+    }
+
+
 @strawberry.type
 @dataclass
 class MarketDataOverviewRecord:
@@ -154,28 +159,30 @@ async def async_get_market_data_overview() -> list[MarketDataOverviewRecord]:
     sources = await async_load_market_data_config()
     all_security = await async_security_map_isin_to_security()
 
+    # Read the dates of all securities at once
+    async with AsyncMarketDataDB() as db:
+        df_dates = await db.async_read_df(columns=("isin_code",))
+
+    date_range = (
+        df_dates.reset_index()
+        .groupby("isin_code")["report_date"]
+        .agg(["min", "max"])
+        .to_dict("index")
+    )
+
     output_data: list[MarketDataOverviewRecord] = []
 
     # For each source, get first and last date or market data
     for source in sources:
-        df_market_data = await async_get_market_data(isin_code=source.isin_code)
-
         # Add the name of the security to the source
         security_obj = all_security.get(source.isin_code)
         name = security_obj.name if security_obj else source.name
         currency = security_obj.currency if security_obj else None
 
-        # first_date should be None if the index min is nan
-        if pd.isna(df_market_data.index.min()):
-            first_date = None
-        else:
-            first_date = pd.to_datetime(df_market_data.index.min()).date()
-
-        # last_date should be None if the index max is nan
-        if pd.isna(df_market_data.index.max()):
-            last_date = None
-        else:
-            last_date = pd.to_datetime(df_market_data.index.max()).date()
+        # The dates are None if there is no market data
+        dates = date_range.get(source.isin_code, {})
+        first_date = dates["min"].date() if dates else None
+        last_date = dates["max"].date() if dates else None
 
         output_data.append(
             MarketDataOverviewRecord(
@@ -209,61 +216,161 @@ def _class_importer(name: str) -> type[BaseMarketDataLoader] | None:
     return None
 
 
-async def async_download_market_data() -> None:
-    """Load JSON-data from a source."""
-    sources = await async_load_market_data_config()
+@dataclass(frozen=True)
+class MarketDataDownloadMetrics:
+    """The time taken to download market data."""
 
-    for idx, source in enumerate(sources):
-        loader_class = source.loader_class
-        LOGGER.info(f"{idx}: Parsing {source.isin_code} using {loader_class}")
+    total_seconds: float
+    """The time taken to download all sources."""
+    seconds_by_isin_code: dict[str, float]
+    """
+    The time taken to download and parse the sources, by ISIN code.
 
-        if "plugin" in loader_class:
-            LOGGER.info(f"Using plugin {loader_class}")
-            loader_class_full_path = loader_class.replace("plugin", "pypmanager_plugin")
-        else:
-            loader_class_full_path = f"pypmanager.ingest.market_data.{loader_class}"
+    This includes the wait for the limits of the host. The times of sources with the
+    same ISIN code are added up. Failed sources are left out.
+    """
 
-        try:
-            data_loader_klass = _class_importer(loader_class_full_path)
-        except AttributeError as err:
-            msg = "Unable to load data"
-            raise DataError(msg, err) from err
 
-        if data_loader_klass is None:
-            continue
+def _get_loader_class(source: Source) -> type[BaseMarketDataLoader] | None:
+    """Return the loader class of a source."""
+    loader_class = source.loader_class
 
-        all_security = await async_security_map_isin_to_security()
+    if "plugin" in loader_class:
+        LOGGER.info(f"Using plugin {loader_class}")
+        loader_class_full_path = loader_class.replace("plugin", "pypmanager_plugin")
+    else:
+        loader_class_full_path = f"pypmanager.ingest.market_data.{loader_class}"
 
-        try:
-            loader = data_loader_klass(
-                lookup_key=source.lookup_key,
-                isin_code=source.isin_code,
-                name=source.name,
+    try:
+        return _class_importer(loader_class_full_path)
+    except AttributeError as err:
+        msg = "Unable to load data"
+        raise DataError(msg, err) from err
+
+
+async def _async_download_source(  # noqa: PLR0913
+    idx: int,
+    source: Source,
+    *,
+    loader_class: type[BaseMarketDataLoader],
+    fetcher: AsyncHttpFetcher,
+    start_date: date | None,
+    currency: str | None,
+    store_lock: asyncio.Lock,
+) -> float | None:
+    """Download and store the market data of a source, returning the time taken."""
+    LOGGER.info(f"{idx}: Parsing {source.isin_code} using {source.loader_class}")
+
+    started = perf_counter()
+    try:
+        loader = loader_class(
+            lookup_key=source.lookup_key,
+            isin_code=source.isin_code,
+            name=source.name,
+            start_date=start_date,
+            load=False,
+        )
+        await loader.async_get_response(fetcher)
+        data_list = loader.to_source_data()
+    except (HTTPError, httpx.HTTPError, DataError):
+        LOGGER.exception(f"HTTP error when loading {source.isin_code}")
+        return None
+    except Exception:
+        # E.g. a malformed response, which shouldn't stop the other sources
+        LOGGER.exception(f"Unable to load {source.isin_code}")
+        return None
+    seconds = perf_counter() - started
+
+    date_added = datetime.now(UTC).date()
+    df_data = pd.DataFrame(
+        [
+            {
+                "isin_code": record.isin_code,
+                "report_date": record.report_date,
+                "close_price": record.price,
+                "date_added": date_added,
+                "source": loader.source,
+                "currency": currency,
+            }
+            for record in data_list
+        ]
+    )
+
+    try:
+        # SQLite has one writer at a time
+        async with store_lock, AsyncMarketDataDB() as db:
+            result = await db.async_store_changed_market_data(df_data)
+    except Exception:
+        LOGGER.exception(f"Unable to store market data of {source.isin_code}")
+        return None
+
+    failed = f", {result.failed} failed" if result.failed else ""
+    LOGGER.info(
+        f"Stored market data of {source.isin_code} from {loader.source} in "
+        f"{seconds:.2f} s: {result.inserted} inserted, {result.updated} updated, "
+        f"{result.unchanged} unchanged{failed}"
+    )
+
+    return seconds
+
+
+async def async_download_market_data(
+    *, backfill: bool = False
+) -> MarketDataDownloadMetrics:
+    """
+    Load JSON-data from a source.
+
+    Only data since the last stored report date is downloaded, unless backfill is
+    set, in which case the full history is downloaded.
+
+    The sources are downloaded concurrently. The requests to each host are limited
+    by AsyncHttpFetcher, to avoid spamming APIs.
+    """
+    sources = await async_load_market_data_config()
+    start_dates = {} if backfill else await async_get_fetch_start_dates()
+    all_security = await async_security_map_isin_to_security()
+    store_lock = asyncio.Lock()
+
+    started = perf_counter()
+    async with AsyncHttpFetcher() as fetcher:
+        # The same ISIN code may be listed by more than one source
+        downloads = [
+            (
+                source,
+                _async_download_source(
+                    idx,
+                    source,
+                    loader_class=loader_class,
+                    fetcher=fetcher,
+                    start_date=start_dates.get(source.isin_code),
+                    currency=(
+                        security_obj.currency
+                        if (security_obj := all_security.get(source.isin_code))
+                        else None
+                    ),
+                    store_lock=store_lock,
+                ),
             )
-            data_list = loader.to_source_data()
-        except HTTPError:
-            LOGGER.exception(f"HTTP error when loading {loader}")
-        except AttributeError:
-            LOGGER.exception(f"Unable to load {loader}")
-
-        db_data_list: list[MarketDataModel] = []
-        for record in data_list:
-            security_obj = all_security.get(record.isin_code)
-
-            db_data_list.append(
-                MarketDataModel(
-                    isin_code=record.isin_code,
-                    report_date=record.report_date,
-                    close_price=record.price,
-                    date_added=datetime.now(UTC),
-                    source=loader.source,
-                    currency=security_obj.currency if security_obj else None,
-                )
+            for idx, source in enumerate(sources)
+            if (loader_class := _get_loader_class(source)) is not None
+        ]
+        results = await asyncio.gather(*(download for _, download in downloads))
+
+    seconds_by_isin_code: dict[str, float] = {}
+    for (source, _), seconds in zip(downloads, results, strict=True):
+        if seconds is not None:
+            seconds_by_isin_code[source.isin_code] = (
+                seconds_by_isin_code.get(source.isin_code, 0) + seconds
             )
 
-        async with AsyncMarketDataDB() as db:
-            await db.async_store_market_data(db_data_list)
+    metrics = MarketDataDownloadMetrics(
+        total_seconds=perf_counter() - started,
+        seconds_by_isin_code=seconds_by_isin_code,
+    )
+    downloaded = sum(seconds is not None for seconds in results)
+    LOGGER.info(
+        f"Downloaded {downloaded} of {len(sources)} sources "
+        f"in {metrics.total_seconds:.2f} s"
+    )
 
-        # Sleep for a random amount of time between 1 and 5 seconds to avoid spamming
-        # APIs
-        await sleep(randint(1, 5))  # noqa: S311
+    return metrics
@@ -1,11 +1,17 @@
 """Helper functions for working with securities."""
 
+from __future__ import annotations
+
+from dataclasses import dataclass
 import logging
 
+import numpy as np
+import pandas as pd
 from pydantic import BaseModel
 from strawberry.experimental.pydantic import type as pydantic_type
 
-from pypmanager.database.security import AsyncDbSecurity
+from pypmanager.database.security import SECURITY_TABLE_VERSION, AsyncDbSecurity
+from pypmanager.settings import Settings
 
 LOGGER = logging.getLogger(__name__)
 
@@ -46,3 +52,91 @@ async def async_security_map_name_to_isin() -> dict[str, str]:
     """Return a dict to get the ISIN code from a security name."""
     security_data = await async_security_map_isin_to_security()
     return {security.name: isin for isin, security in security_data.items()}
+
+
+def normalize_security_name(name: str) -> str:
+    """
+    Normalize a security name before looking it up.
+
+    Some brokers export names with special characters like � instead of ä.
+    """
+    return name.replace("\ufffd", "ä")
+
+
+@dataclass(frozen=True)
+class SecurityNameIndex:
+    """Look up ISIN codes by normalized security name."""
+
+    key: tuple[str, int]
+    """The database and the version of the security table the index was built from."""
+    isin_by_name: dict[str, str]
+
+    def lookup(
+        self: SecurityNameIndex, names: pd.Series
+    ) -> tuple[pd.Series, pd.Series]:
+        """
+        Return the normalized names and their ISIN codes.
+
+        Each distinct name is only normalized and looked up once. The ISIN code is NaN
+        for names that are not in the index.
+        """
+        unique_names = [
+            name for name in names.dropna().unique() if isinstance(name, str)
+        ]
+        normalized_names = [normalize_security_name(name) for name in unique_names]
+
+        df_lookup = pd.DataFrame(
+            {
+                "name": normalized_names,
+                "isin_code": [
+                    self.isin_by_name.get(name, np.nan) for name in normalized_names
+                ],
+            },
+            index=pd.Index(unique_names, dtype=object),
+        ).reindex(names)
+
+        return (
+            pd.Series(df_lookup["name"].to_numpy(), index=names.index),
+            pd.Series(df_lookup["isin_code"].to_numpy(), index=names.index),
+        )
+
+
+class SecurityNameIndexCache:
+    """
+    Keep an index of the security names in memory.
+
+    The index is only rebuilt when the content of the security table changes, e.g.
+    when the security files are synced to the database.
+    """
+
+    def __init__(self: SecurityNameIndexCache) -> None:
+        """Init class."""
+        self.builds = 0
+        self._index: SecurityNameIndex | None = None
+
+    async def async_get(self: SecurityNameIndexCache) -> SecurityNameIndex:
+        """Return an up to date index."""
+        # Read before the table, so changes made while building trigger a rebuild
+        key = (str(Settings.database_local), SECURITY_TABLE_VERSION.version)
+
+        if self._index is None or self._index.key != key:
+            async with AsyncDbSecurity() as db:
+                securities = await db.async_filter_all()
+
+            self.builds += 1
+            self._index = SecurityNameIndex(
+                key=key,
+                isin_by_name={
+                    normalize_security_name(security.name): security.isin_code
+                    for security in securities
+                },
+            )
+
+        return self._index
+
+    def invalidate(self: SecurityNameIndexCache) -> None:
+        """Rebuild the index on next lookup."""
+        self._index = None
+
+
+SECURITY_NAME_INDEX = SecurityNameIndexCache()
@@ -4,13 +4,17 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date  # noqa: TC003
-from typing import cast
+from typing import TYPE_CHECKING, cast
 
 import numpy as np
 import strawberry
 
 from pypmanager.ingest.transaction.const import TransactionRegistryColNameValues
 from pypmanager.ingest.transaction.transaction_registry import TransactionRegistry
+from pypmanager.utils.executor import async_run_cpu_bound
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 @strawberry.type
@@ -42,6 +46,11 @@ async def async_get_all_transactions() -> list[TransactionRow]:
     async with TransactionRegistry(sort_by_date_descending=True) as registry_obj:
         transaction_list = await registry_obj.async_get_registry()
 
+    return await async_run_cpu_bound(_transaction_rows_from_tr, transaction_list)
+
+
+def _transaction_rows_from_tr(transaction_list: pd.DataFrame) -> list[TransactionRow]:
+    """Convert the transaction registry to a list of transaction rows."""
     transaction_list = transaction_list.replace({np.nan: None})
 
     output_list: list[TransactionRow] = []
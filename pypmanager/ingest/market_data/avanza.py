@@ -12,6 +12,7 @@ class AvanzaLoader(BaseMarketDataLoader):
     """Load data from Avanza."""
 
     url = "https://www.avanza.se/_api/fund-guide/guide/"
+    async_fetch_supported = True
 
     @property
     def full_url(self: AvanzaLoader) -> str:
@@ -3,16 +3,20 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from datetime import UTC, date, datetime, timedelta
 import json
-from typing import TYPE_CHECKING, Any, cast
+from typing import TYPE_CHECKING, Any, ClassVar, cast
 
 import requests
 
 from pypmanager.const import HttpStatusCodes
 
+from .const import LOAD_HISTORY_DAYS
+
 if TYPE_CHECKING:
     from io import BytesIO
 
+    from .fetcher import AsyncHttpFetcher
     from .models import SourceData
 
 
@@ -21,6 +25,14 @@ class BaseMarketDataLoader(ABC):
 
     TIMEOUT_SECOND = 10
 
+    http_method: ClassVar[str] = "GET"
+    async_fetch_supported: ClassVar[bool] = False
+    """
+    Set if full_url can be requested by AsyncHttpFetcher, see parse_response.
+
+    Otherwise, get_response is run in a worker thread.
+    """
+
     raw_response: dict[str, Any]
     raw_response_io: BytesIO
 
@@ -29,17 +41,42 @@ class BaseMarketDataLoader(ABC):
         isin_code: str,
         lookup_key: str,
         name: str | None = None,
+        start_date: date | None = None,
+        *,
+        load: bool = True,
     ) -> None:
-        """Init class."""
+        """
+        Init class.
+
+        Data is loaded from start_date, if the source supports it. Otherwise, the
+        last LOAD_HISTORY_DAYS days are loaded.
+
+        If load is not set, the data is loaded later by async_get_response.
+        """
         self.isin_code = isin_code
         self.lookup_key = lookup_key
         self.name = name
+        self.start_date = start_date
 
         # Create a session and add headers
         self.session = requests.Session()
         self.session.headers.update(self.headers)
 
-        self.get_response()
+        if load:
+            self.get_response()
+
+    @property
+    def fetch_start_date(self: BaseMarketDataLoader) -> date:
+        """Return the first date to load."""
+        if self.start_date is not None:
+            return self.start_date
+
+        return datetime.now(UTC).date() - timedelta(days=LOAD_HISTORY_DAYS)
+
+    @property
+    def history_days(self: BaseMarketDataLoader) -> int:
+        """Return the number of days to load, counting back from today."""
+        return max((datetime.now(UTC).date() - self.fetch_start_date).days, 1)
 
     @property
     def extra_headers(self: BaseMarketDataLoader) -> dict[str, str] | None:
@@ -70,6 +107,30 @@ class BaseMarketDataLoader(ABC):
 
         return {}
 
+    def request_content(self: BaseMarketDataLoader) -> bytes | None:
+        """Return the body of the request."""
+        return None
+
+    def parse_response(self: BaseMarketDataLoader, content: bytes) -> None:
+        """Parse the body of a response from an async request."""
+        self.raw_response = cast("dict[str, Any]", json.loads(content))
+
+    async def async_get_response(
+        self: BaseMarketDataLoader, fetcher: AsyncHttpFetcher
+    ) -> None:
+        """Get response without blocking the event loop."""
+        if not self.async_fetch_supported:
+            await fetcher.async_run_blocking(self.full_url, self.get_response)
+            return
+
+        content = await fetcher.async_request(
+            self.http_method,
+            self.full_url,
+            headers=self.headers,
+            content=self.request_content(),
+        )
+        self.parse_response(content)
+
     @abstractmethod
     def get_response(self: BaseMarketDataLoader) -> None:
         """Get reqponse."""
@@ -5,3 +5,7 @@ import logging
 LOGGER = logging.getLogger(__package__)
 
 LOAD_HISTORY_DAYS = 180
+"""Days of history to load when there is no stored market data, or on backfill."""
+
+FETCH_OVERLAP_DAYS = 7
+"""Days of stored market data to load again, in case the source revised prices."""
@@ -0,0 +1,157 @@
+"""Download market data concurrently, without blocking the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import TYPE_CHECKING, Self
+from urllib.parse import urlsplit
+
+import httpx
+
+from pypmanager.settings import Settings
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable
+    from types import TracebackType
+
+
+@dataclass
+class TokenBucket:
+    """
+    Limit the rate of requests, allowing short bursts.
+
+    The bucket holds up to capacity tokens and is refilled with rate tokens per
+    second. Each request takes a token, waiting for one if the bucket is empty.
+    """
+
+    rate: float
+    capacity: float
+    _tokens: float = field(init=False)
+    _updated: float = field(init=False, default_factory=monotonic)
+    _lock: asyncio.Lock = field(init=False, default_factory=asyncio.Lock)
+
+    def __post_init__(self: TokenBucket) -> None:
+        """Start with a full bucket."""
+        self._tokens = self.capacity
+
+    async def async_acquire(self: TokenBucket) -> None:
+        """Take a token, waiting until one is available."""
+        # Waiting callers are served in order
+        async with self._lock:
+            while True:
+                now = monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class HostLimit:
+    """The number of concurrent requests to, and the request rate of, a host."""
+
+    semaphore: asyncio.Semaphore
+    bucket: TokenBucket
+
+
+class AsyncHttpFetcher:
+    """
+    Send HTTP requests from the event loop, limited per host.
+
+    Connections are pooled by one client. The number of concurrent requests to a
+    host is capped, and the requests to a host are rate limited by a token bucket, so
+    independent sources can be downloaded concurrently without flooding an API.
+    """
+
+    def __init__(
+        self: AsyncHttpFetcher,
+        *,
+        max_concurrency_per_host: int | None = None,
+        requests_per_second: float | None = None,
+        burst: int | None = None,
+        timeout: float = 10,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        """Init class. Limits that are not set are read from the settings."""
+        self.max_concurrency_per_host = (
+            max_concurrency_per_host or Settings.market_data_max_concurrency_per_host
+        )
+        self.requests_per_second = (
+            requests_per_second or Settings.market_data_requests_per_second
+        )
+        self.burst = burst or Settings.market_data_burst
+        self.timeout = timeout
+        self.transport = transport
+        self.host_limits: dict[str, HostLimit] = {}
+        self._client: httpx.AsyncClient | None = None
+
+    async def __aenter__(self: Self) -> Self:
+        """Open the connection pool."""
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            follow_redirects=True,
+            transport=self.transport,
+        )
+        return self
+
+    async def __aexit__(
+        self: AsyncHttpFetcher,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Close the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def async_request(
+        self: AsyncHttpFetcher,
+        method: str,
+        url: str,
+        *,
+        headers: dict[str, str] | None = None,
+        content: bytes | None = None,
+    ) -> bytes:
+        """Send a request and return the body, raising on error status codes."""
+        if self._client is None:
+            msg = "The fetcher is not open"
+            raise RuntimeError(msg)
+
+        async with self._async_limit(url):
+            response = await self._client.request(
+                method, url, headers=headers, content=content
+            )
+
+        response.raise_for_status()
+        return response.content
+
+    async def async_run_blocking[T](
+        self: AsyncHttpFetcher, url: str, func: Callable[[], T]
+    ) -> T:
+        """Run a blocking request in a worker thread, with the limits of its host."""
+        async with self._async_limit(url):
+            return await asyncio.to_thread(func)
+
+    @asynccontextmanager
+    async def _async_limit(self: AsyncHttpFetcher, url: str) -> AsyncIterator[None]:
+        """Wait for a free slot and a token of the host."""
+        host = urlsplit(url).netloc
+        if (limit := self.host_limits.get(host)) is None:
+            limit = self.host_limits[host] = HostLimit(
+                semaphore=asyncio.Semaphore(self.max_concurrency_per_host),
+                bucket=TokenBucket(rate=self.requests_per_second, capacity=self.burst),
+            )
+
+        async with limit.semaphore:
+            await limit.bucket.async_acquire()
+            yield
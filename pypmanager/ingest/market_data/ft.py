@@ -8,7 +8,6 @@ from typing import Any
 
 from pypmanager.const import HttpStatusCodes
 from pypmanager.error import DataError
-from pypmanager.ingest.market_data.const import LOAD_HISTORY_DAYS
 
 from .base_loader import BaseMarketDataLoader
 from .models import SourceData
@@ -18,6 +17,8 @@ class FTLoader(BaseMarketDataLoader):
     """Load data from Financial Times."""
 
     full_url = "https://markets.ft.com/data/chartapi/series"
+    http_method = "POST"
+    async_fetch_supported = True
 
     @property
     def extra_headers(self: FTLoader) -> dict[str, str] | None:
@@ -27,7 +28,7 @@ class FTLoader(BaseMarketDataLoader):
     def get_payload(self: FTLoader) -> dict[str, Any]:
         """Get payload."""
         return {
-            "days": LOAD_HISTORY_DAYS,
+            "days": self.history_days,
             "dataNormalized": False,
             "dataPeriod": "Day",
             "dataInterval": 1,
@@ -49,6 +50,10 @@ class FTLoader(BaseMarketDataLoader):
             ],
         }
 
+    def request_content(self: FTLoader) -> bytes | None:
+        """Return the body of the request."""
+        return json.dumps(self.get_payload()).encode()
+
     def get_response(self: FTLoader) -> None:
         """Get reqponse."""
         response = self.session.post(
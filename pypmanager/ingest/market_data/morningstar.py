@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime
 from io import BytesIO
 
 import pandas as pd
@@ -10,7 +10,6 @@ import pandas as pd
 from pypmanager.const import HttpStatusCodes
 
 from .base_loader import BaseMarketDataLoader
-from .const import LOAD_HISTORY_DAYS
 from .models import SourceData
 
 
@@ -22,13 +21,12 @@ class MorningstarLoader(BaseMarketDataLoader):
         "id={lookup_key}&currencyId={currency}&idtype=Morningstar&frequency=daily"
         "&startDate={start_date}&endDate={end_date}&outputType=JSON"
     )
+    async_fetch_supported = True
 
     @property
     def full_url(self: MorningstarLoader) -> str:
         """Return full URL, including lookup key."""
-        start_date = (datetime.now(UTC) - timedelta(days=LOAD_HISTORY_DAYS)).strftime(
-            "%Y-%m-%d",
-        )
+        start_date = self.fetch_start_date.strftime("%Y-%m-%d")
         end_date = datetime.now(UTC).strftime("%Y-%m-%d")
         currency = "SEK"
 
@@ -75,6 +73,7 @@ class MorningstarLoaderSHB(BaseMarketDataLoader):
     """
 
     url = "https://handelsbanken.fondlista.se/shb/sv/history/onefund.xls"
+    async_fetch_supported = True
 
     @property
     def full_url(self: MorningstarLoaderSHB) -> str:
@@ -89,6 +88,10 @@ class MorningstarLoaderSHB(BaseMarketDataLoader):
         if response.status_code == HttpStatusCodes.OK:
             self.raw_response_io = BytesIO(response.content)
 
+    def parse_response(self: MorningstarLoaderSHB, content: bytes) -> None:
+        """Parse the body of a response from an async request."""
+        self.raw_response_io = BytesIO(content)
+
     @property
     def source(self: MorningstarLoaderSHB) -> str:
         """Get name of source."""
@@ -6,30 +6,64 @@ from typing import ClassVar
 
 import pandas as pd
 
+from pypmanager.utils.executor import async_run_cpu_bound
+
 from .base_loader import TransactionLoader
 from .const import (
     ColumnNameValues,
     TransactionRegistryColNameValues,
     TransactionTypeValues,
 )
+from .csv_reader import SourceSchema
 
 
-def _transaction_type(row: pd.DataFrame) -> pd.Series:
+def _transaction_type(df: pd.DataFrame) -> pd.Series:
     """Handle special cases."""
-    if (
-        row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE] == "Övrigt"
-        and row[TransactionRegistryColNameValues.SOURCE_NAME_SECURITY]
-        == "Avkastningsskatt"
-    ):
-        return TransactionTypeValues.FEE
+    transaction_type = df[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE]
+    name = df[TransactionRegistryColNameValues.SOURCE_NAME_SECURITY].astype(str)
+
+    is_other = transaction_type == "Övrigt"
+    is_fee = is_other & (name == "Avkastningsskatt")
+    is_fee_credit = (
+        is_other & ~is_fee & name.str.contains("Flyttavg", regex=False, na=False)
+    )
+
+    return transaction_type.mask(is_fee, TransactionTypeValues.FEE).mask(
+        is_fee_credit, TransactionTypeValues.FEE_CREDIT
+    )
+
+
+def _coalesce_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge columns with the same name and keep the first value that is not NaN.
+
+    The columns of the result are sorted by name.
+    """
+    columns: dict[str, pd.Series] = {}
+    for name in sorted(df.columns.unique()):
+        values = df[name]
+        if isinstance(values, pd.DataFrame):
+            merged = values.iloc[:, 0]
+            for position in range(1, values.shape[1]):
+                merged = merged.where(merged.notna(), values.iloc[:, position])
+            values = merged
+
+        columns[name] = values
+
+    return pd.DataFrame(columns, index=df.index)
 
-    if (
-        row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE] == "Övrigt"
-        and "Flyttavg" in row[TransactionRegistryColNameValues.SOURCE_NAME_SECURITY]
-    ):
-        return TransactionTypeValues.FEE_CREDIT
 
-    return row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE]
+def _pre_process_df(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Broker specific manipulation of the data frame."""
+    df_raw[TransactionRegistryColNameValues.SOURCE_BROKER.value] = "Avanza"
+
+    df_raw[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE] = (
+        _transaction_type(df_raw)
+    )
+
+    # Several source columns, e.g. Courtage and Courtage (SEK), map to the same
+    # column
+    return _coalesce_columns(df_raw)
 
 
 class AvanzaLoader(TransactionLoader):
@@ -57,6 +91,23 @@ class AvanzaLoader(TransactionLoader):
         "Valutakurs": TransactionRegistryColNameValues.SOURCE_FX.value,
     }
 
+    header_signature = frozenset(
+        {"Datum", "Konto", "Typ av transaktion", "Värdepapper/beskrivning"}
+    )
+    source_schema = SourceSchema(
+        number_columns=(
+            "Antal",
+            "Kurs",
+            "Belopp",
+            "Courtage",
+            "Courtage (SEK)",
+            "FX",
+            "Valutakurs",
+        ),
+        decimal_point=",",
+        thousands_separator=" ",
+    )
+
     file_pattern = "avanza*.csv"
     date_format_pattern = "%Y-%m-%d"
 
@@ -75,17 +126,4 @@ class AvanzaLoader(TransactionLoader):
 
     async def async_pre_process_df(self: AvanzaLoader) -> None:
         """Broker specific manipulation of the data frame."""
-        df_raw = self.df_final
-
-        df_raw[TransactionRegistryColNameValues.SOURCE_BROKER.value] = "Avanza"
-
-        df_raw[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE] = df_raw.apply(
-            _transaction_type,
-            axis=1,
-        )
-
-        # Merge columns with the same name and keep the value that is not NaN
-        with pd.option_context("future.no_silent_downcasting", True):  # noqa: FBT003
-            df_raw = df_raw.T.groupby(level=0).apply(lambda x: x.bfill().iloc[0]).T
-
-        self.df_final = df_raw
+        self.df_final = await async_run_cpu_bound(_pre_process_df, self.df_final)
@@ -3,30 +3,36 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+import asyncio
 import logging
-from pathlib import Path
 from typing import TYPE_CHECKING, ClassVar, Self
 
 import pandas as pd
 
 from pypmanager.error import DataIntegrityError
 from pypmanager.settings import Settings
+from pypmanager.utils.compression import open_source, strip_compression_suffix
+from pypmanager.utils.executor import async_run_cpu_bound
 
 from .const import (
     ColumnNameValues,
     CSVSeparator,
     TransactionRegistryColNameValues,
 )
+from .csv_cache import evict_stale_entries, read_csv_cached
+from .csv_reader import SourceSchema, iter_csv_chunks, read_csv_with_schema
+from .file_manifest import TRANSACTION_FILE_MANIFEST
 
 _LOGGER = logging.getLogger(__package__)
 
 if TYPE_CHECKING:
+    from pathlib import Path
     from types import TracebackType
 
 
 def _get_filename(file_path: Path) -> str:
     """Return name of file."""
-    filename = file_path.name.replace(".csv", "")
+    filename = strip_compression_suffix(file_path.name).replace(".csv", "")
     splitted_file_path = filename.split("-")
 
     if len(splitted_file_path) == 2:  # noqa: PLR2004
@@ -37,6 +43,50 @@ def _get_filename(file_path: Path) -> str:
     return filename.capitalize()
 
 
+def _rename_and_drop_columns(
+    df_raw: pd.DataFrame,
+    col_map: dict[str, str] | None,
+    drop_cols: list[str] | None,
+) -> pd.DataFrame:
+    """Rename columns and drop columns that are not needed."""
+    if col_map is not None:
+        df_raw = df_raw.rename(columns=col_map)
+
+    if drop_cols is not None:
+        df_raw = df_raw.drop(
+            columns=[col for col in drop_cols if col in df_raw.columns]
+        )
+
+    return df_raw
+
+
+def _filter_transaction_type(
+    df_raw: pd.DataFrame, include_transaction_type: list[str]
+) -> pd.DataFrame:
+    """Filter transaction types."""
+    return df_raw[
+        df_raw[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE].isin(
+            include_transaction_type
+        )
+    ]
+
+
+def _normalize_transaction_date(
+    df_raw: pd.DataFrame, date_format_pattern: str
+) -> pd.DataFrame:
+    """
+    Make sure transaction date is in the correct format.
+
+    We expect 2024-06-27 00:00:00+02:00.
+    """
+    df_raw[TransactionRegistryColNameValues.SOURCE_TRANSACTION_DATE] = pd.to_datetime(
+        df_raw[TransactionRegistryColNameValues.SOURCE_TRANSACTION_DATE],
+        format=date_format_pattern,
+    )
+
+    return df_raw
+
+
 EMPTY_DF = pd.DataFrame(
     columns=[
         TransactionRegistryColNameValues.SOURCE_TRANSACTION_DATE,
@@ -74,15 +124,38 @@ class TransactionLoader(ABC):
     """
     drop_cols: ClassVar[list[str] | None] = None
     """A list of columns to drop from the data frame."""
+    header_signature: ClassVar[frozenset[str] | None] = None
+    """
+    Columns that identify the files of the broker, regardless of their name.
+
+    Loaders with a signature get their files from the transaction file manifest.
+    """
+    source_schema: ClassVar[SourceSchema | None] = None
+    """
+    The columns in the source files.
+
+    When set, files are parsed using pyarrow and number columns are converted to
+    floats while parsing.
+    """
+
+    def __init_subclass__(cls, **kwargs: object) -> None:
+        """Dispatch files to loaders that declare a header signature."""
+        super().__init_subclass__(**kwargs)
+        if cls.header_signature is not None:
+            TRANSACTION_FILE_MANIFEST.register(cls)
 
     async def __aenter__(self) -> Self:
         """Enter context manager."""
-        self.load_data_files()
-        self.normalise_column_name()
-        await self.async_drop_columns()
-        await self.async_pre_process_df()
-        await self.async_filter_transaction_type()
-        self.normalize_transaction_date()
+        if (chunk_size := Settings.ingest_chunk_size) is not None:
+            self.df_final = await self._async_read_data_files_chunked(chunk_size)
+        else:
+            # Parsing is CPU bound, so it's run outside of the event loop
+            self.df_final = await self._async_transform(
+                await async_run_cpu_bound(self.read_data_files)
+            )
+        self.df_final = await async_run_cpu_bound(
+            _normalize_transaction_date, self.df_final, self.date_format_pattern
+        )
         self.validate()
         await self._async_validate_columns()
         return self
@@ -97,82 +170,108 @@ class TransactionLoader(ABC):
 
     def load_data_files(self: TransactionLoader) -> None:
         """Parse CSV-files and load them into a data frame."""
-        folder_path = Path(Settings.dir_transaction_data_local)
-        files = list(Path.glob(folder_path, self.file_pattern))
-
-        dfs: list[pd.DataFrame] = []
-        for file in files:
-            df_load = pd.read_csv(file, sep=self.csv_separator)
-            filename = _get_filename(file)
-            df_load[TransactionRegistryColNameValues.SOURCE_FILE.value] = filename
+        self.df_final = self.read_data_files()
+
+    def _list_data_files(self: TransactionLoader) -> list[Path]:
+        """Return the CSV-files of the broker."""
+        return TRANSACTION_FILE_MANIFEST.get_files(self.__class__)
+
+    def read_data_files(self: TransactionLoader) -> pd.DataFrame:
+        """Parse CSV-files and return them as one data frame."""
+        files = self._list_data_files()
+
+        dfs: list[pd.DataFrame] = [
+            read_csv_cached(
+                file,
+                cache_name=self.__class__.__name__,
+                parser_key=f"{self.csv_separator}:{self.source_schema!r}",
+                parse=self.parse_data_file,
+            )
+            for file in files
+        ]
 
-            dfs.append(df_load)
+        evict_stale_entries(cache_name=self.__class__.__name__, file_paths=files)
 
         if len(files) == 0:
-            df_raw = EMPTY_DF
-        elif len(files) == 1:
-            df_raw = df_load
-        else:
-            df_raw = pd.concat(dfs, ignore_index=True)
+            return EMPTY_DF.copy()
 
-        # Cleanup whitespace in columns
-        df_raw = df_raw.map(lambda x: x.strip() if isinstance(x, str) else x)
+        if len(files) == 1:
+            return dfs[0]
 
-        self.df_final = df_raw
+        return pd.concat(dfs, ignore_index=True)
 
-    async def async_drop_columns(self: TransactionLoader) -> None:
-        """Drop columns that are not needed."""
-        if self.drop_cols is None:
-            return
-
-        df_raw = self.df_final.copy()
-
-        for drop_col in self.drop_cols:
-            if drop_col in df_raw.columns:
-                df_raw = df_raw.drop(columns=drop_col)
+    def parse_data_file(self: TransactionLoader, file: Path) -> pd.DataFrame:
+        """Parse a CSV-file and cleanup whitespace."""
+        if self.source_schema is not None:
+            df_load = read_csv_with_schema(
+                file, separator=self.csv_separator, schema=self.source_schema
+            )
+        else:
+            with open_source(file) as source:
+                df_load = pd.read_csv(source, sep=self.csv_separator)
+            # Cleanup whitespace in columns
+            df_load = df_load.map(lambda x: x.strip() if isinstance(x, str) else x)
 
-        self.df_final = df_raw
+        df_load[TransactionRegistryColNameValues.SOURCE_FILE.value] = _get_filename(
+            file
+        )
 
-    def normalise_column_name(self: TransactionLoader) -> None:
-        """Set index."""
-        df_raw = self.df_final.copy()
+        return df_load
 
-        if self.col_map is not None:
-            df_raw = df_raw.rename(columns=self.col_map)
+    async def _async_read_data_files_chunked(
+        self: TransactionLoader, chunk_size: int
+    ) -> pd.DataFrame:
+        """
+        Parse CSV-files in chunks and return the transformed rows as one data frame.
 
-        self.df_final = df_raw
+        Each chunk is transformed before the next one is read, so memory use is
+        bounded by the number of imported transactions rather than the file size.
+        Parsed files are not cached in this mode.
+        """
+        schema = self.source_schema or SourceSchema()
+        dfs: list[pd.DataFrame] = []
+        row_offset = 0
 
-    async def async_filter_transaction_type(self: TransactionLoader) -> None:
-        """Filter transaction types."""
-        if self.include_transaction_type is None:
-            return
+        for file in self._list_data_files():
+            chunks = iter_csv_chunks(
+                file, separator=self.csv_separator, schema=schema, chunk_size=chunk_size
+            )
+            while (df_chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                df_chunk[TransactionRegistryColNameValues.SOURCE_FILE.value] = (
+                    _get_filename(file)
+                )
+                # Number rows across files, as when concatenating whole files
+                df_chunk.index = pd.RangeIndex(row_offset, row_offset + len(df_chunk))
+                row_offset += len(df_chunk)
 
-        df_raw = self.df_final.copy()
+                dfs.append(await self._async_transform(df_chunk))
 
-        df_raw = df_raw[
-            df_raw[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE].isin(
-                self.include_transaction_type
-            )
-        ]
+        if not dfs:
+            return await self._async_transform(EMPTY_DF.copy())
 
-        self.df_final = df_raw
+        return await async_run_cpu_bound(
+            pd.concat, [df for df in dfs if not df.empty] or dfs[:1]
+        )
 
-    def normalize_transaction_date(self: TransactionLoader) -> None:
+    async def _async_transform(
+        self: TransactionLoader, df_raw: pd.DataFrame
+    ) -> pd.DataFrame:
         """
-        Make sure transaction date is in the correct format.
+        Rename, drop, pre-process and filter parsed rows.
 
-        We expect 2024-06-27 00:00:00+02:00.
+        The steps are CPU bound, so they are run outside of the event loop.
         """
-        df_raw = self.df_final
+        self.df_final = await async_run_cpu_bound(
+            _rename_and_drop_columns, df_raw, self.col_map, self.drop_cols
+        )
+        await self.async_pre_process_df()
 
-        df_raw[TransactionRegistryColNameValues.SOURCE_TRANSACTION_DATE] = (
-            pd.to_datetime(
-                df_raw[TransactionRegistryColNameValues.SOURCE_TRANSACTION_DATE],
-                format=self.date_format_pattern,
+        if self.include_transaction_type is not None:
+            self.df_final = await async_run_cpu_bound(
+                _filter_transaction_type, self.df_final, self.include_transaction_type
             )
-        )
 
-        self.df_final = df_raw
+        return self.df_final
 
     def validate(self: TransactionLoader) -> None:
         """Validate the data frame."""
@@ -221,4 +320,9 @@ class TransactionLoader(ABC):
 
     @abstractmethod
     async def async_pre_process_df(self: TransactionLoader) -> None:
-        """Broker specific manipulation of the data frame."""
+        """
+        Broker specific manipulation of the data frame.
+
+        CPU bound work should be run with async_run_cpu_bound, to keep the event loop
+        responsive.
+        """
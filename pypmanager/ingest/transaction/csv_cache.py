@@ -0,0 +1,101 @@
+"""Cache parsed transaction files on disk."""
+
+from __future__ import annotations
+
+import hashlib
+from typing import TYPE_CHECKING
+
+from pypmanager.settings import Settings
+from pypmanager.utils.arrow import read_data_frame, read_metadata, write_data_frame
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+    from pathlib import Path
+
+    import pandas as pd
+
+CSV_CACHE_VERSION = 3
+"""Increase when the parsing changes, to make existing cache entries stale."""
+
+
+def _cache_dir(cache_name: str) -> Path:
+    """Return the folder with cached files for a loader."""
+    return Settings.dir_cache_local / "csv" / cache_name
+
+
+def _cache_file(cache_name: str, file_path: Path) -> Path:
+    """Return the path of the cached version of a file."""
+    path_hash = hashlib.sha256(str(file_path.resolve()).encode()).hexdigest()
+    return _cache_dir(cache_name) / f"{path_hash[:32]}.arrow"
+
+
+def read_csv_cached(
+    file_path: Path,
+    *,
+    cache_name: str,
+    parser_key: str,
+    parse: Callable[[Path], pd.DataFrame],
+) -> pd.DataFrame:
+    """
+    Return a parsed file, from the cache if the file is unchanged.
+
+    The cache is keyed on the path, size, modification time and content of the file
+    and on parser_key, which should change when the parsing of the file changes.
+    """
+    try:
+        stat = file_path.stat()
+    except OSError:
+        return parse(file_path)
+
+    cache_file = _cache_file(cache_name, file_path)
+    metadata = read_metadata(cache_file) or {}
+    expected_metadata = {
+        "path": str(file_path.resolve()),
+        "size": str(stat.st_size),
+        "mtime_ns": str(stat.st_mtime_ns),
+        "parser": f"v{CSV_CACHE_VERSION}:{parser_key}",
+    }
+
+    is_unchanged = all(
+        metadata.get(key) == value for key, value in expected_metadata.items()
+    )
+
+    if not is_unchanged:
+        # The file may have been touched without being changed
+        with file_path.open("rb") as file:
+            expected_metadata["content_hash"] = hashlib.file_digest(
+                file, "sha256"
+            ).hexdigest()
+
+        if (
+            metadata.get("content_hash") != expected_metadata["content_hash"]
+            or metadata.get("parser") != expected_metadata["parser"]
+        ):
+            LOGGER.debug(f"Parsing {file_path}")
+            df_parsed = parse(file_path)
+            write_data_frame(cache_file, df_parsed, expected_metadata)
+            return df_parsed
+
+    if (df_cached := read_data_frame(cache_file)) is None:
+        return parse(file_path)
+
+    if not is_unchanged:
+        # Store the new modification time to avoid hashing the file next time
+        write_data_frame(cache_file, df_cached, expected_metadata)
+
+    return df_cached
+
+
+def evict_stale_entries(*, cache_name: str, file_paths: Iterable[Path]) -> None:
+    """Remove cached versions of files that no longer exist."""
+    cache_dir = _cache_dir(cache_name)
+    if not cache_dir.is_dir():
+        return
+
+    expected_files = {_cache_file(cache_name, file_path) for file_path in file_paths}
+    for cache_file in cache_dir.glob("*.arrow"):
+        if cache_file not in expected_files:
+            LOGGER.debug(f"Removing stale cache entry {cache_file}")
+            cache_file.unlink(missing_ok=True)
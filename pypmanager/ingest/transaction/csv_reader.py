@@ -0,0 +1,181 @@
+"""Parse transaction files using a declared schema."""
+
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+import pyarrow.compute as pc
+
+from pypmanager.utils.compression import open_binary, open_source
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+# The same values that pandas.read_csv treats as missing
+NULL_VALUES = [*pa_csv.ConvertOptions().null_values, "<NA>", "None"]
+
+
+@dataclass(frozen=True)
+class SourceSchema:
+    """
+    Describe the CSV-files of a broker.
+
+    Column names are the names in the source file, i.e. before renaming them using
+    col_map. Columns that are not listed in number_columns are parsed as text.
+    """
+
+    number_columns: tuple[str, ...] = ()
+    """Columns containing numbers."""
+    decimal_point: str = "."
+    thousands_separator: str | None = None
+    zero_values: tuple[str, ...] = ("-",)
+    """Values in number columns that mean zero."""
+
+
+def _parse_numbers(values: pa.ChunkedArray, schema: SourceSchema) -> pa.ChunkedArray:
+    """Convert text to numbers."""
+    if schema.thousands_separator is not None:
+        values = pc.replace_substring(values, schema.thousands_separator, "")
+
+    if schema.decimal_point != ".":
+        values = pc.replace_substring(values, schema.decimal_point, ".")
+
+    values = pc.if_else(
+        pc.is_in(values, value_set=pa.array(schema.zero_values, pa.string())),
+        pa.scalar("0"),
+        values,
+    )
+
+    return pc.cast(values, pa.float64())
+
+
+def _read_csv_arrow(
+    file_path: Path, *, separator: str, schema: SourceSchema
+) -> pd.DataFrame | None:
+    """Parse a CSV-file using the multithreaded pyarrow reader."""
+    with open_binary(file_path) as file:
+        header = file.readline().decode("utf-8-sig")
+    column_names = next(csv.reader([header], delimiter=separator), [])
+
+    if not column_names or len(set(column_names)) != len(column_names):
+        return None
+
+    try:
+        with open_source(file_path) as source:
+            table = pa_csv.read_csv(
+                source,
+                parse_options=pa_csv.ParseOptions(delimiter=separator),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=dict.fromkeys(column_names, pa.string()),
+                    null_values=NULL_VALUES,
+                    strings_can_be_null=True,
+                ),
+            )
+
+        columns = {}
+        for name in column_names:
+            values = pc.utf8_trim_whitespace(table.column(name))
+            if name in schema.number_columns:
+                values = _parse_numbers(values, schema)
+            columns[name] = values
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as err:
+        LOGGER.debug(f"Unable to parse {file_path} using pyarrow: {err}")
+        return None
+
+    df = pa.table(columns).to_pandas()
+
+    # Use the same representation of missing text as pandas.read_csv
+    for name in column_names:
+        if name in schema.number_columns:
+            continue
+
+        if df[name].isna().all():
+            df[name] = np.nan
+        else:
+            values = df[name].to_numpy(dtype=object, copy=True)
+            values[pd.isna(values)] = np.nan
+            df[name] = values
+
+    return df
+
+
+def _apply_schema(df: pd.DataFrame, schema: SourceSchema) -> pd.DataFrame:
+    """
+    Strip whitespace and convert number columns in a data frame parsed by pandas.
+
+    The data frame is expected to be parsed as text, so the result doesn't depend on
+    the types pandas would infer from the rows that were read.
+    """
+    df = df.map(lambda x: x.strip() if isinstance(x, str) else x)
+
+    for name in df.columns:
+        if name not in schema.number_columns:
+            # Use the same representation of missing text as _read_csv_arrow
+            if df[name].isna().all():
+                df[name] = np.nan
+            continue
+
+        try:
+            values = pa.chunked_array(
+                [pa.array(df[name], type=pa.string(), from_pandas=True)]
+            )
+            df[name] = _parse_numbers(values, schema).to_numpy()
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Left as text, invalid numbers are reported when cleaning up the data
+            continue
+
+    return df
+
+
+def _read_csv_pandas(
+    file_path: Path, *, separator: str, schema: SourceSchema
+) -> pd.DataFrame:
+    """Parse a CSV-file using pandas, which accepts e.g. rows with missing fields."""
+    with open_source(file_path) as source:
+        return _apply_schema(pd.read_csv(source, sep=separator, dtype=str), schema)
+
+
+def read_csv_with_schema(
+    file_path: Path, *, separator: str, schema: SourceSchema
+) -> pd.DataFrame:
+    """
+    Parse a CSV-file and convert number columns to floats.
+
+    Text is stripped of whitespace. The file is parsed using pyarrow, falling back
+    to pandas for files pyarrow can't parse. Files compressed using gzip, xz or zstd
+    are decompressed while parsing.
+    """
+    if (
+        df := _read_csv_arrow(file_path, separator=separator, schema=schema)
+    ) is not None:
+        return df
+
+    return _read_csv_pandas(file_path, separator=separator, schema=schema)
+
+
+def iter_csv_chunks(
+    file_path: Path, *, separator: str, schema: SourceSchema, chunk_size: int
+) -> Iterator[pd.DataFrame]:
+    """
+    Parse a CSV-file in chunks of at most chunk_size rows.
+
+    Chunks are cleaned up like read_csv_with_schema. All columns are read as text
+    before converting the number columns, so the types of a column don't differ
+    between chunks and concatenated chunks equal the whole file. The index
+    continues from one chunk to the next.
+    """
+    with (
+        open_source(file_path) as source,
+        pd.read_csv(source, sep=separator, dtype=str, chunksize=chunk_size) as reader,
+    ):
+        for df_chunk in reader:
+            yield _apply_schema(df_chunk, schema)
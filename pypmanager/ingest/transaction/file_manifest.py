@@ -0,0 +1,228 @@
+"""Find transaction files and the loader of each file."""
+
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from pathlib import Path
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from pypmanager.settings import Settings
+from pypmanager.utils.compression import (
+    glob_with_compressed,
+    matches_pattern,
+    open_binary,
+)
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    from .base_loader import TransactionLoader
+
+DIRECTORY_MTIME_RESOLUTION_NS = 2_000_000_000
+"""
+Some file systems store modification times with a resolution of seconds.
+
+A folder modified this close to a scan may have changed after it, so it is listed
+again on the next lookup.
+"""
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """A transaction file and the loader it is dispatched to."""
+
+    path: Path
+    size: int
+    mtime_ns: int
+    loader_name: str | None
+
+
+def _read_header(file_path: Path) -> str:
+    """Return the first line of a file."""
+    with open_binary(file_path) as file:
+        return file.readline().decode("utf-8-sig", errors="replace")
+
+
+def _header_columns(header: str, separator: str) -> set[str]:
+    """Split a header line into column names."""
+    return {
+        column.strip() for column in next(csv.reader([header], delimiter=separator), [])
+    }
+
+
+class TransactionFileManifest:
+    """
+    Keep track of the transaction files and the loader of each file.
+
+    A file is dispatched to the loader whose header_signature matches the columns in
+    the header of the file, regardless of the name of the file. Files that don't
+    match any signature are dispatched using the file_pattern of the loaders.
+    Compressed files are matched by their name without the compression suffix.
+
+    The folder is only listed again when its modification time changes, which happens
+    when files are added, removed or renamed. The header of a file is only read again
+    when the file changes.
+    """
+
+    def __init__(self: TransactionFileManifest) -> None:
+        """Init class."""
+        self.loaders: list[type[TransactionLoader]] = []
+        self.scans = 0
+        self._directory: Path | None = None
+        self._directory_mtime_ns: int | None = None
+        self._scanned_at_ns = 0
+        self._entries: dict[Path, ManifestEntry] = {}
+        # Loaders read their files from worker threads
+        self._lock = threading.Lock()
+
+    def register(
+        self: TransactionFileManifest, loader: type[TransactionLoader]
+    ) -> None:
+        """Dispatch files to a loader."""
+        if loader not in self.loaders:
+            self.loaders.append(loader)
+            self.invalidate()
+
+    def invalidate(self: TransactionFileManifest) -> None:
+        """Scan the folder on next lookup."""
+        self._directory = None
+        self._directory_mtime_ns = None
+        self._entries = {}
+
+    def get_files(
+        self: TransactionFileManifest, loader: type[TransactionLoader]
+    ) -> list[Path]:
+        """Return the files of a loader."""
+        if loader not in self.loaders:
+            return glob_with_compressed(
+                Path(Settings.dir_transaction_data_local), loader.file_pattern
+            )
+
+        return [
+            entry.path
+            for entry in self._get_entries()
+            if entry.loader_name == loader.__name__
+        ]
+
+    def get_all_files(self: TransactionFileManifest) -> list[Path]:
+        """Return all files that are dispatched to a loader, sorted by path."""
+        return sorted(
+            entry.path for entry in self._get_entries() if entry.loader_name is not None
+        )
+
+    def _get_entries(self: TransactionFileManifest) -> list[ManifestEntry]:
+        """Return up to date entries of all files in the folder."""
+        with self._lock:
+            return self._get_entries_locked()
+
+    def _get_entries_locked(self: TransactionFileManifest) -> list[ManifestEntry]:
+        """Return up to date entries of all files in the folder."""
+        directory = Path(Settings.dir_transaction_data_local)
+
+        try:
+            directory_mtime_ns = directory.stat().st_mtime_ns
+        except OSError:
+            self.invalidate()
+            return []
+
+        if (
+            directory != self._directory
+            or directory_mtime_ns != self._directory_mtime_ns
+            or self._scanned_at_ns - directory_mtime_ns < DIRECTORY_MTIME_RESOLUTION_NS
+        ):
+            self._scan(directory, directory_mtime_ns)
+
+        # A file that is overwritten in place does not change the folder
+        for path, entry in list(self._entries.items()):
+            try:
+                stat = path.stat()
+            except OSError:
+                del self._entries[path]
+                continue
+
+            if (stat.st_size, stat.st_mtime_ns) != (entry.size, entry.mtime_ns):
+                self._entries[path] = self._dispatch(path)
+
+        return list(self._entries.values())
+
+    def _scan(
+        self: TransactionFileManifest, directory: Path, directory_mtime_ns: int
+    ) -> None:
+        """List the folder and dispatch new files."""
+        self.scans += 1
+        scanned_at_ns = time.time_ns()
+
+        entries: dict[Path, ManifestEntry] = {}
+        for path in sorted(directory.iterdir()):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+
+            entries[path] = (
+                entry
+                if (entry := self._entries.get(path)) is not None
+                else self._dispatch(path)
+            )
+
+        self._entries = entries
+        self._directory = directory
+        self._directory_mtime_ns = directory_mtime_ns
+        self._scanned_at_ns = scanned_at_ns
+
+    def _dispatch(self: TransactionFileManifest, path: Path) -> ManifestEntry:
+        """Find the loader of a file."""
+        stat = path.stat()
+        loader = self._find_loader(path)
+
+        if loader is None:
+            LOGGER.warning(f"No loader found for {path.name}, the file is ignored")
+
+        return ManifestEntry(
+            path=path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            loader_name=None if loader is None else loader.__name__,
+        )
+
+    def _find_loader(
+        self: TransactionFileManifest, path: Path
+    ) -> type[TransactionLoader] | None:
+        """
+        Find the loader of a file by the columns in its header.
+
+        If several loaders match, the one whose file pattern matches the name of the
+        file is preferred.
+        """
+        name_matches = [
+            loader
+            for loader in self.loaders
+            if matches_pattern(path, loader.file_pattern)
+        ]
+
+        try:
+            header = _read_header(path)
+        except (OSError, EOFError) as err:
+            LOGGER.warning(f"Unable to read {path}: {err}")
+            return name_matches[0] if name_matches else None
+
+        header_matches = [
+            loader
+            for loader in self.loaders
+            if loader.header_signature is not None
+            and loader.header_signature <= _header_columns(header, loader.csv_separator)
+        ]
+
+        for candidates in (
+            [loader for loader in header_matches if loader in name_matches],
+            header_matches,
+            name_matches,
+        ):
+            if candidates:
+                return candidates[0]
+
+        return None
+
+
+TRANSACTION_FILE_MANIFEST = TransactionFileManifest()
@@ -4,8 +4,11 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, cast
 
+from pypmanager.utils.executor import async_run_cpu_bound
+
 from .base_loader import TransactionLoader
-from .const import TransactionRegistryColNameValues
+from .const import ColumnNameValues, TransactionRegistryColNameValues
+from .csv_reader import SourceSchema
 
 if TYPE_CHECKING:
     import pandas as pd
@@ -23,27 +26,48 @@ def _replace_fee_name(row: pd.Series) -> str:
     return cast("str", row[TransactionRegistryColNameValues.SOURCE_NAME_SECURITY])
 
 
+def _pre_process_df(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Replace fee names and append missing columns."""
+    df_raw[TransactionRegistryColNameValues.SOURCE_NAME_SECURITY] = df_raw.apply(
+        _replace_fee_name, axis=1
+    )
+
+    # Append missing columns
+    for col in [
+        TransactionRegistryColNameValues.SOURCE_FX,
+        TransactionRegistryColNameValues.SOURCE_ACCOUNT_NAME,
+        TransactionRegistryColNameValues.SOURCE_BROKER,
+    ]:
+        if col.value not in df_raw.columns:
+            df_raw[col.value] = None
+
+    return df_raw
+
+
 class GenericLoader(TransactionLoader):
     """Data loader for misc data."""
 
+    header_signature = frozenset(
+        {
+            TransactionRegistryColNameValues.SOURCE_TRANSACTION_DATE.value,
+            TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value,
+            TransactionRegistryColNameValues.SOURCE_NAME_SECURITY.value,
+        }
+    )
+    source_schema = SourceSchema(
+        number_columns=(
+            TransactionRegistryColNameValues.SOURCE_VOLUME.value,
+            TransactionRegistryColNameValues.SOURCE_PRICE.value,
+            ColumnNameValues.AMOUNT.value,
+            TransactionRegistryColNameValues.SOURCE_FEE.value,
+            TransactionRegistryColNameValues.SOURCE_FX.value,
+        ),
+        decimal_point=",",
+    )
+
     file_pattern = "other*.csv"
     date_format_pattern = "%Y-%m-%d"
 
     async def async_pre_process_df(self: GenericLoader) -> None:
         """Load CSV."""
-        df_raw = self.df_final
-
-        df_raw[TransactionRegistryColNameValues.SOURCE_NAME_SECURITY] = df_raw.apply(
-            _replace_fee_name, axis=1
-        )
-
-        # Append missing columns
-        for col in [
-            TransactionRegistryColNameValues.SOURCE_FX,
-            TransactionRegistryColNameValues.SOURCE_ACCOUNT_NAME,
-            TransactionRegistryColNameValues.SOURCE_BROKER,
-        ]:
-            if col.value not in df_raw.columns:
-                df_raw[col.value] = None
-
-        self.df_final = df_raw
+        self.df_final = await async_run_cpu_bound(_pre_process_df, self.df_final)
@@ -2,11 +2,11 @@
 
 from __future__ import annotations
 
-import contextlib
 import logging
 from typing import TYPE_CHECKING, ClassVar, cast
 
-from pypmanager.helpers.security import async_security_map_name_to_isin
+from pypmanager.helpers.security import SECURITY_NAME_INDEX
+from pypmanager.utils.executor import async_run_cpu_bound
 
 from .base_loader import TransactionLoader
 from .const import (
@@ -16,12 +16,15 @@ from .const import (
     TransactionRegistryColNameValues,
     TransactionTypeValues,
 )
+from .csv_reader import SourceSchema
 
 _LOGGER = logging.getLogger(__package__)
 
 if TYPE_CHECKING:
     import pandas as pd
 
+    from pypmanager.helpers.security import SecurityNameIndex
+
 
 def _replace_fee_name(row: pd.DataFrame) -> str:
     """Replace interest flows with cash and equivalemts."""
@@ -34,6 +37,38 @@ def _replace_fee_name(row: pd.DataFrame) -> str:
     return cast("str", row[TransactionRegistryColNameValues.SOURCE_NAME_SECURITY])
 
 
+def _pre_process_df(
+    df_raw: pd.DataFrame, security_name_index: SecurityNameIndex
+) -> pd.DataFrame:
+    """Replace fee names, look up ISIN codes and append missing columns."""
+    df_raw[TransactionRegistryColNameValues.SOURCE_BROKER.value] = "Lysa"
+    df_raw[TransactionRegistryColNameValues.SOURCE_NAME_SECURITY] = df_raw.apply(
+        _replace_fee_name, axis=1
+    )
+
+    df_raw[TransactionRegistryColNameValues.SOURCE_FEE] = None
+    df_raw[TransactionRegistryColNameValues.SOURCE_CURRENCY.value] = CurrencyValues.SEK
+
+    # The exported CSV data contains special characters like � that are repaired
+    # when looking up the ISIN code
+    (
+        df_raw[TransactionRegistryColNameValues.SOURCE_NAME_SECURITY],
+        df_raw[TransactionRegistryColNameValues.SOURCE_ISIN.value],
+    ) = security_name_index.lookup(
+        df_raw[TransactionRegistryColNameValues.SOURCE_NAME_SECURITY]
+    )
+
+    # Append missing columns
+    for col in [
+        TransactionRegistryColNameValues.SOURCE_FX,
+        TransactionRegistryColNameValues.SOURCE_ACCOUNT_NAME,
+    ]:
+        if col.value not in df_raw.columns:
+            df_raw[col.value] = None
+
+    return df_raw
+
+
 class LysaLoader(TransactionLoader):
     """Data loader for Lysa."""
 
@@ -46,6 +81,11 @@ class LysaLoader(TransactionLoader):
         "Price": TransactionRegistryColNameValues.SOURCE_PRICE,
     }
 
+    header_signature = frozenset({"Date", "Type", "Amount", "Counterpart/Fund"})
+    source_schema = SourceSchema(
+        number_columns=("Amount", "Volume", "Price"), decimal_point=","
+    )
+
     csv_separator = CSVSeparator.COMMA
     file_pattern = "lysa*.csv"
     date_format_pattern = "%Y-%m-%dT%H:%M:%S.%fZ"
@@ -60,47 +100,16 @@ class LysaLoader(TransactionLoader):
 
     async def async_pre_process_df(self: LysaLoader) -> None:
         """Load CSV."""
-        df_raw = self.df_final
-
-        df_raw[TransactionRegistryColNameValues.SOURCE_BROKER.value] = "Lysa"
-        df_raw[TransactionRegistryColNameValues.SOURCE_NAME_SECURITY] = df_raw.apply(
-            _replace_fee_name, axis=1
-        )
-
-        df_raw[TransactionRegistryColNameValues.SOURCE_FEE] = None
-        df_raw[TransactionRegistryColNameValues.SOURCE_CURRENCY.value] = (
-            CurrencyValues.SEK
+        self.df_final = await async_run_cpu_bound(
+            _pre_process_df, self.df_final, await SECURITY_NAME_INDEX.async_get()
         )
 
-        # The exported CSV data contains special characters like � that we need to
-        # replace
-        with contextlib.suppress(AttributeError):
-            df_raw[TransactionRegistryColNameValues.SOURCE_NAME_SECURITY] = df_raw[
-                TransactionRegistryColNameValues.SOURCE_NAME_SECURITY
-            ].str.replace("�", "ä")
-
-        security_map_name_to_isin = await async_security_map_name_to_isin()
-
-        df_raw[TransactionRegistryColNameValues.SOURCE_ISIN.value] = df_raw[
-            TransactionRegistryColNameValues.SOURCE_NAME_SECURITY
-        ].map(security_map_name_to_isin)
-
-        # Append missing columns
-        for col in [
-            TransactionRegistryColNameValues.SOURCE_FX,
-            TransactionRegistryColNameValues.SOURCE_ACCOUNT_NAME,
-        ]:
-            if col.value not in df_raw.columns:
-                df_raw[col.value] = None
-
-        self.df_final = df_raw
-
         # Validate that ISIN exists for all relewant rows
         await self.async_validate_isin()
 
     async def async_validate_isin(self: LysaLoader) -> None:
         """Validate that an ISIN exists for all buy and sell transactions."""
-        df_raw = self.df_final.copy()
+        df_raw = self.df_final
 
         df_raw = df_raw.query(
             f"{TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value} in "
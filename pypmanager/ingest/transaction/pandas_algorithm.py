@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
-from typing import cast
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, cast
 
+import numpy as np
 import pandas as pd
 
 from .const import (
@@ -12,296 +14,393 @@ from .const import (
     TransactionTypeValues,
 )
 
+if TYPE_CHECKING:
+    import numpy.typing as npt
 
-class PandasAlgorithm:
-    """Pandas algorithm for transaction data."""
 
-    @staticmethod
-    def turnover_or_other_cash_flow(row: pd.DataFrame) -> float | None:
-        """
-        Return turnover or other cash flow.
+@dataclass
+class AverageCostResult:
+    """Result of the running average cost calculation."""
 
-        The returned value has correct sign.
-        """
-        if (
-            row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value]
-            in [
-                # This should be expanded
-                TransactionTypeValues.DIVIDEND.value,
-                TransactionTypeValues.DEPOSIT.value,
-            ]
-            and TransactionRegistryColNameValues.SOURCE_OTHER_CASH_FLOW.value in row
-        ):
-            return cast(
-                "float",
-                row[TransactionRegistryColNameValues.SOURCE_OTHER_CASH_FLOW.value],
-            )
+    price_per_unit: npt.NDArray[np.float64]
+    """Average purchase price per unit."""
+    quantity_held: npt.NDArray[np.float64]
+    """Aggregate quantity held, set to NaN when the position is reset."""
+    is_reset: npt.NDArray[np.object_]
+    """True if the position is reset, NaN for rows that are not buys or sells."""
+    turnover: npt.NDArray[np.float64]
+    """Signed turnover, set to NaN when the position is reset."""
 
-        if row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value] not in (
-            TransactionTypeValues.BUY.value,
-            TransactionTypeValues.SELL.value,
-        ):
-            return None
 
-        price = cast("float", row[TransactionRegistryColNameValues.SOURCE_PRICE.value])
+def _values_or_none(
+    values: npt.NDArray[Any],
+    mask: npt.NDArray[np.bool_],
+    index: pd.Index,
+) -> pd.Series:
+    """
+    Return a series with values where mask is True and None elsewhere.
 
-        # Return turnover for buy transactions (negative cash flow for us)
-        if (
-            row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value]
-            == TransactionTypeValues.BUY.value
-        ):
-            return (
-                cast(
-                    "float",
-                    abs(row[TransactionRegistryColNameValues.SOURCE_VOLUME.value]),
-                )
-                * -1.0
-                * price
-            )
+    The data type is inferred in the same way as when applying a row-wise function,
+    ie a float column with NaN, unless all values are None.
+    """
+    values_or_none = values.astype(object)
+    values_or_none[~mask] = None
 
-        # Sell
-        return (
-            cast(
-                "float",
-                abs(row[TransactionRegistryColNameValues.SOURCE_VOLUME.value]),
-            )
-            * price
-        )
+    return pd.Series(values_or_none, index=index).infer_objects()
+
+
+def _is_none(series: pd.Series) -> npt.NDArray[np.bool_]:
+    """Return True for values that are None, but not NaN."""
+    if series.dtype != object:
+        return np.zeros(len(series), dtype=bool)
+
+    # Test identity element-wise so that NaN is not treated as None
+    is_none = np.frompyfunc(lambda value: value is None, 1, 1)
+    return cast("npt.NDArray[np.bool_]", is_none(series.to_numpy()).astype(bool))
+
+
+def _column_as_float(df: pd.DataFrame, column: str) -> npt.NDArray[np.float64]:
+    """Return a column as a float array, with missing values as NaN."""
+    return cast(
+        "npt.NDArray[np.float64]",
+        df[column].to_numpy(dtype=np.float64, na_value=np.nan),
+    )
+
+
+def _nan_to_zero(values: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """Replace NaN with 0.0."""
+    return np.where(np.isnan(values), 0.0, values)
+
+
+class PandasAlgorithm:
+    """Pandas algorithm for transaction data."""
 
     @staticmethod
-    def calculate_cash_flow_net_fee_nominal(row: pd.DataFrame) -> float:
-        """Calculate nominal total cash flow, including fees, for a transaction."""
-        if (
-            turnover_or_other_cf := cast(
-                "float | None",
-                row[TransactionRegistryColNameValues.CALC_TURNOVER_OR_OTHER_CF.value],
+    def turnover_or_other_cash_flow(df: pd.DataFrame) -> pd.Series:
+        """Return turnover or other cash flow for all rows in a data frame."""
+        transaction_type = df[
+            TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value
+        ].to_numpy()
+        is_buy = transaction_type == TransactionTypeValues.BUY.value
+        is_sell = transaction_type == TransactionTypeValues.SELL.value
+
+        turnover = np.abs(
+            _column_as_float(df, TransactionRegistryColNameValues.SOURCE_VOLUME.value)
+        ) * _column_as_float(df, TransactionRegistryColNameValues.SOURCE_PRICE.value)
+
+        values: npt.NDArray[Any] = np.select(
+            [is_buy, is_sell], [turnover * -1.0, turnover], default=np.nan
+        )
+        has_value = is_buy | is_sell
+
+        if TransactionRegistryColNameValues.SOURCE_OTHER_CASH_FLOW.value in df:
+            is_other_cash_flow = np.isin(
+                transaction_type,
+                [
+                    TransactionTypeValues.DIVIDEND.value,
+                    TransactionTypeValues.DEPOSIT.value,
+                ],
             )
-        ) is None:
-            return 0.0
-
-        if row[TransactionRegistryColNameValues.SOURCE_FEE.value] is None:
-            commission = 0.0
-        else:
-            commission = cast(
-                "float", row[TransactionRegistryColNameValues.SOURCE_FEE.value]
+            values = np.where(
+                is_other_cash_flow,
+                df[
+                    TransactionRegistryColNameValues.SOURCE_OTHER_CASH_FLOW.value
+                ].to_numpy(),
+                values,
             )
+            has_value |= is_other_cash_flow
 
-        return turnover_or_other_cf + commission
+        return _values_or_none(values, has_value, df.index)
 
     @staticmethod
-    def calculate_cash_flow_gross_fee_nominal(row: pd.DataFrame) -> float:
-        """Calculate nominal total cash flow, excluding fees, for a transaction."""
-        if (
-            turnover_or_other_cf := cast(
-                "float | None",
-                row[TransactionRegistryColNameValues.CALC_TURNOVER_OR_OTHER_CF.value],
-            )
-        ) is None:
-            return 0.0
+    def calculate_cash_flow_net_fee_nominal(df: pd.DataFrame) -> pd.Series:
+        """Calculate nominal total cash flow, including fees, for all rows."""
+        turnover_or_other_cf = df[
+            TransactionRegistryColNameValues.CALC_TURNOVER_OR_OTHER_CF.value
+        ]
+        fee = df[TransactionRegistryColNameValues.SOURCE_FEE.value]
+
+        commission = np.where(
+            _is_none(fee),
+            0.0,
+            _column_as_float(df, TransactionRegistryColNameValues.SOURCE_FEE.value),
+        )
 
-        return turnover_or_other_cf
+        return pd.Series(
+            np.where(
+                _is_none(turnover_or_other_cf),
+                0.0,
+                turnover_or_other_cf.to_numpy(dtype=np.float64) + commission,
+            ),
+            index=df.index,
+        )
 
     @staticmethod
-    def cleanup_number(value: str | None) -> float | None:
-        """Make sure values are converted to floats."""
-        if value is None:
-            return None
+    def calculate_cash_flow_gross_fee_nominal(
+        df: pd.DataFrame,
+    ) -> pd.Series:
+        """Calculate nominal total cash flow, excluding fees, for all rows."""
+        turnover_or_other_cf = df[
+            TransactionRegistryColNameValues.CALC_TURNOVER_OR_OTHER_CF.value
+        ]
+
+        return pd.Series(
+            np.where(
+                _is_none(turnover_or_other_cf),
+                0.0,
+                turnover_or_other_cf.to_numpy(dtype=np.float64),
+            ),
+            index=df.index,
+        )
 
-        if (value := f"{value}") == "-":
-            return 0
+    @staticmethod
+    def cleanup_number(series: pd.Series) -> pd.Series:
+        """Make sure all values in a column are converted to floats."""
+        if series.dtype != object:
+            return series.astype(np.float64)
+
+        is_none = _is_none(series)
+        if is_none.all():
+            return series
+
+        values = series.astype(str)
+        is_dash = values.to_numpy() == "-"
+        values = values.str.replace(",", ".", regex=False).str.replace(
+            " ", "", regex=False
+        )
 
-        value = value.replace(",", ".")
-        value = value.replace(" ", "")
+        numbers = pd.to_numeric(values, errors="coerce").to_numpy(
+            dtype=np.float64, copy=True
+        )
+        numbers[is_dash] = 0.0
+        numbers[is_none] = np.nan
 
-        try:
-            return float(value)
-        except ValueError as err:
-            msg = f"Unable to parse {value}"
-            raise ValueError(msg) from err
+        # Values that could not be converted are parsed one by one, so that eg "nan"
+        # is accepted and that we can tell which value is invalid
+        for position in np.flatnonzero(np.isnan(numbers) & ~is_none & ~is_dash):
+            value = values.iloc[position]
+            try:
+                numbers[position] = float(value)
+            except ValueError as err:
+                msg = f"Unable to parse {value} in column {series.name}"
+                raise ValueError(msg) from err
+
+        return pd.Series(numbers, index=series.index, name=series.name)
 
     @staticmethod
-    def normalize_amount(row: pd.DataFrame) -> float:
-        """Calculate amount if nan."""
-        if row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value] in [
-            TransactionTypeValues.CASHBACK.value,
-            TransactionTypeValues.FEE.value,
-        ]:
-            amount = row[ColumnNameValues.AMOUNT.value]
+    def normalize_amount(df: pd.DataFrame) -> pd.Series:
+        """Calculate amount if nan, for all rows."""
+        transaction_type = df[
+            TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value
+        ].to_numpy()
+
+        if ColumnNameValues.AMOUNT.value in df:
+            source_amount = _column_as_float(df, ColumnNameValues.AMOUNT.value)
         else:
-            amount = (
-                row[TransactionRegistryColNameValues.SOURCE_VOLUME.value]
-                * row[TransactionRegistryColNameValues.SOURCE_PRICE.value]
-            )
+            source_amount = np.full(len(df), np.nan)
+
+        amount = np.where(
+            np.isin(
+                transaction_type,
+                [
+                    TransactionTypeValues.CASHBACK.value,
+                    TransactionTypeValues.FEE.value,
+                ],
+            ),
+            source_amount,
+            _column_as_float(df, TransactionRegistryColNameValues.SOURCE_VOLUME.value)
+            * _column_as_float(df, TransactionRegistryColNameValues.SOURCE_PRICE.value),
+        )
 
         # Buy and tax is a negative cash flow for us
-        if row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value] in [
-            TransactionTypeValues.BUY.value,
-            TransactionTypeValues.TAX.value,
-            TransactionTypeValues.FEE.value,
-        ]:
-            amount = abs(amount) * -1
-        else:
-            amount = abs(amount)
+        is_negative_cash_flow = np.isin(
+            transaction_type,
+            [
+                TransactionTypeValues.BUY.value,
+                TransactionTypeValues.TAX.value,
+                TransactionTypeValues.FEE.value,
+            ],
+        )
 
-        return cast("float", amount)
+        return pd.Series(
+            np.where(is_negative_cash_flow, np.abs(amount) * -1, np.abs(amount)),
+            index=df.index,
+        )
 
     @staticmethod
-    def normalize_no_traded(row: pd.DataFrame) -> float:
-        """
-        Calculate number of units traded.
-
-        We expect this number to be positive and use the type (buy/sell) to indicate
-        the direction of the flow.
-        """
-        no_traded = cast(
-            "float", row[TransactionRegistryColNameValues.SOURCE_VOLUME.value]
+    def normalize_no_traded(df: pd.DataFrame) -> pd.Series:
+        """Calculate number of units traded, for all rows."""
+        return pd.Series(
+            np.abs(
+                _column_as_float(
+                    df, TransactionRegistryColNameValues.SOURCE_VOLUME.value
+                )
+            ),
+            index=df.index,
         )
 
-        return abs(no_traded)
+    @staticmethod
+    def normalize_fx(df: pd.DataFrame) -> pd.Series:
+        """Return FX rate or default to 1.00, for all rows."""
+        if TransactionRegistryColNameValues.SOURCE_FX.value not in df:
+            return pd.Series(1.00, index=df.index)
+
+        fx_rate = _column_as_float(df, TransactionRegistryColNameValues.SOURCE_FX.value)
+
+        return pd.Series(np.where(np.isnan(fx_rate), 1.00, fx_rate), index=df.index)
 
     @staticmethod
-    def normalize_fx(row: pd.DataFrame) -> float:
-        """Return FX rate or default to 1.00."""
-        if TransactionRegistryColNameValues.SOURCE_FX.value not in row or pd.isna(
-            row[TransactionRegistryColNameValues.SOURCE_FX.value]
-        ):
-            return 1.00
+    def transaction_direction(
+        transaction_type: pd.Series,
+    ) -> npt.NDArray[np.int8]:
+        """
+        Return the direction of each transaction as a type code.
 
-        return cast("float", row[TransactionRegistryColNameValues.SOURCE_FX.value])
+        Buy transactions are 1, sell transactions are -1 and all other transactions
+        are 0.
+        """
+        return np.select(
+            [
+                transaction_type.to_numpy() == TransactionTypeValues.BUY.value,
+                transaction_type.to_numpy() == TransactionTypeValues.SELL.value,
+            ],
+            [1, -1],
+            default=0,
+        ).astype(np.int8)
 
     @staticmethod
-    def calculate_adjusted_price_per_unit(group: pd.DataFrame) -> pd.DataFrame:
-        """Calculate adjusted price per unit."""
-        group[TransactionRegistryColNameValues.INTERNAL_TURNOVER.value] = group.apply(
-            lambda x: (
-                (
-                    x[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value]
-                    == TransactionTypeValues.BUY.value
-                )
-                - (
-                    x[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value]
-                    == TransactionTypeValues.SELL.value
-                )
-            )
-            * x[ColumnNameValues.AMOUNT.value],
-            axis=1,
+    def calculate_quantity_held(
+        *,
+        group_codes: npt.NDArray[np.intp],
+        direction: npt.NDArray[np.int8],
+        volumes: npt.NDArray[np.float64],
+    ) -> npt.NDArray[np.float64]:
+        """Calculate the aggregate number of units held after each transaction."""
+        return cast(
+            "npt.NDArray[np.float64]",
+            pd.Series(direction * np.abs(volumes))
+            .groupby(group_codes)
+            .cumsum()
+            .to_numpy(dtype=np.float64),
         )
 
-        group[TransactionRegistryColNameValues.PRICE_PER_UNIT.value] = 0.0
-        last_entry_price = 0.0
+    @staticmethod
+    def calculate_average_cost(
+        *,
+        group_codes: npt.NDArray[np.intp],
+        direction: npt.NDArray[np.int8],
+        quantity_held: npt.NDArray[np.float64],
+        amounts: npt.NDArray[np.float64],
+    ) -> AverageCostResult:
+        """
+        Calculate the running average cost per unit.
 
-        current_turnover = 0.0
-        for index, row in group.iterrows():
-            # We only want to apply the logic to buy and sell transactions
-            if row[
-                TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value
-            ] not in [
-                TransactionTypeValues.BUY.value,
-                TransactionTypeValues.SELL.value,
-            ]:
-                continue
-
-            current_turnover += row[
-                TransactionRegistryColNameValues.INTERNAL_TURNOVER.value
-            ]
-
-            group.at[  # noqa: PD008
-                index,
-                TransactionRegistryColNameValues.CALC_ADJUSTED_QUANTITY_HELD_IS_RESET.value,
-            ] = False
-
-            if (
-                row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value]
-                == TransactionTypeValues.BUY.value
-            ):
-                group.at[  # noqa: PD008
-                    index, TransactionRegistryColNameValues.PRICE_PER_UNIT.value
-                ] = (
-                    current_turnover
-                    / row[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value]
-                )
+        The arrays must be sorted by group (security) and transaction date. Only buy
+        and sell transactions affect the average cost. When the quantity held rounds to
+        zero the position is reset and the next transaction starts a new segment.
+        """
+        no_rows = len(direction)
+        positions = np.arange(no_rows)
+        is_buy = direction == 1
+        is_sell = direction == -1
+        is_trade = is_buy | is_sell
+
+        turnover = direction * amounts
+
+        # There might be fractional rounding errors when closing a position so we
+        # guard against that here
+        is_reset = is_trade & (np.round(quantity_held, 0) == 0)
+
+        # A new segment starts at the first row of each group and after each reset
+        is_segment_start = np.ones(no_rows, dtype=bool)
+        is_segment_start[1:] = is_reset[:-1] | (group_codes[1:] != group_codes[:-1])
+        segment_codes = np.cumsum(is_segment_start)
+
+        current_turnover = (
+            pd.Series(np.where(is_trade, turnover, 0.0))
+            .groupby(segment_codes)
+            .cumsum(skipna=False)
+            .to_numpy(dtype=np.float64)
+        )
 
-            if (
-                row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value]
-                == TransactionTypeValues.SELL.value
-            ):
-                # When selling the last remaining holdings, the last_entry_price
-                # will be 0 and we should return None
-                if isinstance(last_entry_price, pd.Series):
-                    return_value = (
-                        None if last_entry_price.iloc[0] else last_entry_price
-                    )
-                else:
-                    return_value = None if last_entry_price == 0.0 else last_entry_price
-
-                group.at[  # noqa: PD008
-                    index, TransactionRegistryColNameValues.PRICE_PER_UNIT.value
-                ] = return_value
-
-            # There might be fractional rounding errors when closing a position so we
-            # guard against that here
-            if (
-                round(
-                    row[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value],
-                    0,
-                )
-                == 0
-            ):
-                # We keep current value of PRICE_PER_UNIT here as it might be used
-                # in calculating PnL
-                current_turnover = 0.0
-                group.at[  # noqa: PD008
-                    index,
-                    TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value,
-                ] = None
-                group.at[  # noqa: PD008
-                    index, TransactionRegistryColNameValues.INTERNAL_TURNOVER.value
-                ] = None
-                group.at[  # noqa: PD008
-                    index,
-                    TransactionRegistryColNameValues.CALC_ADJUSTED_QUANTITY_HELD_IS_RESET.value,
-                ] = True
-
-            last_entry_price = group.at[  # noqa: PD008
-                index, TransactionRegistryColNameValues.PRICE_PER_UNIT.value
-            ]
-
-        return group
+        price_per_unit = np.zeros(no_rows, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            price_per_unit[is_buy] = current_turnover[is_buy] / quantity_held[is_buy]
+
+        # A sell keeps the average price of the last buy in the same group. When
+        # selling the last remaining holdings, or if there is no previous buy, the
+        # price is None.
+        last_buy_position = np.maximum.accumulate(np.where(is_buy, positions, -1))
+        has_last_buy = (last_buy_position >= 0) & (
+            group_codes[np.maximum(last_buy_position, 0)] == group_codes
+        )
+        last_entry_price = np.where(
+            has_last_buy, price_per_unit[np.maximum(last_buy_position, 0)], np.nan
+        )
+        last_entry_price[last_entry_price == 0.0] = np.nan
+        price_per_unit[is_sell] = last_entry_price[is_sell]
+
+        # We keep current value of PRICE_PER_UNIT on reset as it might be used in
+        # calculating PnL
+        quantity_held = np.where(is_reset, np.nan, quantity_held)
+        turnover = np.where(is_reset, np.nan, turnover)
+
+        # Reset flags are only set for buy and sell transactions
+        is_reset_flag = np.full(no_rows, np.nan, dtype=object)
+        is_reset_flag[is_trade] = is_reset[is_trade].tolist()
+
+        return AverageCostResult(
+            price_per_unit=price_per_unit,
+            quantity_held=quantity_held,
+            is_reset=is_reset_flag,
+            turnover=turnover,
+        )
 
     @staticmethod
-    def cleanup_price_per_unit(row: pd.DataFrame) -> float | None:
-        """Set average price per unit to None when applicable."""
-        if row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value] in [
-            TransactionTypeValues.DIVIDEND.value,
-        ]:
-            return None
-
-        if row[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value] is None:
-            return None
-
-        if round(
-            row[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value],
-            0,
-        ) == 0 or pd.isna(
-            row[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value]
-        ):
-            return None
+    def cleanup_price_per_unit(df: pd.DataFrame) -> pd.Series:
+        """Set average price per unit to None when applicable, for all rows."""
+        is_dividend = (
+            df[
+                TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value
+            ].to_numpy()
+            == TransactionTypeValues.DIVIDEND.value
+        )
+        quantity_held = _column_as_float(
+            df, TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value
+        )
 
-        return cast("float", row[TransactionRegistryColNameValues.PRICE_PER_UNIT.value])
+        has_value = (
+            ~is_dividend
+            & ~_is_none(
+                df[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value]
+            )
+            & (np.round(quantity_held, 0) != 0)
+            & ~np.isnan(quantity_held)
+        )
 
-    @staticmethod
-    def cleanup_quantity_held(row: pd.DataFrame) -> float | None:
-        """Set adjusted quantity held to None when applicable."""
-        if row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value] in [
-            TransactionTypeValues.DIVIDEND.value,
-        ]:
-            return None
+        return _values_or_none(
+            df[TransactionRegistryColNameValues.PRICE_PER_UNIT.value].to_numpy(),
+            has_value,
+            df.index,
+        )
 
-        if row[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value] is None:
-            return None
+    @staticmethod
+    def cleanup_quantity_held(df: pd.DataFrame) -> pd.Series:
+        """Set adjusted quantity held to None when applicable, for all rows."""
+        quantity_held = df[
+            TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value
+        ]
+        is_dividend = (
+            df[
+                TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value
+            ].to_numpy()
+            == TransactionTypeValues.DIVIDEND.value
+        )
 
-        return cast(
-            "float", row[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value]
+        return _values_or_none(
+            quantity_held.to_numpy(),
+            ~is_dividend & ~_is_none(quantity_held),
+            df.index,
         )
 
 
@@ -309,77 +408,77 @@ class PandasAlgorithmPnL:
     """Pandas algorithm for PnL transaction data."""
 
     @staticmethod
-    def calculate_pnl_trade(row: pd.DataFrame) -> float | None:
-        """Calculate profit and loss from a trade."""
-        if row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value] not in [
-            TransactionTypeValues.SELL.value,
-        ]:
-            return None
-
-        commission = float(
-            row.get(TransactionRegistryColNameValues.SOURCE_FEE.value, 0.0)
+    def calculate_pnl_trade(df: pd.DataFrame) -> pd.Series:
+        """Calculate profit and loss from trades, for all rows."""
+        is_sell = (
+            df[
+                TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value
+            ].to_numpy()
+            == TransactionTypeValues.SELL.value
         )
 
-        if pd.isna(commission):
-            commission = 0.0
+        if TransactionRegistryColNameValues.SOURCE_FEE.value in df:
+            commission = _nan_to_zero(
+                _column_as_float(df, TransactionRegistryColNameValues.SOURCE_FEE.value)
+            )
+        else:
+            commission = np.zeros(len(df), dtype=np.float64)
 
         if (
-            TransactionRegistryColNameValues.SOURCE_PRICE.value not in row
-            or TransactionRegistryColNameValues.PRICE_PER_UNIT.value not in row
-            or TransactionRegistryColNameValues.SOURCE_VOLUME.value not in row
+            TransactionRegistryColNameValues.SOURCE_PRICE.value not in df
+            or TransactionRegistryColNameValues.PRICE_PER_UNIT.value not in df
+            or TransactionRegistryColNameValues.SOURCE_VOLUME.value not in df
         ):
-            transaction_result = 0.0
+            transaction_result = np.zeros(len(df), dtype=np.float64)
         else:
-            transaction_result = float(
-                (
-                    row[TransactionRegistryColNameValues.SOURCE_PRICE.value]
-                    - row[TransactionRegistryColNameValues.PRICE_PER_UNIT.value]
+            transaction_result = (
+                _column_as_float(
+                    df, TransactionRegistryColNameValues.SOURCE_PRICE.value
+                )
+                - _column_as_float(
+                    df, TransactionRegistryColNameValues.PRICE_PER_UNIT.value
                 )
-                * row[TransactionRegistryColNameValues.SOURCE_VOLUME.value]
+            ) * _column_as_float(
+                df, TransactionRegistryColNameValues.SOURCE_VOLUME.value
             )
 
-        return transaction_result + commission
+        return _values_or_none(transaction_result + commission, is_sell, df.index)
 
     @staticmethod
-    def calculate_pnl_dividend(row: pd.DataFrame) -> float | None:
-        """Calculate profit and loss from a dividend."""
-        if row[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value] not in [
-            TransactionTypeValues.DIVIDEND.value,
-        ]:
-            return None
+    def calculate_pnl_dividend(df: pd.DataFrame) -> pd.Series:
+        """Calculate profit and loss from dividends, for all rows."""
+        is_dividend = (
+            df[
+                TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value
+            ].to_numpy()
+            == TransactionTypeValues.DIVIDEND.value
+        )
 
         if (
-            TransactionRegistryColNameValues.SOURCE_PRICE.value not in row
-            or TransactionRegistryColNameValues.SOURCE_VOLUME.value not in row
+            TransactionRegistryColNameValues.SOURCE_PRICE.value not in df
+            or TransactionRegistryColNameValues.SOURCE_VOLUME.value not in df
         ):
-            return None
-
-        return float(
-            row[TransactionRegistryColNameValues.SOURCE_PRICE.value]
-            * row[TransactionRegistryColNameValues.SOURCE_VOLUME.value]
+            return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+        return _values_or_none(
+            _column_as_float(df, TransactionRegistryColNameValues.SOURCE_PRICE.value)
+            * _column_as_float(
+                df, TransactionRegistryColNameValues.SOURCE_VOLUME.value
+            ),
+            is_dividend,
+            df.index,
         )
 
     @staticmethod
-    def calculate_pnl_total(row: pd.DataFrame) -> float:
-        """Calculate total profit and loss."""
-        if (
-            pd.isna(row[TransactionRegistryColNameValues.CALC_PNL_TRADE.value])
-            or row[TransactionRegistryColNameValues.CALC_PNL_TRADE.value] is None
-        ):
-            pnl_trade = 0.0
-        else:
-            pnl_trade = cast(
-                "float", row[TransactionRegistryColNameValues.CALC_PNL_TRADE.value]
-            )
-
-        if (
-            pd.isna(row[TransactionRegistryColNameValues.CALC_PNL_DIVIDEND.value])
-            or row[TransactionRegistryColNameValues.CALC_PNL_DIVIDEND.value] is None
-        ):
-            pnl_dividend = 0.0
-        else:
-            pnl_dividend = cast(
-                "float", row[TransactionRegistryColNameValues.CALC_PNL_DIVIDEND.value]
+    def calculate_pnl_total(df: pd.DataFrame) -> pd.Series:
+        """Calculate total profit and loss, for all rows."""
+        pnl_trade = _nan_to_zero(
+            _column_as_float(df, TransactionRegistryColNameValues.CALC_PNL_TRADE.value)
+        )
+        pnl_dividend = _nan_to_zero(
+            _column_as_float(
+                df, TransactionRegistryColNameValues.CALC_PNL_DIVIDEND.value
             )
+        )
 
-        return pnl_dividend + pnl_trade
+        return pd.Series(pnl_dividend + pnl_trade, index=df.index)
@@ -10,6 +10,7 @@ from .const import (
     CSVSeparator,
     TransactionRegistryColNameValues,
 )
+from .csv_reader import SourceSchema
 
 
 class ParetoSecuritiesLoader(TransactionLoader):
@@ -50,6 +51,13 @@ class ParetoSecuritiesLoader(TransactionLoader):
         "Valuta": TransactionRegistryColNameValues.SOURCE_CURRENCY,
     }
 
+    header_signature = frozenset(
+        {"Affärsdag", "Likviddag", "Transaktionstyp", "Avräkningsnota"}
+    )
+    source_schema = SourceSchema(
+        number_columns=("Antal", "Kurs", "Belopp", "Totalt", "Courtage")
+    )
+
     file_pattern = "pareto*.csv"
     date_format_pattern = "%Y-%m-%d"
 
@@ -0,0 +1,225 @@
+"""Process-wide cache for transaction registries."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import threading
+from typing import TYPE_CHECKING
+
+from pypmanager.database.security import SECURITY_TABLE_VERSION
+from pypmanager.settings import Settings
+
+from .const import LOGGER
+from .file_manifest import TRANSACTION_FILE_MANIFEST
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+    from datetime import datetime
+    from pathlib import Path
+
+    import pandas as pd
+
+
+@dataclass(frozen=True)
+class TransactionFileFingerprint:
+    """Identify the content of a transaction file."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+
+
+@dataclass(frozen=True)
+class RegistryCacheKey:
+    """Identify the input used to build a transaction registry."""
+
+    files: tuple[TransactionFileFingerprint, ...]
+    security_table_version: int
+    report_date: datetime | None
+    sort_by_date_descending: bool
+
+
+@dataclass
+class RegistryIncrementalState:
+    """
+    Intermediate result of a transaction registry build.
+
+    Used to only recompute the securities that changed since the previous build.
+    """
+
+    input_dtypes: pd.Series
+    """Data types of the normalised transactions."""
+    security_fingerprints: dict[str, str]
+    """Fingerprint of the normalised transactions of each security."""
+    df_calculated: pd.DataFrame
+    """Calculated transactions, before sorting and filtering by date."""
+
+
+class TransactionRegistryCache:
+    """
+    Keep the result of recent transaction registry builds in memory.
+
+    The cache is keyed on the transaction files, the version of the security table
+    and the arguments of the registry. When the key is unchanged, the already built
+    data frame is returned instead of loading and processing all files again.
+
+    Concurrent requests for the same key share a single build instead of starting
+    their own.
+    """
+
+    def __init__(self: TransactionRegistryCache, max_size: int) -> None:
+        """Init class."""
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        """Number of registries built."""
+        self.coalesced = 0
+        """Number of requests that waited for a build already in progress."""
+        self._in_flight: dict[RegistryCacheKey, asyncio.Task[pd.DataFrame]] = {}
+        self._data: OrderedDict[RegistryCacheKey, pd.DataFrame] = OrderedDict()
+        self._file_hashes: dict[str, tuple[int, int, str]] = {}
+        self._key_lock = threading.Lock()
+        self.incremental_state: RegistryIncrementalState | None = None
+        """State of the latest build, used for incremental rebuilds."""
+
+    def __len__(self: TransactionRegistryCache) -> int:
+        """Return number of cached registries."""
+        return len(self._data)
+
+    def _fingerprint_file(
+        self: TransactionRegistryCache, file_path: Path
+    ) -> TransactionFileFingerprint:
+        """Fingerprint a file, only hashing the content when size or mtime change."""
+        stat = file_path.stat()
+        path = str(file_path)
+
+        cached = self._file_hashes.get(path)
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            content_hash = cached[2]
+        else:
+            with file_path.open("rb") as file:
+                content_hash = hashlib.file_digest(file, "sha256").hexdigest()
+            self._file_hashes[path] = (stat.st_size, stat.st_mtime_ns, content_hash)
+
+        return TransactionFileFingerprint(
+            path=path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            content_hash=content_hash,
+        )
+
+    def get_key(
+        self: TransactionRegistryCache,
+        report_date: datetime | None,
+        *,
+        sort_by_date_descending: bool,
+    ) -> RegistryCacheKey:
+        """Return the cache key for the current state of the transaction files."""
+        # Keys may be computed in several worker threads at once
+        with self._key_lock:
+            files = tuple(
+                self._fingerprint_file(path)
+                for path in TRANSACTION_FILE_MANIFEST.get_all_files()
+            )
+
+        return RegistryCacheKey(
+            files=files,
+            security_table_version=SECURITY_TABLE_VERSION.version,
+            report_date=report_date,
+            sort_by_date_descending=sort_by_date_descending,
+        )
+
+    async def async_get_key(
+        self: TransactionRegistryCache,
+        report_date: datetime | None,
+        *,
+        sort_by_date_descending: bool,
+    ) -> RegistryCacheKey:
+        """
+        Return the cache key, without blocking the event loop.
+
+        Changed files are hashed, which takes a while for large files. It's run in a
+        thread rather than a process, as the hashes are cached in this object.
+        """
+        return await asyncio.to_thread(
+            self.get_key, report_date, sort_by_date_descending=sort_by_date_descending
+        )
+
+    def get(
+        self: TransactionRegistryCache, key: RegistryCacheKey
+    ) -> pd.DataFrame | None:
+        """Return a copy of a cached registry, if available."""
+        if (df_cached := self._data.get(key)) is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._data.move_to_end(key)
+        # With copy-on-write, a shallow copy is safe to modify
+        return df_cached.copy(deep=False)
+
+    def set(
+        self: TransactionRegistryCache, key: RegistryCacheKey, df: pd.DataFrame
+    ) -> None:
+        """Store a registry, evicting the least recently used one if full."""
+        if self.max_size <= 0:
+            return
+
+        self._data[key] = df.copy(deep=False)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    async def async_get_or_build(
+        self: TransactionRegistryCache,
+        key: RegistryCacheKey,
+        build: Callable[[], Awaitable[pd.DataFrame]],
+    ) -> pd.DataFrame:
+        """
+        Return a cached registry or build it.
+
+        If a build for the same key is already in progress, wait for it and share
+        its result. Errors raised by the build are raised to all waiting callers.
+        """
+        if (df_cached := self.get(key)) is not None:
+            return df_cached
+
+        if (task := self._in_flight.get(key)) is not None:
+            self.coalesced += 1
+        else:
+            self.builds += 1
+            task = asyncio.ensure_future(build())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._on_build_done(key, done))
+
+        # Shield the build so that a cancelled caller does not cancel other waiters
+        df_result = await asyncio.shield(task)
+        return df_result.copy(deep=False)
+
+    def _on_build_done(
+        self: TransactionRegistryCache,
+        key: RegistryCacheKey,
+        task: asyncio.Task[pd.DataFrame],
+    ) -> None:
+        """Store the result of a finished build."""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+        if not task.cancelled() and task.exception() is None:
+            self.set(key, task.result())
+
+    def invalidate(self: TransactionRegistryCache) -> None:
+        """Remove all cached registries."""
+        LOGGER.debug(f"Invalidating {len(self._data)} cached transaction registries")
+        self._data.clear()
+        self._file_hashes.clear()
+        self.incremental_state = None
+
+
+REGISTRY_CACHE = TransactionRegistryCache(max_size=Settings.registry_cache_size)
@@ -0,0 +1,68 @@
+"""Persist the transaction registry to disk for a fast cold start."""
+
+from __future__ import annotations
+
+import hashlib
+from typing import TYPE_CHECKING
+
+from pypmanager.database.security import AsyncDbSecurity
+from pypmanager.settings import Settings
+from pypmanager.utils.arrow import read_data_frame, read_metadata, write_data_frame
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pandas as pd
+
+    from .registry_cache import TransactionFileFingerprint
+
+SNAPSHOT_VERSION = 2
+"""Increase when the calculations change, to make existing snapshots stale."""
+
+
+def _snapshot_file() -> Path:
+    """Return path to the snapshot file."""
+    return Settings.dir_cache_local / f"transaction_registry.v{SNAPSHOT_VERSION}.arrow"
+
+
+async def async_get_snapshot_fingerprint(
+    files: tuple[TransactionFileFingerprint, ...],
+) -> str:
+    """
+    Fingerprint the input of the transaction registry.
+
+    Unlike the in-memory cache key, the fingerprint is stable between restarts.
+    It's based on the content of the transaction files and the security table.
+    """
+    async with AsyncDbSecurity() as db:
+        security_list = await db.async_filter_all()
+
+    digest = hashlib.sha256(f"v{SNAPSHOT_VERSION}".encode())
+    for file in files:
+        digest.update(f"{file.path}:{file.content_hash}\n".encode())
+    for security in sorted(
+        (security.isin_code, security.name, str(security.currency))
+        for security in security_list
+    ):
+        digest.update(f"{security}\n".encode())
+
+    return digest.hexdigest()
+
+
+def write_snapshot(df: pd.DataFrame, fingerprint: str) -> None:
+    """Write the calculated registry to an Arrow IPC file."""
+    if not write_data_frame(_snapshot_file(), df, {"fingerprint": fingerprint}):
+        LOGGER.warning("Unable to create transaction registry snapshot")
+
+
+def read_snapshot(fingerprint: str) -> pd.DataFrame | None:
+    """Read the calculated registry if the snapshot matches the fingerprint."""
+    snapshot_file = _snapshot_file()
+
+    metadata = read_metadata(snapshot_file)
+    if metadata is None or metadata.get("fingerprint") != fingerprint:
+        return None
+
+    return read_data_frame(snapshot_file)
@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
 import contextlib
 from dataclasses import dataclass
 from functools import cached_property
+import hashlib
+import time
 from typing import TYPE_CHECKING, Self
 
+import numpy as np
 import pandas as pd
 
 from pypmanager.ingest.transaction.const import (
@@ -16,6 +20,8 @@ from pypmanager.ingest.transaction.const import (
     TransactionTypeValues,
 )
 from pypmanager.settings import Settings
+from pypmanager.utils.executor import async_run_cpu_bound
+from pypmanager.utils.memory import MemoryProfile, trace_memory
 
 from .avanza import AvanzaLoader
 from .const import LOGGER
@@ -23,12 +29,21 @@ from .generic import GenericLoader
 from .lysa import LysaLoader
 from .pandas_algorithm import PandasAlgorithm, PandasAlgorithmPnL
 from .pareto_securities import ParetoSecuritiesLoader
+from .registry_cache import REGISTRY_CACHE, RegistryIncrementalState
+from .registry_snapshot import (
+    async_get_snapshot_fingerprint,
+    read_snapshot,
+    write_snapshot,
+)
 
 if TYPE_CHECKING:
     from collections.abc import Callable
     from datetime import datetime
     from types import TracebackType
 
+    from .base_loader import TransactionLoader
+    from .registry_cache import RegistryCacheKey
+
 
 DTYPES_MAP: dict[str, type[str | float] | str] = {
     # TransactionRegistryColNameValues.SOURCE_TRANSACTION_DATE.value is
@@ -104,7 +119,8 @@ class ColumnAppendConfig:
     """Configuration to append columns."""
 
     column: str
-    callable: Callable[[pd.DataFrame], pd.DataFrame]
+    callable: Callable[[pd.DataFrame], pd.Series]
+    """Calculate the column for all rows in a data frame."""
 
 
 # These columns are appended to the transaction registry
@@ -147,6 +163,54 @@ COLUMN_CLEANUP: tuple[ColumnAppendConfig, ...] = (
 )
 
 
+async def _async_load_broker(klass: type[TransactionLoader]) -> pd.DataFrame:
+    """Load transactions of a broker and log the time it took."""
+    start_time = time.perf_counter()
+
+    async with klass() as loader:
+        df_loaded = loader.df_final
+
+    LOGGER.info(
+        f"Loaded {len(df_loaded)} transactions with {klass.__name__} in "
+        f"{time.perf_counter() - start_time:.3f} s"
+    )
+
+    return df_loaded
+
+
+def _concat_broker_data(df_data_list: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate the transactions of all brokers.
+
+    Empty data frames and columns without values don't decide the type of a column,
+    as pandas has done so far. They are excluded, or cast to the type of the column
+    in the other data frames, so the result doesn't change with future versions of
+    pandas.
+    """
+    df_data_list = [df for df in df_data_list if not df.empty] or df_data_list[:1]
+
+    for column in dict.fromkeys(col for df in df_data_list for col in df.columns):
+        dtypes = [
+            df[column].dtype
+            for df in df_data_list
+            if column in df.columns and df[column].notna().any()
+        ]
+        if not dtypes:
+            continue
+
+        dtype = dtypes[0] if all(d == dtypes[0] for d in dtypes) else np.dtype(object)
+        df_data_list = [
+            df.astype({column: dtype})
+            if column in df.columns
+            and df[column].dtype != dtype
+            and df[column].isna().all()
+            else df
+            for df in df_data_list
+        ]
+
+    return pd.concat(df_data_list)
+
+
 class TransactionRegistry:
     """
     Create a registry for all transactions.
@@ -175,46 +239,247 @@ class TransactionRegistry:
 
         self.report_date = report_date
         self.sort_by_date_descending = sort_by_date_descending
+        self.memory_profile = MemoryProfile()
 
     async def __aenter__(self) -> Self:
         """Enter context manager."""
+        cache_key = await REGISTRY_CACHE.async_get_key(
+            self.report_date, sort_by_date_descending=self.sort_by_date_descending
+        )
+
+        self.df_all_transactions = await REGISTRY_CACHE.async_get_or_build(
+            cache_key, lambda: self._async_build(cache_key)
+        )
+
+        return self
+
+    async def _async_build(
+        self: TransactionRegistry, cache_key: RegistryCacheKey
+    ) -> pd.DataFrame:
+        """Load all transaction files and run all calculations."""
+        snapshot_fingerprint: str | None = None
+        if Settings.registry_snapshot:
+            snapshot_fingerprint = await async_get_snapshot_fingerprint(cache_key.files)
+
+            if (
+                df_snapshot := await async_run_cpu_bound(
+                    self._load_snapshot, snapshot_fingerprint
+                )
+            ) is not None:
+                LOGGER.info("Loaded transaction registry from snapshot")
+                self.df_all_transactions = df_snapshot
+                return self.df_all_transactions
+
         # Load all transaction files into a dataframe
         self.df_all_transactions = await self._async_load_transaction_files()
 
-        # Cleanup must be done before converting data types
-        self._100_cleanup_df()
-
-        # Run the first sequence of normalisation
-        self._200_normalize_and_filter_transaction_type()
-        self._201_normalise_transaction_date()
-        self._202_normalize_data()
-        self._203_convert_data_types()
+        previous_state = (
+            REGISTRY_CACHE.incremental_state if Settings.registry_incremental else None
+        )
 
-        # There are no transactions to process so we can return
-        if self.df_all_transactions.empty:
-            msg = "No transactions to process"
-            raise ValueError(msg)
+        # Keep the event loop responsive while the calculations run
+        self.df_all_transactions, incremental_state = await async_run_cpu_bound(
+            self._run_calculations, previous_state
+        )
 
-        self._300_calculate_average_price()
+        if Settings.registry_incremental:
+            REGISTRY_CACHE.incremental_state = incremental_state
 
-        # Set index
-        self._400_set_index()
+        if snapshot_fingerprint is not None:
+            await async_run_cpu_bound(
+                write_snapshot, incremental_state.df_calculated, snapshot_fingerprint
+            )
 
-        # Append columns containing derived meta data
-        self._500_append_columns()
+        return self.df_all_transactions
 
-        # Cleanup data that we don't need in the final result
-        self._600_final_cleanup()
+    def _load_snapshot(
+        self: TransactionRegistry, snapshot_fingerprint: str
+    ) -> pd.DataFrame | None:
+        """Read, sort and filter the snapshot if it matches the fingerprint."""
+        if (df_snapshot := read_snapshot(snapshot_fingerprint)) is None:
+            return None
 
-        # Set index and, sort by transaction date and filter by date, if applicable
+        self.df_all_transactions = df_snapshot
         self._sort_transactions()
         self._filter_by_date()
+        return self.df_all_transactions
 
-        # Validation
-        self._validate_columns()
-        self._validate_index()
+    def _run_calculations(
+        self: TransactionRegistry,
+        previous_state: RegistryIncrementalState | None = None,
+    ) -> tuple[pd.DataFrame, RegistryIncrementalState]:
+        """
+        Run all calculations on the loaded transactions.
 
-        return self
+        If the state of a previous build is provided, only securities with new or
+        changed transactions are recalculated.
+        """
+        with trace_memory(enabled=Settings.registry_profile_memory):
+            # Cleanup must be done before converting data types
+            self._run_stage(self._100_cleanup_df)
+
+            # Run the first sequence of normalisation
+            self._run_stage(self._200_normalize_and_filter_transaction_type)
+            self._run_stage(self._201_normalise_transaction_date)
+            self._run_stage(self._202_normalize_data)
+            self._run_stage(self._203_convert_data_types)
+
+            # There are no transactions to process so we can return
+            if self.df_all_transactions.empty:
+                msg = "No transactions to process"
+                raise ValueError(msg)
+
+            incremental_state = self._calculate_securities(previous_state)
+
+            # Set index and, sort by transaction date and filter by date, if
+            # applicable
+            self._run_stage(self._sort_transactions)
+            self._run_stage(self._filter_by_date)
+
+            # Validation
+            self._run_stage(self._validate_columns)
+            self._run_stage(self._validate_index)
+
+        if Settings.registry_profile_memory:
+            for stage, peak_bytes in self.memory_profile.peak_bytes.items():
+                LOGGER.info(f"Peak memory of {stage}: {peak_bytes / 2**20:.2f} MiB")
+
+        return self.df_all_transactions, incremental_state
+
+    def _run_stage(self: TransactionRegistry, stage: Callable[[], None]) -> None:
+        """Run a stage of the calculations, measuring its memory use if traced."""
+        with self.memory_profile.measure(stage.__name__):
+            stage()
+
+    def _calculate_securities(
+        self: TransactionRegistry,
+        previous_state: RegistryIncrementalState | None,
+    ) -> RegistryIncrementalState:
+        """
+        Run the calculations that depend on the history of each security.
+
+        The calculations of a security only depend on its own transactions, so the
+        result of securities whose transactions are unchanged since the previous
+        build is reused.
+        """
+        df_normalised = self.df_all_transactions
+        security_keys = df_normalised[
+            TransactionRegistryColNameValues.SOURCE_NAME_SECURITY.value
+        ].astype(str)
+        security_fingerprints = self._fingerprint_securities(
+            df_normalised, security_keys
+        )
+
+        if previous_state is None or not previous_state.input_dtypes.equals(
+            df_normalised.dtypes
+        ):
+            changed_securities = set(security_fingerprints)
+        else:
+            changed_securities = {
+                key
+                for key, fingerprint in security_fingerprints.items()
+                if previous_state.security_fingerprints.get(key) != fingerprint
+            }
+
+        LOGGER.debug(
+            f"Calculating {len(changed_securities)} of {len(security_fingerprints)} "
+            "securities"
+        )
+
+        df_calculated_list: list[pd.DataFrame] = []
+
+        if previous_state is not None and len(changed_securities) < len(
+            security_fingerprints
+        ):
+            df_previous = previous_state.df_calculated
+            df_calculated_list.append(
+                df_previous[
+                    df_previous[
+                        TransactionRegistryColNameValues.SOURCE_NAME_SECURITY.value
+                    ]
+                    .astype(str)
+                    .isin(set(security_fingerprints) - changed_securities)
+                ]
+            )
+
+        if changed_securities:
+            self.df_all_transactions = df_normalised[
+                security_keys.isin(changed_securities)
+            ]
+
+            self._run_stage(self._300_calculate_average_price)
+
+            # Set index
+            self._run_stage(self._400_set_index)
+
+            # Append columns containing derived meta data
+            self._run_stage(self._500_append_columns)
+
+            # Cleanup data that we don't need in the final result
+            self._run_stage(self._600_final_cleanup)
+
+            df_calculated_list.append(self.df_all_transactions)
+
+        self.df_all_transactions = self._merge_calculated_securities(df_calculated_list)
+
+        return RegistryIncrementalState(
+            input_dtypes=df_normalised.dtypes,
+            security_fingerprints=security_fingerprints,
+            df_calculated=self.df_all_transactions,
+        )
+
+    @staticmethod
+    def _fingerprint_securities(
+        df_normalised: pd.DataFrame, security_keys: pd.Series
+    ) -> dict[str, str]:
+        """Fingerprint the transactions of each security, including their order."""
+        row_hashes = pd.util.hash_pandas_object(df_normalised, index=False)
+
+        return {
+            key: hashlib.blake2b(
+                group_hashes.to_numpy().tobytes(), digest_size=16
+            ).hexdigest()
+            for key, group_hashes in row_hashes.groupby(
+                security_keys.to_numpy(), sort=False
+            )
+        }
+
+    @staticmethod
+    def _merge_calculated_securities(
+        df_calculated_list: list[pd.DataFrame],
+    ) -> pd.DataFrame:
+        """
+        Merge reused and recalculated securities.
+
+        The result has the same row order and data types as a full calculation.
+        """
+        if len(df_calculated_list) == 1:
+            return df_calculated_list[0]
+
+        df_reused, df_recalculated = df_calculated_list
+
+        # Columns may have been inferred differently in the two parts, e.g. a column
+        # with only None values in one of them
+        mixed_columns = [
+            column
+            for column in df_reused.columns
+            if df_reused[column].dtype != df_recalculated[column].dtype
+        ]
+
+        df_merged = pd.concat(
+            [
+                df.astype(dict.fromkeys(mixed_columns, object))
+                for df in (df_reused, df_recalculated)
+            ]
+        )
+
+        for column in mixed_columns:
+            df_merged[column] = df_merged[column].infer_objects()
+
+        return df_merged.sort_values(
+            TransactionRegistryColNameValues.SOURCE_NAME_SECURITY.value,
+            kind="stable",
+        )
 
     async def __aexit__(
         self: TransactionRegistry,
@@ -226,24 +491,30 @@ class TransactionRegistry:
 
     async def _async_load_transaction_files(self: TransactionRegistry) -> pd.DataFrame:
         """Load transaction files and return a sorted DataFrame."""
-        df_data_list: list[pd.DataFrame] = []
-        for klass in (AvanzaLoader, GenericLoader, LysaLoader, ParetoSecuritiesLoader):
-            async with klass() as loader:
-                df_data_list.append(loader.df_final)
+        # The loaders are independent of each other, so they are run concurrently.
+        # The result is concatenated in the same order as the loaders are listed.
+        df_data_list = await asyncio.gather(
+            *(
+                _async_load_broker(klass)
+                for klass in (
+                    AvanzaLoader,
+                    GenericLoader,
+                    LysaLoader,
+                    ParetoSecuritiesLoader,
+                )
+            )
+        )
 
-        return pd.concat(df_data_list)
+        return _concat_broker_data(df_data_list)
 
     def _100_cleanup_df(self: TransactionRegistry) -> None:
         """Cleanup dataframe."""
-        df_raw = self.df_all_transactions.copy()
+        df_raw = self.df_all_transactions
 
         # Ensure all number columns are floats
         for col in NUMBER_COLS:
             if col in df_raw.columns:
-                df_raw[col] = df_raw.apply(
-                    lambda x, _col=col: PandasAlgorithm.cleanup_number(x[_col]),
-                    axis=1,
-                )
+                df_raw[col] = PandasAlgorithm.cleanup_number(df_raw[col])
 
         # Replace dashes with 0
         for col in (
@@ -263,7 +534,7 @@ class TransactionRegistry:
         In the source data, transactions will be named differently. To enable
         calculations, we replace the names in the source data with our internal names.
         """
-        df_raw = self.df_all_transactions.copy()
+        df_raw = self.df_all_transactions
 
         for config in REPLACE_CONFIG:
             for event in config.search:
@@ -282,7 +553,7 @@ class TransactionRegistry:
 
     def _201_normalise_transaction_date(self: TransactionRegistry) -> None:
         """Make transaction date aware using system time zone."""
-        df_raw = self.df_all_transactions.copy()
+        df_raw = self.df_all_transactions
 
         # Convert all datetime objects to UTC
         df_raw[TransactionRegistryColNameValues.SOURCE_TRANSACTION_DATE.value] = (
@@ -295,23 +566,21 @@ class TransactionRegistry:
 
     def _202_normalize_data(self: TransactionRegistry) -> None:
         """Make sure data is calculated in the same way."""
-        df_raw = self.df_all_transactions.copy()
+        df_raw = self.df_all_transactions
 
-        df_raw[TransactionRegistryColNameValues.SOURCE_VOLUME.value] = df_raw.apply(
-            PandasAlgorithm.normalize_no_traded, axis=1
-        )
-        df_raw[ColumnNameValues.AMOUNT.value] = df_raw.apply(
-            PandasAlgorithm.normalize_amount, axis=1
+        df_raw[TransactionRegistryColNameValues.SOURCE_VOLUME.value] = (
+            PandasAlgorithm.normalize_no_traded(df_raw)
         )
-        df_raw[TransactionRegistryColNameValues.SOURCE_FX.value] = df_raw.apply(
-            PandasAlgorithm.normalize_fx, axis=1
+        df_raw[ColumnNameValues.AMOUNT.value] = PandasAlgorithm.normalize_amount(df_raw)
+        df_raw[TransactionRegistryColNameValues.SOURCE_FX.value] = (
+            PandasAlgorithm.normalize_fx(df_raw)
         )
 
         self.df_all_transactions = df_raw
 
     def _203_convert_data_types(self: TransactionRegistry) -> None:
         """Convert columns to correct data types."""
-        df_raw = self.df_all_transactions.copy()
+        df_raw = self.df_all_transactions
         for key, val in DTYPES_MAP.items():
             if key in df_raw.columns:
                 try:
@@ -324,7 +593,7 @@ class TransactionRegistry:
 
     def _filter_by_date(self: TransactionRegistry) -> None:
         """Filter transactions by date."""
-        df_raw = self.df_all_transactions.copy()
+        df_raw = self.df_all_transactions
 
         if self.report_date is not None:
             df_raw = df_raw.query(f"index <= '{self.report_date}'")
@@ -333,7 +602,7 @@ class TransactionRegistry:
 
     def _300_calculate_average_price(self: TransactionRegistry) -> None:
         """Calculate average price."""
-        df_raw = self.df_all_transactions.copy()
+        df_raw = self.df_all_transactions
 
         df_sorted = df_raw.sort_values(
             by=[
@@ -348,57 +617,62 @@ class TransactionRegistry:
             df_sorted[TransactionRegistryColNameValues.SOURCE_VOLUME.value]
             * df_sorted[TransactionRegistryColNameValues.SOURCE_PRICE.value]
         )
-        df_sorted[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value] = (
-            df_sorted.apply(
-                lambda x: (
-                    (
-                        x[
-                            TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value
-                        ]
-                        == TransactionTypeValues.BUY.value
-                    )
-                    - (
-                        x[
-                            TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value
-                        ]
-                        == TransactionTypeValues.SELL.value
-                    )
-                )
-                # Make sure traded volume is always a positive integer
-                * abs(x[TransactionRegistryColNameValues.SOURCE_VOLUME.value]),
-                axis=1,
-            )
-        )
-        df_sorted[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value] = (
-            df_sorted.groupby(
-                TransactionRegistryColNameValues.SOURCE_NAME_SECURITY.value
-            )[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value].cumsum()
-        )
 
-        df_sorted = (
+        group_codes = (
             df_sorted.groupby(
                 TransactionRegistryColNameValues.SOURCE_NAME_SECURITY.value
             )
-            .apply(
-                PandasAlgorithm.calculate_adjusted_price_per_unit, include_groups=False
+            .ngroup()
+            .to_numpy()
+        )
+        direction = PandasAlgorithm.transaction_direction(
+            df_sorted[TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value]
+        )
+
+        df_sorted[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value] = (
+            PandasAlgorithm.calculate_quantity_held(
+                group_codes=group_codes,
+                direction=direction,
+                volumes=df_sorted[
+                    TransactionRegistryColNameValues.SOURCE_VOLUME.value
+                ].to_numpy(dtype=float),
             )
-            # Add bane back as a column
-            .reset_index(drop=False)
         )
 
-        # Drop the column that is appended in the group by above
-        df_sorted = df_sorted.drop(
-            columns=[
-                "level_1",
-                TransactionRegistryColNameValues.INTERNAL_TURNOVER.value,
-            ]
+        result = PandasAlgorithm.calculate_average_cost(
+            group_codes=group_codes,
+            direction=direction,
+            quantity_held=df_sorted[
+                TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value
+            ].to_numpy(),
+            amounts=df_sorted[ColumnNameValues.AMOUNT.value].to_numpy(dtype=float),
         )
 
+        df_sorted[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value] = (
+            result.quantity_held
+        )
+        df_sorted[TransactionRegistryColNameValues.PRICE_PER_UNIT.value] = (
+            result.price_per_unit
+        )
+        df_sorted[
+            TransactionRegistryColNameValues.CALC_ADJUSTED_QUANTITY_HELD_IS_RESET.value
+        ] = result.is_reset
+
+        # Keep the name of the security as the first column
+        df_sorted = df_sorted[
+            [
+                TransactionRegistryColNameValues.SOURCE_NAME_SECURITY.value,
+                *df_sorted.columns.drop(
+                    TransactionRegistryColNameValues.SOURCE_NAME_SECURITY.value
+                ),
+            ]
+        ].reset_index(drop=True)
+
         self.df_all_transactions = df_sorted
 
     def _400_set_index(self: TransactionRegistry) -> None:
         """Set index."""
-        df_raw = self.df_all_transactions.copy()
+        df_raw = self.df_all_transactions
 
         df_raw = df_raw.set_index(
             TransactionRegistryColNameValues.SOURCE_TRANSACTION_DATE.value
@@ -408,10 +682,10 @@ class TransactionRegistry:
 
     def _500_append_columns(self: TransactionRegistry) -> None:
         """Append calculated columns."""
-        df_raw = self.df_all_transactions.copy()
+        df_raw = self.df_all_transactions
 
         for config in COLUMN_APPEND:
-            df_raw[config.column] = df_raw.apply(config.callable, axis=1)
+            df_raw[config.column] = config.callable(df_raw)
 
         # Add transaction year
         df_raw[TransactionRegistryColNameValues.META_TRANSACTION_YEAR.value] = (
@@ -426,16 +700,16 @@ class TransactionRegistry:
 
         This removes data we don't need in the final result.
         """
-        df_raw = self.df_all_transactions.copy()
+        df_raw = self.df_all_transactions
 
         for config in COLUMN_CLEANUP:
-            df_raw[config.column] = df_raw.apply(config.callable, axis=1)
+            df_raw[config.column] = config.callable(df_raw)
 
         self.df_all_transactions = df_raw
 
     def _sort_transactions(self: TransactionRegistry) -> None:
         """Sort transactions."""
-        df_raw = self.df_all_transactions.copy()
+        df_raw = self.df_all_transactions
 
         if self.sort_by_date_descending:
             df_raw = df_raw.sort_index(ascending=False)
@@ -485,10 +759,8 @@ class TransactionRegistry:
 
     def _validate_index(self: TransactionRegistry) -> None:
         """Validate index."""
-        df_copy = self.df_all_transactions.copy()
-
         # Filter only rows where isin_code is not nan
-        df_copy = df_copy.query(
+        df_copy = self.df_all_transactions.query(
             f"{TransactionRegistryColNameValues.SOURCE_ISIN.value} != 'nan'"
         )
 
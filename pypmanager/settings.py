@@ -5,6 +5,7 @@ from __future__ import annotations
 import logging
 import os
 from pathlib import Path
+from typing import Literal
 from zoneinfo import ZoneInfo
 
 from dotenv import load_dotenv
@@ -32,6 +33,54 @@ class TypedSettings(BaseSettings):
 
     system_time_zone: ZoneInfo = ZoneInfo("Europe/Stockholm")
 
+    registry_cache_size: int = 8
+    """The maximum number of transaction registries to keep in memory."""
+    registry_incremental: bool = True
+    """Only recompute securities with changed transactions when rebuilding."""
+    registry_snapshot: bool = True
+    """Persist the transaction registry to disk and load it on cold start."""
+    registry_profile_memory: bool = False
+    """
+    Log the peak memory allocated by each stage when building the registry.
+
+    Tracing allocations slows down the build.
+    """
+    ingest_chunk_size: int | None = None
+    """
+    Read transaction files in chunks of this many rows, to bound memory use.
+
+    None reads, and caches, whole files.
+    """
+
+    database_journal_mode: Literal[
+        "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"
+    ] = "WAL"
+    """
+    The SQLite journal mode.
+
+    In WAL mode readers don't block writers and a writer doesn't block readers.
+    """
+    database_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    """How often SQLite waits for writes to reach the disk. NORMAL is safe in WAL."""
+    database_mmap_size: int = 256 * 1024 * 1024
+    """The number of bytes of the database file to memory map. 0 disables mmap."""
+    database_cache_size: int = -64 * 1024
+    """The page cache of each connection, in pages, or in KiB if negative."""
+    database_temp_store: Literal["DEFAULT", "FILE", "MEMORY"] = "MEMORY"
+    """Where SQLite stores temporary tables and indices."""
+
+    market_data_max_concurrency_per_host: int = 2
+    """The number of concurrent market data requests to a host."""
+    market_data_requests_per_second: float = 1.0
+    """The sustained rate of market data requests to a host."""
+    market_data_burst: int = 2
+    """The number of market data requests to a host that may be sent at once."""
+
+    executor_type: Literal["thread", "process"] = "thread"
+    """The type of pool used to run CPU bound calculations off the event loop."""
+    executor_max_workers: int | None = None
+    """The number of workers in the pool. None uses the default of the pool."""
+
     @property
     def file_market_data_config(self: TypedSettings) -> Path:
         """Return market data file."""
@@ -57,6 +106,11 @@ class TypedSettings(BaseSettings):
         """Return folder path for market data."""
         return self.dir_data_local / "market_data"
 
+    @property
+    def dir_cache_local(self: TypedSettings) -> Path:
+        """Return folder path for cached data."""
+        return self.dir_data_local / "cache"
+
     @property
     def dir_transaction_data_local(self: TypedSettings) -> Path:
         """Return folder path for transaction data."""
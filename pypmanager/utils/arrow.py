@@ -0,0 +1,151 @@
+"""Store data frames as Arrow IPC files."""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+import tempfile
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+import pyarrow as pa
+
+LOGGER = logging.getLogger(__name__)
+
+METADATA_PREFIX = "pypmanager."
+
+
+NAN_MASK_PREFIX = "__pypmanager_nan__."
+"""Prefix of the columns that mark the NaN values of an object column."""
+
+
+def _get_nan_masks(df: pd.DataFrame) -> dict[str, npt.NDArray[np.bool_]]:
+    """
+    Return where object columns have NaN values, rather than None.
+
+    Arrow stores both as null, so this is needed to restore them.
+    """
+    nan_masks: dict[str, npt.NDArray[np.bool_]] = {}
+    for column in df.columns:
+        if df[column].dtype != object:
+            continue
+
+        values = df[column].to_numpy()
+        is_nan = pd.isna(values)
+        is_nan[is_nan] = [value is not None for value in values[is_nan]]
+        if is_nan.any():
+            nan_masks[str(column)] = is_nan
+
+    return nan_masks
+
+
+def write_data_frame(path: Path, df: pd.DataFrame, metadata: dict[str, str]) -> bool:
+    """
+    Write a data frame, and metadata about it, to an Arrow IPC file.
+
+    The file is replaced atomically. Returns False if the file can't be written, or
+    if the data frame can't be represented in Arrow, e.g. when a column contains
+    mixed types.
+    """
+    try:
+        table = pa.Table.from_pandas(df)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as err:
+        LOGGER.debug(f"Unable to write {path}: {err}")
+        return False
+
+    for column, is_nan in _get_nan_masks(df).items():
+        table = table.append_column(f"{NAN_MASK_PREFIX}{column}", pa.array(is_nan))
+
+    table = table.replace_schema_metadata(
+        {
+            **(table.schema.metadata or {}),
+            **{
+                f"{METADATA_PREFIX}{key}".encode(): value.encode()
+                for key, value in metadata.items()
+            },
+        }
+    )
+
+    tmp_path: Path | None = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first so a reader never sees a partial file. The
+        # name is unique, as the same file may be written by several threads.
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False
+        ) as tmp_file:
+            tmp_path = Path(tmp_file.name)
+            with pa.ipc.new_file(tmp_file, table.schema) as writer:
+                writer.write_table(table)
+        tmp_path.replace(path)
+    except OSError as err:
+        LOGGER.warning(f"Unable to write {path}: {err}")
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
+        return False
+
+    return True
+
+
+def read_metadata(path: Path) -> dict[str, str] | None:
+    """Return the metadata of an Arrow IPC file, without reading the data."""
+    if not path.exists():
+        return None
+
+    try:
+        with pa.memory_map(str(path)) as source:
+            schema_metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid) as err:
+        LOGGER.warning(f"Unable to read {path}: {err}")
+        return None
+
+    return {
+        key.decode().removeprefix(METADATA_PREFIX): value.decode()
+        for key, value in schema_metadata.items()
+        if key.startswith(METADATA_PREFIX.encode())
+    }
+
+
+def read_data_frame(path: Path) -> pd.DataFrame | None:
+    """
+    Read a data frame from a memory mapped Arrow IPC file.
+
+    Values are restored as they were written: time zones use zoneinfo and missing
+    values in object columns are NaN or None, as in the written data frame.
+    """
+    try:
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+    except (OSError, pa.ArrowInvalid) as err:
+        LOGGER.warning(f"Unable to read {path}: {err}")
+        return None
+
+    df = table.to_pandas()
+
+    # Arrow restores time zones using pytz
+    if (tz := getattr(df.index, "tz", None)) is not None:
+        df.index = df.index.tz_convert(ZoneInfo(str(tz)))
+
+    object_columns = {
+        column["name"]
+        for column in (table.schema.pandas_metadata or {}).get("columns", [])
+        if column["numpy_type"] == "object"
+    }
+    for field in table.schema:
+        if field.name not in object_columns:
+            continue
+
+        # Arrow restores missing values as None, and booleans as a bool column
+        values = df[field.name].to_numpy(dtype=object, copy=True)
+        if (nan_mask_column := f"{NAN_MASK_PREFIX}{field.name}") in df:
+            values[df[nan_mask_column].to_numpy()] = np.nan
+        df[field.name] = pd.Series(values, index=df.index, dtype=object)
+
+    return df.drop(
+        columns=[
+            column for column in df.columns if str(column).startswith(NAN_MASK_PREFIX)
+        ]
+    )
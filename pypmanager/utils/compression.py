@@ -0,0 +1,74 @@
+"""Read files that may be compressed."""
+
+from __future__ import annotations
+
+from contextlib import AbstractContextManager, nullcontext
+import fnmatch
+import gzip
+import io
+import lzma
+from typing import TYPE_CHECKING
+
+import pyarrow as pa
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+COMPRESSION_SUFFIXES = (".gz", ".xz", ".zst")
+
+
+def is_compressed(path: Path) -> bool:
+    """Return True if a file is compressed, judging by its suffix."""
+    return path.suffix in COMPRESSION_SUFFIXES
+
+
+def strip_compression_suffix(name: str) -> str:
+    """Return a file name without the suffix of the compression, e.g. a.csv.gz."""
+    for suffix in COMPRESSION_SUFFIXES:
+        if name.endswith(suffix):
+            return name.removesuffix(suffix)
+
+    return name
+
+
+def open_binary(path: Path) -> io.BufferedIOBase:
+    """
+    Open a file for reading, decompressing it while it's read.
+
+    The compression is detected by the suffix of the file. The standard library
+    can't read zstd, so it's decompressed using pyarrow.
+    """
+    match path.suffix:
+        case ".gz":
+            return gzip.open(path, "rb")
+        case ".xz":
+            return lzma.open(path, "rb")
+        case ".zst":
+            return io.BufferedReader(pa.input_stream(str(path), compression="zstd"))
+
+    return path.open("rb")
+
+
+def open_source(path: Path) -> AbstractContextManager[Path | io.BufferedIOBase]:
+    """
+    Open a compressed file, or return the path of a plain file.
+
+    Readers such as pyarrow and pandas are faster at opening plain files themselves.
+    """
+    return open_binary(path) if is_compressed(path) else nullcontext(path)
+
+
+def matches_pattern(path: Path, pattern: str) -> bool:
+    """Return True if the name of a file, without compression suffix, matches."""
+    return fnmatch.fnmatch(strip_compression_suffix(path.name), pattern)
+
+
+def glob_with_compressed(directory: Path, pattern: str) -> list[Path]:
+    """Return the files matching a glob pattern, and compressed versions of them."""
+    return sorted(
+        {
+            path
+            for suffix in ("", *COMPRESSION_SUFFIXES)
+            for path in directory.glob(f"{pattern}{suffix}")
+        }
+    )
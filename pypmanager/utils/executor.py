@@ -0,0 +1,57 @@
+"""Run CPU bound work outside of the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import cache, partial
+import multiprocessing
+from typing import TYPE_CHECKING
+
+from pypmanager.settings import Settings
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+@cache
+def get_executor() -> Executor:
+    """
+    Return the executor used for CPU bound work.
+
+    The executor is created on first use and configured through the settings
+    executor_type and executor_max_workers.
+    """
+    if Settings.executor_type == "process":
+        return ProcessPoolExecutor(
+            max_workers=Settings.executor_max_workers,
+            # Forking a process that runs an event loop and threads is not safe
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    return ThreadPoolExecutor(
+        max_workers=Settings.executor_max_workers,
+        thread_name_prefix="pypmanager-cpu",
+    )
+
+
+def shutdown_executor() -> None:
+    """Shutdown the executor, if it has been created."""
+    if get_executor.cache_info().currsize == 0:
+        return
+
+    get_executor().shutdown(wait=True)
+    get_executor.cache_clear()
+
+
+async def async_run_cpu_bound[**P, T](
+    func: Callable[P, T], *args: P.args, **kwargs: P.kwargs
+) -> T:
+    """
+    Run a function in the executor and wait for the result.
+
+    When a process pool is used, the function, its arguments and its return value
+    must be picklable.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
@@ -0,0 +1,57 @@
+"""Measure memory allocations."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import tracemalloc
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+@contextmanager
+def trace_memory(*, enabled: bool) -> Iterator[None]:
+    """
+    Trace memory allocations within the block, if enabled.
+
+    Tracing includes allocations by numpy, and thereby pandas, but slows down all
+    allocations while enabled.
+    """
+    if not enabled or tracemalloc.is_tracing():
+        yield
+        return
+
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        tracemalloc.stop()
+
+
+@dataclass
+class MemoryProfile:
+    """The peak memory allocated by each stage of a pipeline."""
+
+    peak_bytes: dict[str, int] = field(default_factory=dict)
+
+    @contextmanager
+    def measure(self: MemoryProfile, stage: str) -> Iterator[None]:
+        """
+        Measure the peak memory allocated within the block.
+
+        Nothing is measured unless memory is traced. Allocations by other threads
+        are included in the measurement.
+        """
+        if not tracemalloc.is_tracing():
+            yield
+            return
+
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            self.peak_bytes[stage] = max(self.peak_bytes.get(stage, 0), peak - baseline)
@@ -3,14 +3,18 @@
 from __future__ import annotations
 
 from datetime import UTC, date, datetime
+import gzip
+import lzma
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 from unittest.mock import PropertyMock, patch
 
 import pandas as pd
+import pyarrow as pa
 import pytest
 import pytest_asyncio
 
+from pypmanager.database import DATABASE_ENGINE
 from pypmanager.database.daily_portfolio_holding import (
     AsyncDbDailyPortfolioHolding,
     DailyPortfolioMoldingModel,
@@ -21,6 +25,8 @@ from pypmanager.ingest.transaction.const import (
     TransactionRegistryColNameValues,
     TransactionTypeValues,
 )
+from pypmanager.ingest.transaction.file_manifest import TRANSACTION_FILE_MANIFEST
+from pypmanager.ingest.transaction.registry_cache import REGISTRY_CACHE
 from pypmanager.settings import Settings, TypedSettings
 
 if TYPE_CHECKING:
@@ -29,6 +35,20 @@ if TYPE_CHECKING:
 DB_NAME_TEST = "test_database.sqllite"
 
 
+def write_compressed(data: bytes, file_path: Path) -> None:
+    """Write a file compressed by the suffix of its name."""
+    match file_path.suffix:
+        case ".gz":
+            file_path.write_bytes(gzip.compress(data))
+        case ".xz":
+            file_path.write_bytes(lzma.compress(data))
+        case ".zst":
+            with pa.output_stream(str(file_path), compression="zstd") as stream:
+                stream.write(data)
+        case _:
+            file_path.write_bytes(data)
+
+
 @pytest.fixture(scope="session", autouse=True)
 def mock_db_file_location() -> Generator[Any, Any, Any]:
     """
@@ -66,6 +86,30 @@ async def async_cleanup_db() -> AsyncGenerator[None]:
     async with AsyncDbSecurity() as db:
         await db._async_purge_table()  # pylint: disable=protected-access # noqa: SLF001
 
+    # Each test runs in its own event loop
+    await DATABASE_ENGINE.async_dispose()
+
+
+@pytest.fixture(autouse=True)
+def cleanup_registry_cache(tmp_path: Path) -> Generator[None]:
+    """
+    Clear the transaction registry cache and file manifest after each test.
+
+    Tests mock the transaction files, so the snapshot is disabled by default.
+    """
+    with (
+        patch.object(
+            TypedSettings,
+            "dir_cache_local",
+            new_callable=PropertyMock,
+        ) as mock,
+        patch.object(Settings, "registry_snapshot", new=False),
+    ):
+        mock.return_value = tmp_path / "cache"
+        yield
+    REGISTRY_CACHE.invalidate()
+    TRANSACTION_FILE_MANIFEST.invalidate()
+
 
 @pytest.fixture(name="sample_market_data")
 def sample_market_data_fixture() -> list[MarketDataModel]:
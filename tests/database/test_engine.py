@@ -0,0 +1,118 @@
+"""Tests for the shared database engine."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+from unittest.mock import PropertyMock, patch
+
+import pytest
+from sqlalchemy import text
+
+from pypmanager.database import (
+    DATABASE_ENGINE,
+    AsyncDbDailyPortfolioHolding,
+    AsyncDbSecurity,
+    AsyncMarketDataDB,
+)
+from pypmanager.database.engine import DatabaseEngine
+from pypmanager.settings import Settings, TypedSettings
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.mark.asyncio
+async def test_database_classes_share_engine() -> None:
+    """Test that the database classes share one engine."""
+    await DATABASE_ENGINE.async_dispose()
+    engines_created = DATABASE_ENGINE.engines_created
+
+    async with AsyncMarketDataDB() as db_market_data, AsyncDbSecurity() as db_security:
+        assert db_market_data.async_session is db_security.async_session
+
+    async with AsyncDbDailyPortfolioHolding() as db:
+        await db.async_filter_all()
+
+    assert DATABASE_ENGINE.engines_created == engines_created + 1
+
+
+@pytest.mark.asyncio
+async def test_database_engine__schema(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test that the schema is created once, also for concurrent callers."""
+    engine = DatabaseEngine()
+
+    with patch.object(
+        TypedSettings, "database_local", new_callable=PropertyMock
+    ) as mock_database:
+        mock_database.return_value = tmp_path / "database.sqlite"
+
+        try:
+            await asyncio.gather(
+                *(engine.async_get_session_factory() for _ in range(5)),
+            )
+            await engine.async_start()
+        finally:
+            await engine.async_dispose()
+
+    assert engine.engines_created == 1
+    assert caplog.text.count("Database tables created") == 1
+    assert "market_data" in caplog.text
+    assert "security" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_database_engine__dispose() -> None:
+    """Test that a new engine is created after the engine is disposed."""
+    engine = DatabaseEngine()
+
+    session_factory = await engine.async_get_session_factory()
+    assert await engine.async_get_session_factory() is session_factory
+
+    await engine.async_dispose()
+
+    assert await engine.async_get_session_factory() is not session_factory
+    assert engine.engines_created == 2
+    await engine.async_dispose()
+
+
+@pytest.mark.asyncio
+async def test_database_engine__sqlite_settings(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test that the SQLite settings are applied to every connection and logged."""
+    engine = DatabaseEngine()
+
+    with (
+        patch.object(
+            TypedSettings, "database_local", new_callable=PropertyMock
+        ) as mock_database,
+        patch.object(Settings, "database_synchronous", new="FULL"),
+        patch.object(Settings, "database_cache_size", new=-1000),
+    ):
+        mock_database.return_value = tmp_path / "database.sqlite"
+
+        try:
+            await engine.async_start()
+
+            session_factory = await engine.async_get_session_factory()
+            async with session_factory() as session_1, session_factory() as session_2:
+                # Two sessions use two connections of the pool
+                await session_1.execute(text("SELECT 1"))
+                for session in (session_1, session_2):
+                    assert (
+                        await session.execute(text("PRAGMA journal_mode"))
+                    ).scalar() == "wal"
+                    assert (
+                        await session.execute(text("PRAGMA synchronous"))
+                    ).scalar() == 2
+                    assert (
+                        await session.execute(text("PRAGMA cache_size"))
+                    ).scalar() == -1000
+        finally:
+            await engine.async_dispose()
+
+    assert "SQLite settings: journal_mode=wal, synchronous=FULL" in caplog.text
+    assert "cache_size=-1000, temp_store=MEMORY" in caplog.text
@@ -4,16 +4,22 @@ from __future__ import annotations
 
 from datetime import date
 from pathlib import Path
+from unittest.mock import PropertyMock, patch
 
+import numpy as np
+import pandas as pd
 import pytest
 
 from pypmanager.database.market_data import (
     AsyncMarketDataDB,
     MarketDataModel,
+    MarketDataWriteResult,
+    _differs,
 )
 from pypmanager.helpers.market_data import async_sync_csv_to_db
+from pypmanager.settings import Settings, TypedSettings
 
-from tests.conftest import DB_NAME_TEST
+from tests.conftest import DB_NAME_TEST, write_compressed
 
 
 def test_model(sample_market_data: list[MarketDataModel]) -> None:
@@ -121,3 +127,207 @@ async def test_async_sync_csv_to_db(caplog: pytest.LogCaptureFixture) -> None:
     """Test method async_sync_csv_to_db."""
     await async_sync_csv_to_db()
     assert "Stored 1 records from CSV files to the database" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_async_sync_csv_to_db__compressed(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test that compressed CSV files are stored."""
+    data = Path("tests/fixtures/market_data/other.csv").read_bytes()
+    write_compressed(data, tmp_path / "other.csv.gz")
+    write_compressed(
+        data.replace(b"LU0051755006", b"SE0000000001"), tmp_path / "b.csv.zst"
+    )
+
+    with patch.object(
+        TypedSettings, "dir_market_data_local", new_callable=PropertyMock
+    ) as mock_dir:
+        mock_dir.return_value = tmp_path
+        await async_sync_csv_to_db()
+
+    assert "Stored 2 records from CSV files to the database" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_async_read_columns(sample_market_data: list[MarketDataModel]) -> None:
+    """Test reading market data as arrays."""
+    async with AsyncMarketDataDB() as db:
+        await db.async_store_market_data(data=sample_market_data)
+
+        data = await db.async_read_columns(
+            columns=("isin_code", "report_date", "close_price", "currency"),
+            start_date=date(2023, 1, 1),
+        )
+
+        assert sorted(data["isin_code"].tolist()) == ["US0231351067", "US0378331005"]
+        assert data["report_date"].dtype == np.dtype("datetime64[D]")
+        assert data["report_date"].tolist() == [date(2023, 1, 1), date(2023, 1, 1)]
+        assert data["close_price"].dtype == np.float64
+        assert data["currency"].tolist() == [None, None]
+
+        empty = await db.async_read_columns(
+            columns=("isin_code", "close_price"), isin_code="abc123"
+        )
+        assert empty["isin_code"].shape == (0,)
+        assert empty["close_price"].dtype == np.float64
+
+        with pytest.raises(ValueError, match="Unknown market data columns"):
+            await db.async_read_columns(columns=("isin_code", "1; DROP TABLE x"))
+
+
+@pytest.mark.asyncio
+async def test_async_read_df(sample_market_data: list[MarketDataModel]) -> None:
+    """Test reading market data as a data frame indexed by report date."""
+    async with AsyncMarketDataDB() as db:
+        await db.async_store_market_data(data=sample_market_data)
+
+        df_data = await db.async_read_df(
+            columns=("close_price", "date_added"), isin_code="US0378331005"
+        )
+
+    assert df_data.index.name == "report_date"
+    assert str(df_data.index.tz) == str(Settings.system_time_zone)
+    assert df_data.index[0] == pd.Timestamp("2023-01-01", tz=Settings.system_time_zone)
+    assert df_data["close_price"].tolist() == [150.25]
+    assert df_data["date_added"].dtype == np.dtype("datetime64[ns]")
+
+
+@pytest.mark.asyncio
+async def test_latest_market_data(sample_market_data: list[MarketDataModel]) -> None:
+    """Test that the latest market data follows changes of the market data."""
+    async with AsyncMarketDataDB() as db:
+        await db.async_store_market_data(data=sample_market_data)
+        await db.async_store_market_data(
+            data=[
+                {
+                    "isin_code": "US0378331005",
+                    "report_date": date(2023, 1, 2),
+                    "close_price": 151.0,
+                    "source": "test",
+                },
+                # Older than the latest price
+                {
+                    "isin_code": "US0231351067",
+                    "report_date": date(2022, 12, 30),
+                    "close_price": 100.0,
+                    "source": "test",
+                },
+            ]
+        )
+
+        assert await db.async_get_last_close_price_by_isin() == [
+            ("US0231351067", "2023-01-01", 102.75),
+            ("US0378331005", "2023-01-02", 151.0),
+        ]
+
+        # Update of the latest price
+        await db.async_store_market_data(
+            data=[
+                {
+                    "isin_code": "US0378331005",
+                    "report_date": date(2023, 1, 2),
+                    "close_price": 152.0,
+                    "source": "test",
+                }
+            ]
+        )
+        assert (await db.async_get_last_close_price_by_isin())[1] == (
+            "US0378331005",
+            "2023-01-02",
+            152.0,
+        )
+
+        await db._async_purge_table()  # noqa: SLF001
+        assert await db.async_get_last_close_price_by_isin() == []
+
+
+@pytest.mark.asyncio
+async def test_async_store_changed_market_data(
+    sample_market_data: list[MarketDataModel],
+) -> None:
+    """Test that only new and changed market data is written."""
+    async with AsyncMarketDataDB() as db:
+        await db.async_store_market_data(data=sample_market_data)
+
+        result = await db.async_store_changed_market_data(
+            pd.DataFrame(
+                {
+                    "isin_code": ["US0378331005", "US0231351067", "US0378331005"],
+                    "report_date": pd.to_datetime(
+                        ["2023-01-01", "2023-01-01", "2023-01-02"]
+                    ),
+                    "close_price": [150.25, 103.0, 151.0],
+                    "date_added": [date(2023, 1, 3)] * 3,
+                    "source": ["test"] * 3,
+                }
+            )
+        )
+
+        assert result == MarketDataWriteResult(inserted=1, updated=1, unchanged=1)
+
+        columns = await db.async_read_columns(
+            columns=("isin_code", "report_date", "close_price", "date_added")
+        )
+        stored = {
+            (isin_code, str(report_date)): (close_price, str(date_added))
+            for isin_code, report_date, close_price, date_added in zip(
+                columns["isin_code"],
+                columns["report_date"],
+                columns["close_price"],
+                columns["date_added"],
+                strict=True,
+            )
+        }
+
+        # The unchanged row is not written
+        assert stored == {
+            ("US0231351067", "2023-01-01"): (103.0, "2023-01-03"),
+            ("US0378331005", "2023-01-01"): (150.25, "2023-01-02"),
+            ("US0378331005", "2023-01-02"): (151.0, "2023-01-03"),
+        }
+
+        # A changed source is an update
+        result = await db.async_store_changed_market_data(
+            pd.DataFrame(
+                {
+                    "isin_code": ["US0378331005"],
+                    "report_date": pd.to_datetime(["2023-01-02"]),
+                    "close_price": [151.0],
+                    "date_added": [date(2023, 1, 4)],
+                    "source": ["other"],
+                }
+            )
+        )
+        assert result == MarketDataWriteResult(inserted=0, updated=1, unchanged=0)
+
+        # Two sources report the same day, the last one is stored
+        result = await db.async_store_changed_market_data(
+            pd.DataFrame(
+                {
+                    "isin_code": ["US0378331005", "US0378331005"],
+                    "report_date": pd.to_datetime(["2023-01-05", "2023-01-05"]),
+                    "close_price": [160.0, 161.0],
+                    "date_added": [date(2023, 1, 6)] * 2,
+                    "source": ["first", "second"],
+                }
+            )
+        )
+        assert result == MarketDataWriteResult(inserted=1, updated=0, unchanged=0)
+        assert (await db.async_get_last_close_price_by_isin())[1] == (
+            "US0378331005",
+            "2023-01-05",
+            161.0,
+        )
+
+        assert await db.async_store_changed_market_data(
+            pd.DataFrame()
+        ) == MarketDataWriteResult(inserted=0, updated=0, unchanged=0)
+
+
+def test_differs() -> None:
+    """Test that missing values on both sides are not a change."""
+    values = pd.Series([1.0, np.nan, np.nan, 2.0])
+    stored = pd.Series([1.0, np.nan, 3.0, 2.5])
+
+    assert _differs(values, stored).tolist() == [False, False, True, True]
@@ -1,15 +1,21 @@
 """Tests for database utils."""
 
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import MagicMock, patch
 
+import pandas as pd
+import pyarrow as pa
 import pytest
-from sqlalchemy import Connection
-from sqlalchemy.ext.asyncio import (
-    AsyncSession,
-)
+from sqlalchemy import Connection, delete, insert, text
 from sqlalchemy.orm import Mapped, mapped_column
 
-from pypmanager.database.utils import AsyncBase, async_upsert_data, check_table_exists
+from pypmanager.database import DATABASE_ENGINE
+from pypmanager.database.utils import (
+    AsyncBase,
+    UpsertData,
+    UpsertResult,
+    async_upsert_data,
+    check_table_exists,
+)
 
 
 @pytest.mark.parametrize(
@@ -41,37 +47,82 @@ class MockModel(AsyncBase):
 
     __tablename__ = "mock_table"
     isin: Mapped[str] = mapped_column(primary_key=True)
+    price: Mapped[float]
+    currency: Mapped[str | None] = mapped_column(default=None)
+
+
+async def _async_get_rows() -> list[tuple[str, float, str | None]]:
+    """Return the rows of the mock table."""
+    session_factory = await DATABASE_ENGINE.async_get_session_factory()
+    async with session_factory() as session:
+        result = await session.execute(
+            text("SELECT isin, price, currency FROM mock_table ORDER BY isin")
+        )
+        return [tuple(row) for row in result.fetchall()]
 
 
 @pytest.mark.asyncio
-async def test_async_upsert_data_success() -> None:
-    """Test async_upsert_data successfully upserts data."""
-    # Arrange
-    mock_session = AsyncMock(spec=AsyncSession)
-    mock_data_list = [MockModel(), MockModel()]
+@pytest.mark.parametrize(
+    "data",
+    [
+        [MockModel(isin="A", price=1.0), MockModel(isin="B", price=2.0)],
+        [{"isin": "A", "price": 1.0}, {"isin": "B", "price": 2.0}],
+        pd.DataFrame({"isin": ["A", "B"], "price": [1.0, 2.0]}),
+        pa.table({"isin": ["A", "B"], "price": [1.0, 2.0]}),
+    ],
+)
+async def test_async_upsert_data_success(data: UpsertData) -> None:
+    """Test async_upsert_data inserts and updates data of all input types."""
+    session_factory = await DATABASE_ENGINE.async_get_session_factory()
+
+    async with session_factory() as session, session.begin():
+        await session.execute(delete(MockModel))
+        await session.execute(
+            insert(MockModel).values(isin="A", price=0.5, currency="SEK")
+        )
 
-    # Act
-    await async_upsert_data(session=mock_session, data_list=mock_data_list)
+    async with session_factory() as session, session.begin():
+        result = await async_upsert_data(
+            session=session, model=MockModel, data=data, batch_size=1
+        )
 
-    # Assert
-    assert mock_session.merge.call_count == len(mock_data_list)
-    mock_session.merge.assert_any_call(mock_data_list[0])
-    mock_session.merge.assert_any_call(mock_data_list[1])
-    mock_session.commit.assert_called_once()
-    mock_session.rollback.assert_not_called()
+    assert result == UpsertResult(stored=2, failed=0)
+    # Columns that are not in the data are kept
+    assert await _async_get_rows() == [("A", 1.0, "SEK"), ("B", 2.0, None)]
+
+
+@pytest.mark.asyncio
+async def test_async_upsert_data_partial_failure(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that only the failing rows of a batch are skipped."""
+    session_factory = await DATABASE_ENGINE.async_get_session_factory()
+
+    async with session_factory() as session, session.begin():
+        await session.execute(delete(MockModel))
+
+    async with session_factory() as session, session.begin():
+        result = await async_upsert_data(
+            session=session,
+            model=MockModel,
+            data=pd.DataFrame({"isin": ["A", "B", "C"], "price": [1.0, None, 3.0]}),
+        )
+
+    assert result == UpsertResult(stored=2, failed=1)
+    assert "Failed to upsert item (MockModel)" in caplog.text
+    assert "Committed 2 items (skipped 1)" in caplog.text
+    assert await _async_get_rows() == [("A", 1.0, None), ("C", 3.0, None)]
 
 
 @pytest.mark.asyncio
 async def test_async_upsert_data_failure(caplog: pytest.LogCaptureFixture) -> None:
     """Test async_upsert_data rolls back on failure."""
-    # Arrange
-    mock_session = AsyncMock(spec=AsyncSession)
-    mock_data_list = [MockModel()]
-    mock_session.merge.side_effect = Exception("Mock exception")
-
-    await async_upsert_data(session=mock_session, data_list=mock_data_list)
+    session_factory = await DATABASE_ENGINE.async_get_session_factory()
 
-    assert "No successful merges to commit, all 1 items failed" in caplog.text
+    async with session_factory() as session, session.begin():
+        result = await async_upsert_data(
+            session=session, model=MockModel, data=[{"isin": "A", "price": None}]
+        )
 
-    mock_session.rollback.assert_called_once()
-    mock_session.commit.assert_not_called()
+    assert result == UpsertResult(stored=0, failed=1)
+    assert "No successful upserts to commit, all 1 items failed" in caplog.text
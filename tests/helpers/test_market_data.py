@@ -2,22 +2,28 @@
 
 from __future__ import annotations
 
-from datetime import UTC, date, datetime
+from datetime import UTC, date, datetime, timedelta
+from functools import partial
 from pathlib import Path
 from typing import TYPE_CHECKING
 from unittest.mock import MagicMock, PropertyMock, patch
 
+import httpx
 import pandas as pd
 import pytest
 
 from pypmanager.database.market_data import AsyncMarketDataDB, MarketDataModel
 from pypmanager.helpers.market_data import (
     _class_importer,
+    async_download_market_data,
+    async_get_fetch_start_dates,
     async_get_last_market_data_df,
     async_get_market_data_overview,
     async_load_market_data_config,
 )
-from pypmanager.ingest.market_data.models import SourceData
+from pypmanager.ingest.market_data.const import LOAD_HISTORY_DAYS
+from pypmanager.ingest.market_data.fetcher import AsyncHttpFetcher
+from pypmanager.ingest.market_data.models import Source, SourceData
 from pypmanager.settings import Settings, TypedSettings
 
 if TYPE_CHECKING:
@@ -148,6 +154,22 @@ async def test_async_get_last_market_data_df(
     assert result.iloc[1].price == 150.25
 
 
+@pytest.mark.asyncio
+async def test_async_get_fetch_start_dates(
+    sample_market_data: list[MarketDataModel],
+) -> None:
+    """Test that data is loaded since the last stored date, with an overlap."""
+    assert await async_get_fetch_start_dates() == {}
+
+    async with AsyncMarketDataDB() as db:
+        await db.async_store_market_data(data=sample_market_data)
+
+    assert await async_get_fetch_start_dates() == {
+        "US0231351067": date(2022, 12, 25),
+        "US0378331005": date(2022, 12, 25),
+    }
+
+
 @pytest.fixture(name="mock_source_data")
 def _mock_source_data() -> list[SourceData]:
     """Mock source data."""
@@ -173,3 +195,88 @@ def _mock_dont_save_csv() -> Generator[MagicMock]:
     mock = MagicMock()
     with patch.object(pd.DataFrame, "to_csv", mock):
         yield mock
+
+
+@pytest.mark.asyncio
+async def test_async_download_market_data(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that sources are downloaded concurrently and stored."""
+    requested_urls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested_urls.append(str(request.url))
+        if request.url.params["id"] == "failing":
+            return httpx.Response(500)
+        if request.url.params["id"] == "malformed":
+            return httpx.Response(200, text="<html>Maintenance</html>")
+
+        return httpx.Response(
+            200,
+            json={
+                "TimeSeries": {
+                    "Security": [
+                        {
+                            "HistoryDetail": [
+                                {"EndDate": "2024-12-23", "Value": 10.0},
+                                {"EndDate": "2024-12-27", "Value": 11.0},
+                            ]
+                        }
+                    ]
+                }
+            },
+        )
+
+    sources = [
+        Source(
+            isin_code=isin_code,
+            loader_class="MorningstarLoader",
+            lookup_key=lookup_key,
+            name="test",
+        )
+        for isin_code, lookup_key in (
+            ("SE0000000001", "a"),
+            ("SE0000000002", "b"),
+            ("SE0000000003", "failing"),
+            ("SE0000000004", "malformed"),
+            # Listed twice, e.g. with a fallback loader
+            ("SE0000000001", "fallback"),
+        )
+    ]
+
+    with (
+        patch(
+            "pypmanager.helpers.market_data.async_load_market_data_config",
+            return_value=sources,
+        ),
+        patch(
+            "pypmanager.helpers.market_data.AsyncHttpFetcher",
+            partial(
+                AsyncHttpFetcher,
+                requests_per_second=1000,
+                transport=httpx.MockTransport(handler),
+            ),
+        ),
+    ):
+        metrics = await async_download_market_data()
+
+        # The failing and malformed sources don't stop the other sources
+        assert len(requested_urls) == 5
+        assert list(metrics.seconds_by_isin_code) == ["SE0000000001", "SE0000000002"]
+        assert metrics.total_seconds >= max(metrics.seconds_by_isin_code.values())
+        assert "Downloaded 3 of 5 sources" in caplog.text
+        assert "Unable to load SE0000000004" in caplog.text
+        assert "2 inserted, 0 updated, 0 unchanged" in caplog.text
+        start_date = datetime.now(UTC).date() - timedelta(days=LOAD_HISTORY_DAYS)
+        assert f"startDate={start_date}" in requested_urls[0]
+
+        # Only data since the last stored date is downloaded
+        requested_urls.clear()
+        await async_download_market_data()
+
+        assert "startDate=2024-12-20" in requested_urls[0]
+        assert "0 inserted, 0 updated, 2 unchanged" in caplog.text
+
+    async with AsyncMarketDataDB() as db:
+        assert await db.async_get_last_close_price_by_isin() == [
+            ("SE0000000001", "2024-12-27", 11.0),
+            ("SE0000000002", "2024-12-27", 11.0),
+        ]
@@ -2,12 +2,24 @@
 
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
 import pytest
 
+from pypmanager.database.security import AsyncDbSecurity
 from pypmanager.helpers import (
     async_security_map_isin_to_security,
 )
-from pypmanager.helpers.security import async_security_map_name_to_isin
+from pypmanager.helpers.security import (
+    SecurityNameIndex,
+    SecurityNameIndexCache,
+    async_security_map_name_to_isin,
+)
+
+if TYPE_CHECKING:
+    from pypmanager.database.security import SecurityModel
 
 
 @pytest.mark.asyncio
@@ -29,3 +41,45 @@ async def test_async_security_map_name_to_isin() -> None:
     result = await async_security_map_name_to_isin()
     assert len(result) == 1
     assert result.get("Länsförsäkringar Global Index") == "SE0005188836"
+
+
+def test_security_name_index__lookup() -> None:
+    """Test that names are normalized and looked up."""
+    index = SecurityNameIndex(
+        key=("db", 0), isin_by_name={"Länsförsäkringar Global Index": "SE0005188836"}
+    )
+    names = pd.Series(
+        ["L�nsförs�kringar Global Index", "Other", np.nan],
+        index=[5, 6, 7],
+    )
+
+    normalized_names, isin_codes = index.lookup(names)
+
+    assert normalized_names.tolist()[:2] == ["Länsförsäkringar Global Index", "Other"]
+    assert isin_codes.tolist()[0] == "SE0005188836"
+    assert isin_codes.iloc[1:].isna().all()
+    assert normalized_names.index.tolist() == [5, 6, 7]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("load_security_data")
+async def test_security_name_index_cache(sample_security: list[SecurityModel]) -> None:
+    """Test that the index is only rebuilt when the security table changes."""
+    cache = SecurityNameIndexCache()
+
+    index = await cache.async_get()
+    assert index.isin_by_name == {"Länsförsäkringar Global Index": "SE0005188836"}
+    assert await cache.async_get() is index
+    assert cache.builds == 1
+
+    # Storing the same data again doesn't change the table
+    async with AsyncDbSecurity() as db:
+        await db.async_store_data(data=await db.async_filter_all())
+    assert await cache.async_get() is index
+
+    async with AsyncDbSecurity() as db:
+        await db.async_store_data(data=sample_security)
+
+    index = await cache.async_get()
+    assert index.isin_by_name["Apple Inc."] == "US0378331005"
+    assert cache.builds == 2
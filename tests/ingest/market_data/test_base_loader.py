@@ -9,6 +9,7 @@ import pytest
 
 from pypmanager.const import HttpStatusCodes
 from pypmanager.ingest.market_data.base_loader import BaseMarketDataLoader
+from pypmanager.ingest.market_data.fetcher import AsyncHttpFetcher
 
 if TYPE_CHECKING:
     from pypmanager.ingest.market_data.models import SourceData
@@ -65,3 +66,16 @@ def test_query_endpoint(
 
         result = loader.query_endpoint()
         assert result == expected_result
+
+
+@pytest.mark.asyncio
+async def test_async_get_response__blocking() -> None:
+    """Test that get_response is run in a thread by loaders without async support."""
+    loader = MockMarketDataLoader(isin_code="test", lookup_key="test", load=False)
+
+    async with AsyncHttpFetcher() as fetcher:
+        with patch.object(MockMarketDataLoader, "get_response") as mock_get_response:
+            await loader.async_get_response(fetcher)
+
+    mock_get_response.assert_called_once()
+    assert list(fetcher.host_limits) == ["mockurl.com"]
@@ -0,0 +1,113 @@
+"""Tests for ingest.market_data.fetcher."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from time import monotonic
+
+import httpx
+import pytest
+
+from pypmanager.ingest.market_data.fetcher import AsyncHttpFetcher, TokenBucket
+from pypmanager.ingest.market_data.ft import FTLoader
+from pypmanager.ingest.market_data.morningstar import MorningstarLoader
+
+
+@pytest.mark.asyncio
+async def test_token_bucket() -> None:
+    """Test that a burst is allowed, and then the rate is limited."""
+    bucket = TokenBucket(rate=20, capacity=2)
+
+    started = monotonic()
+    for _ in range(2):
+        await bucket.async_acquire()
+    assert monotonic() - started < 0.05
+
+    for _ in range(2):
+        await bucket.async_acquire()
+    assert monotonic() - started >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_fetcher__concurrency_per_host() -> None:
+    """Test that the concurrent requests are capped per host."""
+    in_flight: dict[str, int] = {}
+    max_in_flight: dict[str, int] = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        in_flight[host] = in_flight.get(host, 0) + 1
+        max_in_flight[host] = max(max_in_flight.get(host, 0), in_flight[host])
+        await asyncio.sleep(0.01)
+        in_flight[host] -= 1
+        return httpx.Response(200, content=host.encode())
+
+    async with AsyncHttpFetcher(
+        max_concurrency_per_host=2,
+        requests_per_second=1000,
+        burst=1000,
+        transport=httpx.MockTransport(handler),
+    ) as fetcher:
+        result = await asyncio.gather(
+            *(
+                fetcher.async_request("GET", f"https://{host}/{idx}")
+                for host in ("a.test", "b.test")
+                for idx in range(5)
+            )
+        )
+
+    assert result == [b"a.test"] * 5 + [b"b.test"] * 5
+    assert max_in_flight == {"a.test": 2, "b.test": 2}
+
+
+@pytest.mark.asyncio
+async def test_fetcher__error_status() -> None:
+    """Test that error status codes are raised."""
+    transport = httpx.MockTransport(lambda _: httpx.Response(500))
+
+    async with AsyncHttpFetcher(transport=transport) as fetcher:
+        with pytest.raises(httpx.HTTPStatusError):
+            await fetcher.async_request("GET", "https://a.test")
+
+    with pytest.raises(RuntimeError, match="The fetcher is not open"):
+        await fetcher.async_request("GET", "https://a.test")
+
+
+@pytest.mark.asyncio
+async def test_loader__async_get_response() -> None:
+    """Test that loaders parse the response of an async request."""
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.host == "markets.ft.com":
+            return httpx.Response(200, json={"Dates": []})
+
+        return httpx.Response(
+            200,
+            json={
+                "TimeSeries": {
+                    "Security": [
+                        {"HistoryDetail": [{"EndDate": "2024-12-23", "Value": 1.5}]}
+                    ]
+                }
+            },
+        )
+
+    async with AsyncHttpFetcher(transport=httpx.MockTransport(handler)) as fetcher:
+        morningstar = MorningstarLoader(
+            isin_code="SE0005796331", lookup_key="abc", name="test", load=False
+        )
+        await morningstar.async_get_response(fetcher)
+
+        ft = FTLoader(isin_code="SE0005796331", lookup_key="abc", load=False)
+        await ft.async_get_response(fetcher)
+
+    assert morningstar.to_source_data()[0].price == 1.5
+    assert ft.raw_response == {"Dates": []}
+
+    assert requests[0].method == "GET"
+    assert requests[0].headers["User-Agent"].startswith("Mozilla")
+    assert requests[1].method == "POST"
+    assert json.loads(requests[1].content)["elements"][0]["Symbol"] == "abc"
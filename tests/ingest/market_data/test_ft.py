@@ -2,11 +2,12 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 import json
 from typing import TYPE_CHECKING
 from unittest import mock
 
+from freezegun import freeze_time
 import pytest
 
 from pypmanager.const import HttpStatusCodes
@@ -112,6 +113,21 @@ def test_ft_loader__headers() -> None:
     assert loader.extra_headers == {"Content-Type": "application/json"}
 
 
+@pytest.mark.usefixtures("mock_ft_data_response")
+def test_ft_loader__get_payload__start_date() -> None:
+    """Test that FTLoader loads the days since the start date."""
+    with freeze_time("2025-01-03"):
+        loader = FTLoader(
+            isin_code="SE0005796331",
+            lookup_key="535627197",
+            name="test",
+        )
+        assert loader.get_payload()["days"] == 180
+
+        loader.start_date = date(2024, 12, 27)
+        assert loader.get_payload()["days"] == 7
+
+
 @pytest.mark.usefixtures("mock_ft_data_response")
 def test_ft_loader__source() -> None:
     """Test FTLoader.source."""
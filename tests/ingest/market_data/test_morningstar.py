@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 import json
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -77,6 +77,19 @@ def test_morningstar_loader__full_url() -> None:
         )
 
 
+@pytest.mark.usefixtures("mock_morningstar_data_response")
+def test_morningstar_loader__full_url__start_date() -> None:
+    """Test MorningstarLoader.full_url when loading data since a date."""
+    with freeze_time("2025-01-03"):
+        loader = MorningstarLoader(
+            isin_code="SE0005796331",
+            lookup_key="535627197",
+            name="test",
+            start_date=date(2024, 12, 27),
+        )
+        assert "startDate=2024-12-27&endDate=2025-01-03" in loader.full_url
+
+
 @pytest.mark.usefixtures("mock_morningstar_data_response")
 def test_morningstar_loader__source() -> None:
     """Test MorningstarLoader.source."""
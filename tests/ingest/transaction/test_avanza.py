@@ -7,7 +7,11 @@ from unittest.mock import patch
 import pandas as pd
 import pytest
 
-from pypmanager.ingest.transaction.avanza import AvanzaLoader, _transaction_type
+from pypmanager.ingest.transaction.avanza import (
+    AvanzaLoader,
+    _coalesce_columns,
+    _transaction_type,
+)
 from pypmanager.ingest.transaction.const import (
     TransactionRegistryColNameValues,
     TransactionTypeValues,
@@ -27,6 +31,7 @@ async def test_avanza_loader() -> None:
         df_avanza = loader.df_final
         assert "Resultat" not in df_avanza.columns
         assert len(df_avanza) > 0
+        assert df_avanza[TransactionRegistryColNameValues.SOURCE_VOLUME].dtype == float
 
 
 @pytest.mark.parametrize(
@@ -67,4 +72,22 @@ async def test_avanza_loader() -> None:
 )
 def test_transaction_type(row: pd.Series, expected: str) -> None:
     """Test the _transaction_type function."""
-    assert _transaction_type(row) == expected
+    assert _transaction_type(pd.DataFrame([row])).tolist() == [expected]
+
+
+def test_coalesce_columns() -> None:
+    """Test that columns with the same name are merged without changing types."""
+    df = pd.DataFrame(
+        [[1.0, None, "a", float("nan")], [None, 2.5, "b", 3.0], [None, None, "c", 4.0]],
+        columns=["fee", "fee", "name", "fee"],
+        index=[3, 4, 5],
+    ).astype({"name": object})
+
+    df_coalesced = _coalesce_columns(df)
+
+    pd.testing.assert_frame_equal(
+        df_coalesced,
+        pd.DataFrame(
+            {"fee": [1.0, 2.5, 4.0], "name": ["a", "b", "c"]}, index=[3, 4, 5]
+        ),
+    )
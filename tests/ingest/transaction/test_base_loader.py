@@ -2,13 +2,23 @@
 
 from __future__ import annotations
 
+from contextlib import ExitStack
+import importlib
 import logging
 from pathlib import Path
+import threading
+from typing import TYPE_CHECKING
 from unittest.mock import patch
 
 import pandas as pd
 import pytest
 
+from pypmanager.ingest.transaction import (
+    AvanzaLoader,
+    GenericLoader,
+    LysaLoader,
+    ParetoSecuritiesLoader,
+)
 from pypmanager.ingest.transaction.base_loader import (
     EMPTY_DF,
     TransactionLoader,
@@ -17,6 +27,12 @@ from pypmanager.ingest.transaction.base_loader import (
 from pypmanager.ingest.transaction.const import (
     TransactionRegistryColNameValues,
 )
+from pypmanager.settings import Settings, TypedSettings
+
+from tests.conftest import write_compressed
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
 
 
 class MockLoader(TransactionLoader):
@@ -48,6 +64,7 @@ class MockLoader(TransactionLoader):
         (Path("/path/to/file-abc.csv"), "Abc"),
         (Path("/path/to/file.csv"), "File"),
         (Path("/path/to/another-file-456.csv"), "Another"),
+        (Path("/path/to/file-abc.csv.gz"), "Abc"),
     ],
 )
 def test_get_filename(file_path: Path, expected: str) -> None:
@@ -165,3 +182,107 @@ def test_validate(
         loader.df_final = pd.DataFrame({"A": [1, 2]})
         loader.validate()
         assert "ISIN column is missing in abc123" in caplog.text
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+@pytest.mark.parametrize(
+    "klass", [AvanzaLoader, GenericLoader, LysaLoader, ParetoSecuritiesLoader]
+)
+@patch.object(
+    TypedSettings,
+    "dir_transaction_data_local",
+    "tests/fixtures/transactions",
+)
+async def test_loader__chunked(klass: type[TransactionLoader], chunk_size: int) -> None:
+    """Test that reading files in chunks returns the same data."""
+    async with klass() as loader:
+        df_expected = loader.df_final
+
+    with patch.object(Settings, "ingest_chunk_size", new=chunk_size):
+        async with klass() as loader:
+            df_chunked = loader.df_final
+
+    pd.testing.assert_frame_equal(df_chunked, df_expected)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [None, 2])
+@pytest.mark.parametrize("suffix", [".gz", ".xz", ".zst"])
+@pytest.mark.parametrize(
+    "klass", [AvanzaLoader, GenericLoader, LysaLoader, ParetoSecuritiesLoader]
+)
+async def test_loader__compressed(
+    klass: type[TransactionLoader], suffix: str, chunk_size: int | None, tmp_path: Path
+) -> None:
+    """Test that compressed files return the same data as plain files."""
+    with patch.object(
+        TypedSettings, "dir_transaction_data_local", "tests/fixtures/transactions"
+    ):
+        async with klass() as loader:
+            df_expected = loader.df_final
+
+    for file_path in Path("tests/fixtures/transactions").glob("*.csv"):
+        write_compressed(file_path.read_bytes(), tmp_path / f"{file_path.name}{suffix}")
+
+    with (
+        patch.object(TypedSettings, "dir_transaction_data_local", str(tmp_path)),
+        patch.object(Settings, "ingest_chunk_size", new=chunk_size),
+    ):
+        async with klass() as loader:
+            df_compressed = loader.df_final
+
+    assert len(df_compressed) > 0
+    pd.testing.assert_frame_equal(df_compressed, df_expected)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [None, 2])
+@pytest.mark.parametrize(
+    ("klass", "module"),
+    [
+        (AvanzaLoader, "pypmanager.ingest.transaction.avanza"),
+        (LysaLoader, "pypmanager.ingest.transaction.lysa"),
+    ],
+)
+@patch.object(
+    TypedSettings,
+    "dir_transaction_data_local",
+    "tests/fixtures/transactions",
+)
+async def test_loader__outside_event_loop(
+    klass: type[TransactionLoader], module: str, chunk_size: int | None
+) -> None:
+    """Test that renaming, pre-processing and filtering run outside the loop."""
+    threads: dict[str, set[threading.Thread]] = {}
+
+    def record_thread[**P](
+        name: str, func: Callable[P, pd.DataFrame]
+    ) -> Callable[P, pd.DataFrame]:
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> pd.DataFrame:
+            threads.setdefault(name, set()).add(threading.current_thread())
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    base_loader = "pypmanager.ingest.transaction.base_loader"
+    patches = [
+        (base_loader, "_rename_and_drop_columns"),
+        (base_loader, "_filter_transaction_type"),
+        (base_loader, "_normalize_transaction_date"),
+        (module, "_pre_process_df"),
+    ]
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(Settings, "ingest_chunk_size", chunk_size))
+        for module_name, name in patches:
+            func = getattr(importlib.import_module(module_name), name)
+            stack.enter_context(
+                patch(f"{module_name}.{name}", record_thread(name, func))
+            )
+
+        async with klass() as loader:
+            assert len(loader.df_final) > 0
+
+    assert set(threads) == {name for _, name in patches}
+    for name_threads in threads.values():
+        assert threading.main_thread() not in name_threads
@@ -0,0 +1,171 @@
+"""Tests for the parsed CSV cache."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+from pathlib import Path
+from threading import Barrier
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from pypmanager.ingest.transaction import (
+    AvanzaLoader,
+    GenericLoader,
+    LysaLoader,
+    ParetoSecuritiesLoader,
+)
+from pypmanager.ingest.transaction.base_loader import TransactionLoader
+from pypmanager.ingest.transaction.csv_cache import (
+    evict_stale_entries,
+    read_csv_cached,
+)
+from pypmanager.settings import Settings, TypedSettings
+
+
+def _parse(file_path: Path) -> pd.DataFrame:
+    """Parse a CSV-file."""
+    return pd.read_csv(file_path, sep=";")
+
+
+def test_read_csv_cached(tmp_path: Path) -> None:
+    """Test that a file is only parsed again when it changes."""
+    file_path = tmp_path / "transactions.csv"
+    file_path.write_text("name;value;comment\nA;1,5;x\nB;2;\n")
+    parse = MagicMock(side_effect=_parse)
+
+    df_first = read_csv_cached(
+        file_path, cache_name="test", parser_key="a", parse=parse
+    )
+    df_cached = read_csv_cached(
+        file_path, cache_name="test", parser_key="a", parse=parse
+    )
+
+    assert parse.call_count == 1
+    pd.testing.assert_frame_equal(df_first, df_cached)
+    # Missing values are restored as NaN, as when parsing the file
+    assert df_cached["comment"].tolist()[0] == "x"
+    assert isinstance(df_cached["comment"].tolist()[1], float)
+
+    # Touching the file does not parse it again
+    stat = file_path.stat()
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    read_csv_cached(file_path, cache_name="test", parser_key="a", parse=parse)
+    assert parse.call_count == 1
+
+    # Another parser
+    read_csv_cached(file_path, cache_name="test", parser_key="b", parse=parse)
+    assert parse.call_count == 2
+
+    # Changed content
+    file_path.write_text("name;value;comment\nA;1,5;x\nC;3;\n")
+    df_changed = read_csv_cached(
+        file_path, cache_name="test", parser_key="b", parse=parse
+    )
+    assert parse.call_count == 3
+    assert df_changed["name"].tolist() == ["A", "C"]
+
+
+def test_read_csv_cached__missing_file(tmp_path: Path) -> None:
+    """Test that a missing file is passed to the parser."""
+    parse = MagicMock(return_value=pd.DataFrame())
+
+    read_csv_cached(
+        tmp_path / "missing.csv", cache_name="test", parser_key="a", parse=parse
+    )
+
+    assert parse.call_count == 1
+
+
+def test_read_csv_cached__concurrent_cold_cache(tmp_path: Path) -> None:
+    """Test that threads parsing the same file at the same time share the cache."""
+    file_path = tmp_path / "transactions.csv"
+    file_path.write_text("name;value;comment\nA;1,5;x\nB;2;\n")
+    no_threads = 8
+    barrier = Barrier(no_threads)
+
+    def parse(file_path: Path) -> pd.DataFrame:
+        # All threads write the cache file at the same time
+        barrier.wait(timeout=10)
+        return _parse(file_path)
+
+    with ThreadPoolExecutor(max_workers=no_threads) as executor:
+        results = list(
+            executor.map(
+                lambda _: read_csv_cached(
+                    file_path, cache_name="test", parser_key="a", parse=parse
+                ),
+                range(no_threads),
+            )
+        )
+
+    for df_result in results:
+        pd.testing.assert_frame_equal(df_result, results[0])
+
+    cache_dir = Settings.dir_cache_local / "csv" / "test"
+    assert [path.suffix for path in cache_dir.iterdir()] == [".arrow"]
+    pd.testing.assert_frame_equal(
+        read_csv_cached(
+            file_path,
+            cache_name="test",
+            parser_key="a",
+            parse=MagicMock(side_effect=AssertionError),
+        ),
+        results[0],
+    )
+
+
+def test_read_csv_cached__write_error(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test that a failed cache write is logged and the parsed file returned."""
+    file_path = tmp_path / "transactions.csv"
+    file_path.write_text("name;value\nA;1\n")
+
+    with patch.object(Path, "replace", side_effect=OSError("Disk full")):
+        df_parsed = read_csv_cached(
+            file_path, cache_name="test", parser_key="a", parse=_parse
+        )
+
+    assert df_parsed["name"].tolist() == ["A"]
+    assert "Disk full" in caplog.text
+    cache_dir = Settings.dir_cache_local / "csv" / "test"
+    assert list(cache_dir.iterdir()) == []
+
+
+def test_evict_stale_entries(tmp_path: Path) -> None:
+    """Test that cached versions of removed files are deleted."""
+    file_paths = [tmp_path / "a.csv", tmp_path / "b.csv"]
+    for file_path in file_paths:
+        file_path.write_text("name;value\nA;1\n")
+        read_csv_cached(file_path, cache_name="test", parser_key="a", parse=_parse)
+
+    cache_dir = Settings.dir_cache_local / "csv" / "test"
+    assert len(list(cache_dir.glob("*.arrow"))) == 2
+
+    evict_stale_entries(cache_name="test", file_paths=file_paths[:1])
+
+    assert len(list(cache_dir.glob("*.arrow"))) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "klass", [AvanzaLoader, GenericLoader, LysaLoader, ParetoSecuritiesLoader]
+)
+@patch.object(
+    TypedSettings,
+    "dir_transaction_data_local",
+    "tests/fixtures/transactions",
+)
+async def test_loader__cached(klass: type[TransactionLoader]) -> None:
+    """Test that loaders return the same data from the cache."""
+    async with klass() as loader:
+        df_parsed = loader.df_final
+
+    with patch.object(TransactionLoader, "parse_data_file", side_effect=AssertionError):
+        async with klass() as loader:
+            df_cached = loader.df_final
+
+    pd.testing.assert_frame_equal(df_parsed, df_cached)
@@ -0,0 +1,108 @@
+"""Tests for parsing transaction files using a schema."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from pypmanager.ingest.transaction.csv_reader import (
+    SourceSchema,
+    iter_csv_chunks,
+    read_csv_with_schema,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+SCHEMA = SourceSchema(
+    number_columns=("volume", "amount"),
+    decimal_point=",",
+    thousands_separator=" ",
+)
+
+
+def test_read_csv_with_schema(tmp_path: Path) -> None:
+    """Test that text is stripped and number columns are converted."""
+    file_path = tmp_path / "transactions.csv"
+    file_path.write_text(
+        "name;volume;amount;comment;empty\n A ;1,5;-1 000,25;x;\nB;-;;;\n"
+    )
+
+    df = read_csv_with_schema(file_path, separator=";", schema=SCHEMA)
+
+    pd.testing.assert_frame_equal(
+        df,
+        pd.DataFrame(
+            {
+                "name": ["A", "B"],
+                "volume": [1.5, 0.0],
+                "amount": [-1000.25, np.nan],
+                "comment": np.array(["x", np.nan], dtype=object),
+                "empty": [np.nan, np.nan],
+            }
+        ),
+    )
+
+
+def test_read_csv_with_schema__missing_fields(tmp_path: Path) -> None:
+    """Test that rows with missing fields are parsed."""
+    file_path = tmp_path / "transactions.csv"
+    file_path.write_text("name;volume;amount;comment\nA;1,5;2\n B ;-;3;x\n")
+
+    df = read_csv_with_schema(file_path, separator=";", schema=SCHEMA)
+
+    assert df["name"].tolist() == ["A", "B"]
+    assert df["volume"].tolist() == [1.5, 0.0]
+    assert df["amount"].tolist() == [2.0, 3.0]
+    assert df["comment"].tolist()[1] == "x"
+
+
+def test_read_csv_with_schema__invalid_number(tmp_path: Path) -> None:
+    """Test that a column with text is left as is."""
+    file_path = tmp_path / "transactions.csv"
+    file_path.write_text("name;volume;amount\nA;1,5;abc\n")
+
+    df = read_csv_with_schema(file_path, separator=";", schema=SCHEMA)
+
+    assert df["volume"].tolist() == [1.5]
+    assert df["amount"].tolist() == ["abc"]
+
+
+def test_iter_csv_chunks(tmp_path: Path) -> None:
+    """Test that a file is parsed in chunks."""
+    file_path = tmp_path / "transactions.csv"
+    file_path.write_text("name;volume;amount\nA;1,5;2\nB;-;3\n C ;2;1 000\n")
+
+    chunks = list(
+        iter_csv_chunks(file_path, separator=";", schema=SCHEMA, chunk_size=2)
+    )
+
+    assert [len(df_chunk) for df_chunk in chunks] == [2, 1]
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks), read_csv_with_schema(file_path, separator=";", schema=SCHEMA)
+    )
+
+
+def test_iter_csv_chunks__types_differ_between_chunks(tmp_path: Path) -> None:
+    """Test that chunks are parsed as the whole file, whatever the rows hold."""
+    file_path = tmp_path / "transactions.csv"
+    file_path.write_text(
+        "name;volume;amount;account;comment\n"
+        "A;1;2;1234;\n"
+        "B;2;3;0012;\n"
+        "C;3,5;;ISK;x\n"
+        "D;-;1 000;;y\n"
+    )
+
+    df_whole = read_csv_with_schema(file_path, separator=";", schema=SCHEMA)
+    chunks = list(
+        iter_csv_chunks(file_path, separator=";", schema=SCHEMA, chunk_size=2)
+    )
+
+    # The account looks like a number and the comment is empty in the first chunk
+    pd.testing.assert_frame_equal(pd.concat(chunks), df_whole)
+    assert df_whole["account"].tolist()[:3] == ["1234", "0012", "ISK"]
+    assert df_whole["comment"].tolist()[2:] == ["x", "y"]
+    assert df_whole["amount"].dtype == np.float64
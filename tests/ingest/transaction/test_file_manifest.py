@@ -0,0 +1,117 @@
+"""Tests for the transaction file manifest."""
+
+from __future__ import annotations
+
+import os
+import shutil
+from typing import TYPE_CHECKING
+from unittest.mock import PropertyMock, patch
+
+import pytest
+
+from pypmanager.ingest.transaction import (
+    AvanzaLoader,
+    GenericLoader,
+    LysaLoader,
+    ParetoSecuritiesLoader,
+)
+from pypmanager.ingest.transaction.file_manifest import TransactionFileManifest
+from pypmanager.settings import TypedSettings
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+
+AVANZA_HEADER = "Datum;Konto;Typ av transaktion;Värdepapper/beskrivning;Antal\n"
+LYSA_HEADER = "Date,Type,Amount,Counterpart/Fund,Volume,Price\n"
+
+
+@pytest.fixture(name="transaction_dir")
+def transaction_dir_fixture(tmp_path: Path) -> Generator[Path]:
+    """Mock the transaction data folder."""
+    transaction_dir = tmp_path / "transactions"
+    transaction_dir.mkdir()
+
+    with patch.object(
+        TypedSettings, "dir_transaction_data_local", new_callable=PropertyMock
+    ) as mock:
+        mock.return_value = transaction_dir
+        yield transaction_dir
+
+
+@pytest.fixture(name="manifest")
+def manifest_fixture() -> TransactionFileManifest:
+    """Return a manifest with all loaders."""
+    manifest = TransactionFileManifest()
+    for loader in (AvanzaLoader, GenericLoader, LysaLoader, ParetoSecuritiesLoader):
+        manifest.register(loader)
+
+    return manifest
+
+
+def _age_directory(directory: Path) -> None:
+    """Set the modification time of a folder to the past."""
+    mtime_ns = directory.stat().st_mtime_ns - 10_000_000_000
+    os.utime(directory, ns=(mtime_ns, mtime_ns))
+
+
+def test_manifest__dispatch(
+    transaction_dir: Path,
+    manifest: TransactionFileManifest,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that files are dispatched by their header, then by their name."""
+    (transaction_dir / "export-2024.csv").write_text(AVANZA_HEADER)
+    (transaction_dir / "lysa-2024.csv").write_text(AVANZA_HEADER)
+    (transaction_dir / "lysa.csv").write_text(LYSA_HEADER)
+    (transaction_dir / "avanza-old.csv").write_text("a;b\n")
+    (transaction_dir / "notes.txt").write_text("notes\n")
+    (transaction_dir / ".hidden").write_text("\n")
+
+    assert [path.name for path in manifest.get_files(AvanzaLoader)] == [
+        "avanza-old.csv",
+        "export-2024.csv",
+        "lysa-2024.csv",
+    ]
+    assert [path.name for path in manifest.get_files(LysaLoader)] == ["lysa.csv"]
+    assert manifest.get_files(GenericLoader) == []
+    assert len(manifest.get_all_files()) == 4
+    assert "No loader found for notes.txt" in caplog.text
+    assert ".hidden" not in caplog.text
+
+
+def test_manifest__rescan(
+    transaction_dir: Path, manifest: TransactionFileManifest
+) -> None:
+    """Test that the folder is only listed again when it changes."""
+    file_path = transaction_dir / "export.csv"
+    file_path.write_text(AVANZA_HEADER)
+    _age_directory(transaction_dir)
+
+    assert manifest.get_files(AvanzaLoader) == [file_path]
+    assert manifest.get_files(LysaLoader) == []
+    assert manifest.scans == 1
+
+    # A file overwritten in place is dispatched again, without listing the folder
+    file_path.write_text(LYSA_HEADER)
+
+    assert manifest.get_files(AvanzaLoader) == []
+    assert manifest.get_files(LysaLoader) == [file_path]
+    assert manifest.scans == 1
+
+    # A new file
+    (transaction_dir / "other.csv").write_text("a;b\n")
+
+    assert len(manifest.get_all_files()) == 2
+    assert manifest.scans == 2
+
+
+@pytest.mark.asyncio
+async def test_loader__misnamed_file(transaction_dir: Path) -> None:
+    """Test that a file is loaded by the loader matching its header."""
+    shutil.copy(
+        "tests/fixtures/transactions/avanza.csv", transaction_dir / "export.csv"
+    )
+
+    async with AvanzaLoader() as loader:
+        assert len(loader.df_final) > 0
@@ -18,13 +18,21 @@ from pypmanager.ingest.transaction import (
 from pypmanager.ingest.transaction.pandas_algorithm import (
     PandasAlgorithm,
     PandasAlgorithmPnL,
+    _is_none,
 )
 from pypmanager.settings import Settings
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from tests.conftest import DataFactory
 
 
+def _row_to_df(row_data: pd.Series, *columns: str) -> pd.DataFrame:
+    """Return a data frame of one row, with columns not in the row set to NaN."""
+    return pd.DataFrame([row_data]).reindex(columns=row_data.index.union(columns))
+
+
 @pytest.mark.parametrize(
     ("trans_type", "no_traded", "expected"),
     [
@@ -38,7 +46,7 @@ def test__normalize_no_traded(trans_type: str, no_traded: int, expected: int) ->
     test_data = pd.DataFrame(
         {"source_transaction_type": [trans_type], "source_volume": [no_traded]},
     )
-    result = PandasAlgorithm.normalize_no_traded(test_data.iloc[0])
+    result = PandasAlgorithm.normalize_no_traded(test_data).iloc[0]
 
     assert result == expected
 
@@ -62,7 +70,7 @@ def test__normalize_no_traded(trans_type: str, no_traded: int, expected: int) ->
 )
 def test__normalize_fx(input_data: pd.DataFrame, expected: float) -> None:
     """Test function _normalize_fx."""
-    result = PandasAlgorithm.normalize_fx(input_data.iloc[0])
+    result = PandasAlgorithm.normalize_fx(input_data).iloc[0]
     assert result == expected
 
 
@@ -117,7 +125,12 @@ def test__normalize_fx(input_data: pd.DataFrame, expected: float) -> None:
 )
 def test_normalize_amount(row: pd.Series, expected: int) -> None:
     """Test function _normalize_amount."""
-    assert PandasAlgorithm.normalize_amount(row) == expected
+    df_row = _row_to_df(
+        row,
+        TransactionRegistryColNameValues.SOURCE_VOLUME.value,
+        TransactionRegistryColNameValues.SOURCE_PRICE.value,
+    )
+    assert PandasAlgorithm.normalize_amount(df_row).iloc[0] == expected
 
 
 @pytest.mark.parametrize(
@@ -131,14 +144,16 @@ def test_normalize_amount(row: pd.Series, expected: int) -> None:
 )
 def test_cleanup_number(number: str | None, expected_result: float | None) -> None:
     """Test function _cleanup_number."""
-    result = PandasAlgorithm.cleanup_number(number)
-    assert result == expected_result
+    result = PandasAlgorithm.cleanup_number(pd.Series([number], dtype=object))
+    assert result.iloc[0] == expected_result
 
 
 def test_cleanup_number__raise_value_error() -> None:
     """Test function _cleanup_number for invalid number."""
-    with pytest.raises(ValueError, match="Unable to parse abc"):
-        PandasAlgorithm.cleanup_number("abc")
+    with pytest.raises(ValueError, match="Unable to parse abc in column amount"):
+        PandasAlgorithm.cleanup_number(
+            pd.Series(["1,0", "abc"], name=ColumnNameValues.AMOUNT.value)
+        )
 
 
 @pytest.mark.parametrize(
@@ -187,7 +202,7 @@ def test_calculate_cash_flow_net_fee_nominal(
     expected: float,
 ) -> None:
     """Test function calculate_cash_flow_net_fee_nominal."""
-    result = PandasAlgorithm.calculate_cash_flow_net_fee_nominal(row.iloc[0])
+    result = PandasAlgorithm.calculate_cash_flow_net_fee_nominal(row).iloc[0]
     assert result == expected
 
 
@@ -223,14 +238,14 @@ def test_calculate_cash_flow_gross_fee_nominal(
     expected: float,
 ) -> None:
     """Test function calculate_cash_flow_gross_fee_nominal."""
-    result = PandasAlgorithm.calculate_cash_flow_gross_fee_nominal(row.iloc[0])
+    result = PandasAlgorithm.calculate_cash_flow_gross_fee_nominal(row).iloc[0]
     assert result == expected
 
 
-def test_calculate_adjusted_price_per_unit(
+def test_calculate_average_cost__transactions(
     data_factory: type[DataFactory],
 ) -> None:
-    """Test function calculate_adjusted_price_per_unit."""
+    """Test function calculate_average_cost with transactions of one security."""
     factory = data_factory()
     df_mocked_transactions = (
         # We hold 100 after this transaction
@@ -308,17 +323,22 @@ def test_calculate_adjusted_price_per_unit(
         TransactionRegistryColNameValues.SOURCE_NAME_SECURITY.value
     )[TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value].cumsum()
 
-    df_mocked_transactions = df_mocked_transactions.groupby(
-        TransactionRegistryColNameValues.SOURCE_NAME_SECURITY.value
-    ).apply(PandasAlgorithm.calculate_adjusted_price_per_unit, include_groups=False)
-
-    assert len(df_mocked_transactions) == 7
-    expected_values = [10.0, 10.0, 10.0, 10.0, 1.0, 2.0, 0.0]
-    actual_values = df_mocked_transactions[
-        TransactionRegistryColNameValues.PRICE_PER_UNIT.value
-    ].to_numpy()
+    result = PandasAlgorithm.calculate_average_cost(
+        group_codes=np.zeros(len(df_mocked_transactions), dtype=np.intp),
+        direction=PandasAlgorithm.transaction_direction(
+            df_mocked_transactions[
+                TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value
+            ]
+        ),
+        quantity_held=df_mocked_transactions[
+            TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value
+        ].to_numpy(dtype=np.float64),
+        amounts=df_mocked_transactions[ColumnNameValues.AMOUNT.value].to_numpy(
+            dtype=np.float64
+        ),
+    )
 
-    assert_array_equal(actual_values, expected_values)
+    assert_array_equal(result.price_per_unit, [10.0, 10.0, 10.0, 10.0, 1.0, 2.0, 0.0])
 
 
 @pytest.mark.parametrize(
@@ -380,7 +400,7 @@ def test_calculate_adjusted_price_per_unit(
 )
 def test_calculate_pnl_trade(row_data: pd.DataFrame, expected: float | None) -> None:
     """Test function calculate_pnl_trade."""
-    result = PandasAlgorithmPnL.calculate_pnl_trade(row_data)
+    result = PandasAlgorithmPnL.calculate_pnl_trade(pd.DataFrame([row_data])).iloc[0]
     assert result == expected
 
 
@@ -426,7 +446,7 @@ def test_calculate_pnl_trade(row_data: pd.DataFrame, expected: float | None) ->
 )
 def test_calculate_pnl_dividend(row_data: pd.DataFrame, expected: float | None) -> None:
     """Test function calculate_pnl_dividend."""
-    result = PandasAlgorithmPnL.calculate_pnl_dividend(row_data)
+    result = PandasAlgorithmPnL.calculate_pnl_dividend(pd.DataFrame([row_data])).iloc[0]
     assert result == expected
 
 
@@ -477,7 +497,7 @@ def test_calculate_pnl_dividend(row_data: pd.DataFrame, expected: float | None)
 )
 def test_calculate_pnl_total(row_data: pd.DataFrame, expected: float | None) -> None:
     """Test function calculate_pnl_dividend."""
-    result = PandasAlgorithmPnL.calculate_pnl_total(row_data)
+    result = PandasAlgorithmPnL.calculate_pnl_total(pd.DataFrame([row_data])).iloc[0]
     assert result == expected
 
 
@@ -556,7 +576,12 @@ def test_calculate_pnl_total(row_data: pd.DataFrame, expected: float | None) ->
 )
 def test_cleanup_price_per_unit(row_data: pd.DataFrame, expected: float | None) -> None:
     """Test function cleanup_price_per_unit."""
-    result = PandasAlgorithm.cleanup_price_per_unit(row_data)
+    df_row = _row_to_df(
+        row_data,
+        TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value,
+        TransactionRegistryColNameValues.PRICE_PER_UNIT.value,
+    )
+    result = PandasAlgorithm.cleanup_price_per_unit(df_row).iloc[0]
     assert result == expected
 
 
@@ -606,7 +631,10 @@ def test_cleanup_price_per_unit(row_data: pd.DataFrame, expected: float | None)
 )
 def test_cleanup_quantity_held(row_data: pd.DataFrame, expected: float | None) -> None:
     """Test function cleanup_quantity_held."""
-    result = PandasAlgorithm.cleanup_quantity_held(row_data)
+    df_row = _row_to_df(
+        row_data, TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value
+    )
+    result = PandasAlgorithm.cleanup_quantity_held(df_row).iloc[0]
     assert result == expected
 
 
@@ -680,5 +708,254 @@ def test_turnover_or_other_cash_flow(
     row_data: pd.DataFrame, expected: float | None
 ) -> None:
     """Test function turnover_or_other_cash_flow."""
-    result = PandasAlgorithm.turnover_or_other_cash_flow(row_data)
+    df_row = _row_to_df(
+        row_data,
+        TransactionRegistryColNameValues.SOURCE_OTHER_CASH_FLOW.value,
+        TransactionRegistryColNameValues.SOURCE_VOLUME.value,
+        TransactionRegistryColNameValues.SOURCE_PRICE.value,
+    )
+    result = PandasAlgorithm.turnover_or_other_cash_flow(df_row).iloc[0]
     assert result == expected
+
+
+def test_calculate_average_cost() -> None:
+    """Test function calculate_average_cost over several groups."""
+    direction = PandasAlgorithm.transaction_direction(
+        pd.Series(
+            [
+                # Group 0
+                TransactionTypeValues.BUY.value,
+                TransactionTypeValues.BUY.value,
+                TransactionTypeValues.DIVIDEND.value,
+                TransactionTypeValues.SELL.value,
+                TransactionTypeValues.SELL.value,
+                TransactionTypeValues.BUY.value,
+                # Group 1
+                TransactionTypeValues.SELL.value,
+                TransactionTypeValues.BUY.value,
+            ]
+        )
+    )
+    group_codes = np.array([0, 0, 0, 0, 0, 0, 1, 1])
+    volumes = np.array([10.0, 10.0, 20.0, 10.0, 10.0, 10.0, 5.0, 10.0])
+    prices = np.array([10.0, 20.0, 1.0, 15.0, 1.0, 10.0, 1.0, 4.0])
+
+    quantity_held = PandasAlgorithm.calculate_quantity_held(
+        group_codes=group_codes,
+        direction=direction,
+        volumes=volumes,
+    )
+    assert_array_equal(quantity_held, [10.0, 20.0, 20.0, 10.0, 0.0, 10.0, -5.0, 5.0])
+
+    result = PandasAlgorithm.calculate_average_cost(
+        group_codes=group_codes,
+        direction=direction,
+        quantity_held=quantity_held,
+        amounts=volumes * prices,
+    )
+
+    assert_array_equal(
+        result.price_per_unit,
+        [10.0, 15.0, 0.0, 15.0, 15.0, 10.0, np.nan, 7.0],
+    )
+    assert_array_equal(
+        result.quantity_held,
+        [10.0, 20.0, 20.0, 10.0, np.nan, 10.0, -5.0, 5.0],
+    )
+    assert result.is_reset.tolist()[:2] == [False, False]
+    assert np.isnan(result.is_reset[2])
+    assert result.is_reset.tolist()[3:] == [False, True, False, False, False]
+
+
+@pytest.mark.parametrize(
+    ("column_callable", "expected"),
+    [
+        (
+            PandasAlgorithm.turnover_or_other_cash_flow,
+            [-100.0, 60.0, 40.0, np.nan, np.nan],
+        ),
+        (
+            PandasAlgorithm.calculate_cash_flow_net_fee_nominal,
+            [-101.0, np.nan, 38.0, np.nan, np.nan],
+        ),
+        (
+            PandasAlgorithm.calculate_cash_flow_gross_fee_nominal,
+            [-100.0, 60.0, 40.0, np.nan, np.nan],
+        ),
+        (
+            PandasAlgorithm.cleanup_price_per_unit,
+            [10.0, 10.0, np.nan, np.nan, np.nan],
+        ),
+        (
+            PandasAlgorithm.cleanup_quantity_held,
+            [10.0, 5.0, np.nan, np.nan, 0.0],
+        ),
+        (
+            PandasAlgorithmPnL.calculate_pnl_trade,
+            [np.nan, 10.0, -12.0, np.nan, np.nan],
+        ),
+        (
+            PandasAlgorithmPnL.calculate_pnl_dividend,
+            [np.nan, np.nan, np.nan, 7.5, np.nan],
+        ),
+        (
+            PandasAlgorithmPnL.calculate_pnl_total,
+            [0.0, 10.0, -12.0, 7.5, 0.0],
+        ),
+    ],
+)
+def test_column_callables(
+    column_callable: Callable[[pd.DataFrame], pd.Series],
+    expected: list[float],
+) -> None:
+    """Test the calculated columns of transactions of different types."""
+    df_transactions = pd.DataFrame(
+        {
+            TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value: [
+                TransactionTypeValues.BUY.value,
+                TransactionTypeValues.SELL.value,
+                TransactionTypeValues.SELL.value,
+                TransactionTypeValues.DIVIDEND.value,
+                TransactionTypeValues.FEE.value,
+            ],
+            TransactionRegistryColNameValues.SOURCE_VOLUME.value: [
+                10.0,
+                5.0,
+                5.0,
+                5.0,
+                np.nan,
+            ],
+            TransactionRegistryColNameValues.SOURCE_PRICE.value: [
+                10.0,
+                12.0,
+                8.0,
+                1.5,
+                np.nan,
+            ],
+            TransactionRegistryColNameValues.SOURCE_FEE.value: [
+                -1.0,
+                np.nan,
+                -2.0,
+                np.nan,
+                -10.0,
+            ],
+            TransactionRegistryColNameValues.ADJUSTED_QUANTITY_HELD.value: [
+                10.0,
+                5.0,
+                np.nan,
+                np.nan,
+                0.0,
+            ],
+            TransactionRegistryColNameValues.PRICE_PER_UNIT.value: [
+                10.0,
+                10.0,
+                10.0,
+                0.0,
+                0.0,
+            ],
+        }
+    )
+    df_transactions[TransactionRegistryColNameValues.CALC_TURNOVER_OR_OTHER_CF] = (
+        PandasAlgorithm.turnover_or_other_cash_flow(df_transactions)
+    )
+    df_transactions[TransactionRegistryColNameValues.CALC_PNL_DIVIDEND] = (
+        PandasAlgorithmPnL.calculate_pnl_dividend(df_transactions)
+    )
+    df_transactions[TransactionRegistryColNameValues.CALC_PNL_TRADE] = (
+        PandasAlgorithmPnL.calculate_pnl_trade(df_transactions)
+    )
+
+    pd.testing.assert_series_equal(
+        column_callable(df_transactions), pd.Series(expected)
+    )
+
+
+def test_column_callables__all_none() -> None:
+    """Test that None is returned when no row has a value."""
+    df_transactions = pd.DataFrame(
+        {
+            TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value: [
+                TransactionTypeValues.BUY.value,
+            ],
+            TransactionRegistryColNameValues.SOURCE_VOLUME.value: [10.0],
+            TransactionRegistryColNameValues.SOURCE_PRICE.value: [10.0],
+        }
+    )
+
+    result = PandasAlgorithmPnL.calculate_pnl_dividend(df_transactions)
+
+    assert result.tolist() == [None]
+
+
+def test_cleanup_number__column() -> None:
+    """Test function cleanup_number with a column of different values."""
+    result = PandasAlgorithm.cleanup_number(
+        pd.Series([None, "-", "500 000 000.0", "500,0", "nan", 1.5], dtype=object)
+    )
+
+    assert_array_equal(
+        result.to_numpy(), [np.nan, 0.0, 500000000.0, 500.0, np.nan, 1.5]
+    )
+
+
+@pytest.mark.parametrize(
+    ("normalize_callable", "expected"),
+    [
+        (PandasAlgorithm.normalize_no_traded, [10.0, 5.0, np.nan, np.nan, 1.0]),
+        (PandasAlgorithm.normalize_amount, [-100.0, 60.0, -10.0, 5.0, -100.0]),
+        (PandasAlgorithm.normalize_fx, [1.5, 1.0, 1.0, 1.0, 2.0]),
+    ],
+)
+def test_normalize__transaction_types(
+    normalize_callable: Callable[[pd.DataFrame], pd.Series],
+    expected: list[float],
+) -> None:
+    """Test normalisation of transactions of different types."""
+    df_transactions = pd.DataFrame(
+        {
+            TransactionRegistryColNameValues.SOURCE_TRANSACTION_TYPE.value: [
+                TransactionTypeValues.BUY.value,
+                TransactionTypeValues.SELL.value,
+                TransactionTypeValues.FEE.value,
+                TransactionTypeValues.CASHBACK.value,
+                TransactionTypeValues.TAX.value,
+            ],
+            TransactionRegistryColNameValues.SOURCE_VOLUME.value: [
+                10.0,
+                -5.0,
+                np.nan,
+                np.nan,
+                1.0,
+            ],
+            TransactionRegistryColNameValues.SOURCE_PRICE.value: [
+                10.0,
+                12.0,
+                np.nan,
+                np.nan,
+                100.0,
+            ],
+            ColumnNameValues.AMOUNT.value: [np.nan, np.nan, 10.0, 5.0, np.nan],
+            TransactionRegistryColNameValues.SOURCE_FX.value: [
+                1.5,
+                np.nan,
+                np.nan,
+                1.0,
+                2.0,
+            ],
+        }
+    )
+
+    pd.testing.assert_series_equal(
+        normalize_callable(df_transactions), pd.Series(expected)
+    )
+
+
+def test_is_none() -> None:
+    """Test that None is told apart from NaN."""
+    assert _is_none(pd.Series([None, np.nan, "a", 1.0], dtype=object)).tolist() == [
+        True,
+        False,
+        False,
+        False,
+    ]
+    assert _is_none(pd.Series([np.nan, 1.0])).tolist() == [False, False]
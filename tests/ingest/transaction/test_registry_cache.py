@@ -0,0 +1,222 @@
+"""Tests for the transaction registry cache."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from hashlib import file_digest as hashlib_file_digest
+import threading
+from typing import TYPE_CHECKING, Any
+from unittest.mock import PropertyMock, patch
+
+import pandas as pd
+import pytest
+
+from pypmanager.database.security import (
+    SECURITY_TABLE_VERSION,
+    AsyncDbSecurity,
+    SecurityModel,
+)
+from pypmanager.ingest.transaction import TransactionRegistry
+from pypmanager.ingest.transaction.registry_cache import (
+    REGISTRY_CACHE,
+    TransactionRegistryCache,
+)
+from pypmanager.settings import Settings, TypedSettings
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+
+    from tests.conftest import DataFactory
+
+
+@pytest.fixture(name="transaction_dir")
+def transaction_dir_fixture(tmp_path: Path) -> Generator[Path]:
+    """Mock the transaction data folder."""
+    with patch.object(
+        TypedSettings, "dir_transaction_data_local", new_callable=PropertyMock
+    ) as mock:
+        mock.return_value = tmp_path
+        yield tmp_path
+
+
+@pytest.mark.asyncio
+async def test_transaction_registry__cache_hit(
+    data_factory: type[DataFactory],
+) -> None:
+    """Test that an unchanged registry is only built once."""
+    factory = data_factory()
+    mocked_transactions = (
+        factory.buy(
+            transaction_date=datetime(2021, 1, 1, tzinfo=Settings.system_time_zone)
+        )
+        .sell()
+        .df_transaction_list
+    )
+    with patch(
+        "pypmanager.ingest.transaction.transaction_registry.TransactionRegistry."
+        "_async_load_transaction_files",
+        return_value=mocked_transactions,
+    ) as mock_load:
+        async with TransactionRegistry() as registry_obj:
+            df_first = registry_obj.df_all_transactions
+
+        async with TransactionRegistry() as registry_obj:
+            df_second = registry_obj.df_all_transactions
+
+        assert mock_load.call_count == 1
+        pd.testing.assert_frame_equal(df_first, df_second)
+        # Each registry receives its own copy
+        assert df_first is not df_second
+
+        # Other arguments result in a new build
+        async with TransactionRegistry(sort_by_date_descending=True):
+            pass
+
+        assert mock_load.call_count == 2
+
+        REGISTRY_CACHE.invalidate()
+
+        async with TransactionRegistry():
+            pass
+
+        assert mock_load.call_count == 3
+
+
+def test_transaction_registry_cache__max_size() -> None:
+    """Test that the least recently used registry is evicted."""
+    cache = TransactionRegistryCache(max_size=2)
+    keys = [
+        cache.get_key(None, sort_by_date_descending=value) for value in (False, True)
+    ]
+    key_report_date = cache.get_key(
+        datetime(2021, 1, 1, tzinfo=Settings.system_time_zone),
+        sort_by_date_descending=False,
+    )
+
+    cache.set(keys[0], pd.DataFrame())
+    cache.set(keys[1], pd.DataFrame())
+    assert cache.get(keys[0]) is not None
+
+    cache.set(key_report_date, pd.DataFrame())
+
+    assert len(cache) == 2
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.hits == 2
+    assert cache.misses == 1
+
+
+def test_transaction_registry_cache__key_files(transaction_dir: Path) -> None:
+    """Test that the key changes when a transaction file changes."""
+    cache = TransactionRegistryCache(max_size=2)
+    file_path = transaction_dir / "avanza.csv"
+    file_path.write_text("a;b\n1;2\n")
+
+    key = cache.get_key(None, sort_by_date_descending=False)
+    assert len(key.files) == 1
+    assert key == cache.get_key(None, sort_by_date_descending=False)
+
+    file_path.write_text("a;b\n1;3\n")
+    key_changed = cache.get_key(None, sort_by_date_descending=False)
+    assert key_changed.files[0].content_hash != key.files[0].content_hash
+
+    (transaction_dir / "lysa.csv").write_text("a;b\n")
+    assert len(cache.get_key(None, sort_by_date_descending=False).files) == 2
+
+
+@pytest.mark.asyncio
+async def test_transaction_registry_cache__async_get_key(transaction_dir: Path) -> None:
+    """Test that files are hashed in a worker thread, off the event loop."""
+    cache = TransactionRegistryCache(max_size=2)
+    (transaction_dir / "avanza.csv").write_text("a;b\n1;2\n")
+    hash_threads: list[threading.Thread] = []
+
+    def file_digest(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        hash_threads.append(threading.current_thread())
+        return hashlib_file_digest(*args, **kwargs)
+
+    with patch("hashlib.file_digest", side_effect=file_digest):
+        key = await cache.async_get_key(None, sort_by_date_descending=False)
+
+    assert key == cache.get_key(None, sort_by_date_descending=False)
+    assert len(hash_threads) == 1
+    assert hash_threads[0] is not threading.main_thread()
+
+
+@pytest.mark.asyncio
+async def test_transaction_registry_cache__security_table_version() -> None:
+    """Test that the security table version changes with new data only."""
+    security = SecurityModel(isin_code="SE0001", name="Foo", currency="SEK")
+
+    version = SECURITY_TABLE_VERSION.version
+    async with AsyncDbSecurity() as db:
+        await db.async_store_data(data=[security])
+    assert SECURITY_TABLE_VERSION.version == version + 1
+
+    # Storing the same data again does not change the version
+    async with AsyncDbSecurity() as db:
+        await db.async_store_data(
+            data=[SecurityModel(isin_code="SE0001", name="Foo", currency="SEK")]
+        )
+    assert SECURITY_TABLE_VERSION.version == version + 1
+
+
+@pytest.mark.asyncio
+async def test_transaction_registry_cache__coalesce_builds() -> None:
+    """Test that concurrent builds of the same key share one build."""
+    cache = TransactionRegistryCache(max_size=2)
+    key = cache.get_key(None, sort_by_date_descending=False)
+    event = asyncio.Event()
+    build_count = 0
+
+    async def _async_build() -> pd.DataFrame:
+        nonlocal build_count
+        build_count += 1
+        await event.wait()
+        return pd.DataFrame({"a": [1]})
+
+    tasks = [
+        asyncio.create_task(cache.async_get_or_build(key, _async_build))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    event.set()
+    result = await asyncio.gather(*tasks)
+
+    assert build_count == 1
+    assert cache.builds == 1
+    assert cache.coalesced == 2
+    assert len(cache) == 1
+    assert all(df["a"].tolist() == [1] for df in result)
+    # Each caller receives its own copy
+    assert result[0] is not result[1]
+
+    # The next request is served from the cache
+    await cache.async_get_or_build(key, _async_build)
+    assert cache.builds == 1
+    assert cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_transaction_registry_cache__coalesce_builds_error() -> None:
+    """Test that an error in a shared build is raised to all callers."""
+    cache = TransactionRegistryCache(max_size=2)
+    key = cache.get_key(None, sort_by_date_descending=False)
+
+    async def _async_build() -> pd.DataFrame:
+        await asyncio.sleep(0)
+        msg = "No transactions to process"
+        raise ValueError(msg)
+
+    result = await asyncio.gather(
+        cache.async_get_or_build(key, _async_build),
+        cache.async_get_or_build(key, _async_build),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(err, ValueError) for err in result)
+    assert cache.builds == 1
+    assert cache.coalesced == 1
+    assert len(cache) == 0
@@ -0,0 +1,220 @@
+"""Tests for the transaction registry snapshot."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import threading
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pypmanager.database.security import AsyncDbSecurity, SecurityModel
+from pypmanager.ingest.transaction import (
+    TransactionRegistry,
+    TransactionRegistryColNameValues,
+)
+from pypmanager.ingest.transaction.registry_cache import (
+    REGISTRY_CACHE,
+    TransactionFileFingerprint,
+)
+from pypmanager.ingest.transaction.registry_snapshot import (
+    async_get_snapshot_fingerprint,
+    read_snapshot,
+    write_snapshot,
+)
+from pypmanager.settings import Settings
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+    from tests.conftest import DataFactory
+
+
+@pytest.fixture(name="_enable_snapshot")
+def enable_snapshot_fixture() -> Generator[None]:
+    """Enable the registry snapshot."""
+    with patch.object(Settings, "registry_snapshot", new=True):
+        yield
+
+
+def test_write_snapshot__read_snapshot() -> None:
+    """Test that a data frame is restored with the same types."""
+    df = pd.DataFrame(
+        {
+            "name": ["A", "B", "C"],
+            "value": [1.0, np.nan, 3.0],
+            "is_reset": np.array([True, np.nan, False], dtype=object),
+        },
+        index=pd.DatetimeIndex(
+            ["2021-01-01", "2021-01-02", "2021-01-03"], name="date"
+        ).tz_localize(Settings.system_time_zone),
+    )
+
+    write_snapshot(df, "abc")
+
+    assert read_snapshot("other") is None
+
+    df_snapshot = read_snapshot("abc")
+    assert df_snapshot is not None
+    pd.testing.assert_frame_equal(df, df_snapshot)
+    assert df_snapshot.index.tz == Settings.system_time_zone
+    assert df_snapshot["is_reset"].tolist()[::2] == [True, False]
+    assert isinstance(df_snapshot["is_reset"].iloc[1], float)
+
+
+def test_write_snapshot__concurrent() -> None:
+    """Test that builds finishing at the same time can write the snapshot."""
+    df = pd.DataFrame({"name": ["A", None], "value": [1.0, np.nan]})
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda _: write_snapshot(df, "abc"), range(16)))
+
+    df_snapshot = read_snapshot("abc")
+    assert df_snapshot is not None
+    pd.testing.assert_frame_equal(df, df_snapshot)
+    assert df_snapshot["name"].tolist() == ["A", None]
+    assert [path.suffix for path in Settings.dir_cache_local.iterdir()] == [".arrow"]
+
+
+def test_read_snapshot__missing() -> None:
+    """Test that nothing is returned without a snapshot."""
+    assert read_snapshot("abc") is None
+
+
+@pytest.mark.asyncio
+async def test_async_get_snapshot_fingerprint() -> None:
+    """Test that the fingerprint depends on the files and the security table."""
+    files = (
+        TransactionFileFingerprint(
+            path="avanza.csv", size=1, mtime_ns=1, content_hash="a"
+        ),
+    )
+    fingerprint = await async_get_snapshot_fingerprint(files)
+
+    # The modification time does not change the fingerprint
+    files_touched = (
+        TransactionFileFingerprint(
+            path="avanza.csv", size=1, mtime_ns=2, content_hash="a"
+        ),
+    )
+    assert await async_get_snapshot_fingerprint(files_touched) == fingerprint
+
+    files_changed = (
+        TransactionFileFingerprint(
+            path="avanza.csv", size=1, mtime_ns=1, content_hash="b"
+        ),
+    )
+    assert await async_get_snapshot_fingerprint(files_changed) != fingerprint
+
+    async with AsyncDbSecurity() as db:
+        await db.async_store_data(
+            data=[SecurityModel(isin_code="SE0001", name="Foo", currency="SEK")]
+        )
+    assert await async_get_snapshot_fingerprint(files) != fingerprint
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("_enable_snapshot")
+async def test_transaction_registry__snapshot(
+    data_factory: type[DataFactory],
+) -> None:
+    """Test that a new process can load the registry from the snapshot."""
+    factory = data_factory()
+    mocked_transactions = (
+        factory.buy(
+            transaction_date=datetime(2021, 1, 1, tzinfo=Settings.system_time_zone)
+        )
+        .buy(transaction_date=datetime(2021, 1, 2, tzinfo=Settings.system_time_zone))
+        .sell(transaction_date=datetime(2021, 1, 3, tzinfo=Settings.system_time_zone))
+        .df_transaction_list
+    )
+    with patch(
+        "pypmanager.ingest.transaction.transaction_registry.TransactionRegistry."
+        "_async_load_transaction_files",
+        return_value=mocked_transactions,
+    ) as mock_load:
+        async with TransactionRegistry(sort_by_date_descending=True) as registry_obj:
+            df_built = registry_obj.df_all_transactions
+
+        # Simulate a restart
+        REGISTRY_CACHE.invalidate()
+
+        read_threads: list[threading.Thread] = []
+
+        def mock_read_snapshot(fingerprint: str) -> pd.DataFrame | None:
+            read_threads.append(threading.current_thread())
+            return read_snapshot(fingerprint)
+
+        with patch(
+            "pypmanager.ingest.transaction.transaction_registry.read_snapshot",
+            side_effect=mock_read_snapshot,
+        ):
+            async with TransactionRegistry(
+                sort_by_date_descending=True
+            ) as registry_obj:
+                df_snapshot = registry_obj.df_all_transactions
+
+        assert mock_load.call_count == 1
+        # The snapshot is read outside of the event loop
+        assert len(read_threads) == 1
+        assert read_threads[0] is not threading.main_thread()
+        pd.testing.assert_frame_equal(df_built, df_snapshot)
+
+        # Filtering by date is applied to the snapshot
+        REGISTRY_CACHE.invalidate()
+        async with TransactionRegistry(
+            report_date=datetime(2021, 1, 2, tzinfo=Settings.system_time_zone)
+        ) as registry_obj:
+            assert len(registry_obj.df_all_transactions) == 2
+
+        assert mock_load.call_count == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("_enable_snapshot")
+async def test_transaction_registry__snapshot_missing_values(
+    data_factory: type[DataFactory],
+) -> None:
+    """Test that None and NaN are restored as in a fresh build."""
+    factory = data_factory()
+    mocked_transactions = (
+        factory.buy(
+            transaction_date=datetime(2021, 1, 1, tzinfo=Settings.system_time_zone)
+        )
+        .dividend(
+            transaction_date=datetime(2021, 1, 2, tzinfo=Settings.system_time_zone)
+        )
+        .sell(transaction_date=datetime(2021, 1, 3, tzinfo=Settings.system_time_zone))
+        .df_transaction_list
+    )
+    for column in (
+        TransactionRegistryColNameValues.SOURCE_ACCOUNT_NAME.value,
+        TransactionRegistryColNameValues.SOURCE_BROKER.value,
+    ):
+        mocked_transactions[column] = mocked_transactions[column].astype(object)
+        mocked_transactions.loc[2, column] = None
+
+    with patch(
+        "pypmanager.ingest.transaction.transaction_registry.TransactionRegistry."
+        "_async_load_transaction_files",
+        return_value=mocked_transactions,
+    ):
+        async with TransactionRegistry() as registry_obj:
+            df_built = registry_obj.df_all_transactions
+
+        # Simulate a restart
+        REGISTRY_CACHE.invalidate()
+
+        async with TransactionRegistry() as registry_obj:
+            df_snapshot = registry_obj.df_all_transactions
+
+    pd.testing.assert_frame_equal(df_built, df_snapshot)
+    # None and NaN are equal to assert_frame_equal, so compare the types as well
+    pd.testing.assert_frame_equal(
+        df_built.map(lambda value: type(value).__name__),
+        df_snapshot.map(lambda value: type(value).__name__),
+    )
@@ -1,10 +1,12 @@
 """Test helpers."""
 
 from datetime import datetime
+import logging
 from unittest.mock import patch
 
 import numpy as np
 from numpy.testing import assert_array_equal
+import pandas as pd
 import pytest
 
 from pypmanager.ingest.transaction import TransactionRegistry
@@ -12,7 +14,9 @@ from pypmanager.ingest.transaction.const import (
     ColumnNameValues,
     TransactionRegistryColNameValues,
 )
-from pypmanager.settings import Settings
+from pypmanager.ingest.transaction.registry_cache import REGISTRY_CACHE
+from pypmanager.ingest.transaction.transaction_registry import _concat_broker_data
+from pypmanager.settings import Settings, TypedSettings
 
 from tests.conftest import DataFactory
 
@@ -331,3 +335,131 @@ async def test_transaction_registry__columns(
                 "calc_pnl_transaction_total",
                 "meta_transaction_year",
             ]
+
+
+@pytest.mark.asyncio
+async def test_transaction_registry__incremental(
+    data_factory: type[DataFactory],
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that only securities with changed transactions are recalculated."""
+    factory = data_factory()
+    mocked_transactions = (
+        factory.buy(
+            transaction_date=datetime(2021, 1, 1, tzinfo=Settings.system_time_zone)
+        )
+        .buy(
+            name="Company B",
+            transaction_date=datetime(2021, 1, 1, tzinfo=Settings.system_time_zone),
+            isin_code="US1234567891",
+        )
+        .df_transaction_list
+    )
+    mocked_transactions_changed = (
+        factory.sell(
+            name="Company B",
+            transaction_date=datetime(2021, 1, 2, tzinfo=Settings.system_time_zone),
+            isin_code="US1234567891",
+        )
+        .buy(
+            name="Company C",
+            transaction_date=datetime(2021, 1, 2, tzinfo=Settings.system_time_zone),
+            isin_code="US1234567892",
+        )
+        .df_transaction_list
+    )
+
+    async def _async_get_registry(df_transactions: pd.DataFrame) -> pd.DataFrame:
+        with patch(
+            "pypmanager.ingest.transaction.transaction_registry.TransactionRegistry."
+            "_async_load_transaction_files",
+            return_value=df_transactions,
+        ):
+            async with TransactionRegistry() as registry_obj:
+                return await registry_obj.async_get_registry()
+
+    await _async_get_registry(mocked_transactions)
+
+    # The transaction files changed, so the cached registry can't be used
+    REGISTRY_CACHE._data.clear()  # noqa: SLF001
+    with caplog.at_level(logging.DEBUG):
+        registry_incremental = await _async_get_registry(mocked_transactions_changed)
+
+    assert "Calculating 2 of 3 securities" in caplog.text
+
+    REGISTRY_CACHE.invalidate()
+    registry_full = await _async_get_registry(mocked_transactions_changed)
+
+    pd.testing.assert_frame_equal(registry_incremental, registry_full)
+
+
+@pytest.mark.asyncio
+@patch.object(
+    TypedSettings,
+    "dir_transaction_data_local",
+    "tests/fixtures/transactions",
+)
+async def test_transaction_registry__async_load_transaction_files(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that all brokers are loaded and timed."""
+    with caplog.at_level(logging.INFO):
+        df_loaded = await TransactionRegistry()._async_load_transaction_files()  # noqa: SLF001
+
+    assert {"Avanza", "Lysa", "Pareto"} <= set(
+        df_loaded[TransactionRegistryColNameValues.SOURCE_BROKER.value]
+    )
+    for loader_name in (
+        "AvanzaLoader",
+        "GenericLoader",
+        "LysaLoader",
+        "ParetoSecuritiesLoader",
+    ):
+        assert f"with {loader_name} in" in caplog.text
+
+
+@pytest.mark.filterwarnings("error::FutureWarning")
+def test_concat_broker_data() -> None:
+    """Test that empty frames and columns without values don't decide the types."""
+    df_concat = _concat_broker_data(
+        [
+            pd.DataFrame({"fee": [1.0], "isin": ["SE0001"], "fx": [None]}),
+            pd.DataFrame({"fee": [], "isin": [], "fx": []}),
+            pd.DataFrame({"fee": [None], "isin": [np.nan], "fx": [np.nan]}),
+        ]
+    )
+
+    assert df_concat["fee"].dtype == np.float64
+    assert df_concat["fee"].isna().tolist() == [False, True]
+    assert df_concat["isin"].tolist()[0] == "SE0001"
+    # Columns without values in any frame are left as they are
+    assert df_concat["fx"].tolist()[0] is None
+
+
+@pytest.mark.asyncio
+async def test_transaction_registry__profile_memory(
+    data_factory: type[DataFactory],
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that the peak memory of each stage is logged when enabled."""
+    mocked_transactions = (
+        data_factory()
+        .buy(transaction_date=datetime(2021, 1, 1, tzinfo=Settings.system_time_zone))
+        .df_transaction_list
+    )
+
+    with (
+        patch(
+            "pypmanager.ingest.transaction.transaction_registry.TransactionRegistry."
+            "_async_load_transaction_files",
+            return_value=mocked_transactions,
+        ),
+        patch.object(Settings, "registry_profile_memory", new=True),
+        caplog.at_level(logging.INFO),
+    ):
+        async with TransactionRegistry() as registry_obj:
+            peak_bytes = registry_obj.memory_profile.peak_bytes
+
+    assert "_100_cleanup_df" in peak_bytes
+    assert "_300_calculate_average_price" in peak_bytes
+    assert "Peak memory of _300_calculate_average_price" in caplog.text
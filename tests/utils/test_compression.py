@@ -0,0 +1,55 @@
+"""Test reading compressed files."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from pypmanager.utils.compression import (
+    glob_with_compressed,
+    matches_pattern,
+    open_binary,
+    strip_compression_suffix,
+)
+
+from tests.conftest import write_compressed
+
+
+@pytest.mark.parametrize("suffix", ["", ".gz", ".xz", ".zst"])
+def test_open_binary(tmp_path: Path, suffix: str) -> None:
+    """Test that a file is decompressed by its suffix."""
+    file_path = tmp_path / f"data.csv{suffix}"
+    write_compressed(b"a;b\n1;2\n", file_path)
+
+    with open_binary(file_path) as file:
+        assert file.readline() == b"a;b\n"
+        assert file.read() == b"1;2\n"
+
+
+@pytest.mark.parametrize(
+    ("name", "expected"),
+    [
+        ("data.csv", "data.csv"),
+        ("data.csv.gz", "data.csv"),
+        ("data.csv.xz", "data.csv"),
+        ("data.csv.zst", "data.csv"),
+        ("data.gz.csv", "data.gz.csv"),
+    ],
+)
+def test_strip_compression_suffix(name: str, expected: str) -> None:
+    """Test that the compression suffix is removed."""
+    assert strip_compression_suffix(name) == expected
+
+
+def test_glob_with_compressed(tmp_path: Path) -> None:
+    """Test that compressed files are matched by their name without the suffix."""
+    for name in ("avanza.csv", "avanza-2.csv.gz", "avanza.txt.gz", "lysa.csv.zst"):
+        (tmp_path / name).touch()
+
+    assert [path.name for path in glob_with_compressed(tmp_path, "avanza*.csv")] == [
+        "avanza-2.csv.gz",
+        "avanza.csv",
+    ]
+    assert matches_pattern(Path("lysa.csv.zst"), "lysa*.csv")
+    assert not matches_pattern(Path("avanza.txt.gz"), "avanza*.csv")
@@ -0,0 +1,70 @@
+"""Test executor utilities."""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+import os
+import threading
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from pypmanager.ingest.transaction import TransactionRegistry
+from pypmanager.settings import Settings
+from pypmanager.utils.executor import (
+    async_run_cpu_bound,
+    get_executor,
+    shutdown_executor,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+    from tests.conftest import DataFactory
+
+
+@pytest.fixture(name="process_executor")
+def process_executor_fixture() -> Generator[None]:
+    """Use a process pool as executor."""
+    shutdown_executor()
+    with patch.object(Settings, "executor_type", "process"):
+        yield
+        shutdown_executor()
+
+
+@pytest.mark.asyncio
+async def test_async_run_cpu_bound__thread() -> None:
+    """Test that work is run in the thread pool."""
+    assert isinstance(get_executor(), ThreadPoolExecutor)
+
+    thread_name = await async_run_cpu_bound(lambda: threading.current_thread().name)
+
+    assert thread_name.startswith("pypmanager-cpu")
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("process_executor")
+async def test_async_run_cpu_bound__process(
+    data_factory: type[DataFactory],
+) -> None:
+    """Test that work, including the transaction registry, runs in a process pool."""
+    assert isinstance(get_executor(), ProcessPoolExecutor)
+    assert await async_run_cpu_bound(os.getpid) != os.getpid()
+
+    factory = data_factory()
+    mocked_transactions = (
+        factory.buy(
+            transaction_date=datetime(2021, 1, 1, tzinfo=Settings.system_time_zone)
+        )
+        .sell()
+        .df_transaction_list
+    )
+    with patch(
+        "pypmanager.ingest.transaction.transaction_registry.TransactionRegistry."
+        "_async_load_transaction_files",
+        return_value=mocked_transactions,
+    ):
+        async with TransactionRegistry() as registry_obj:
+            assert len(await registry_obj.async_get_registry()) == 2
@@ -0,0 +1,36 @@
+"""Test memory utilities."""
+
+from __future__ import annotations
+
+import tracemalloc
+
+from pypmanager.utils.memory import MemoryProfile, trace_memory
+
+
+def test_memory_profile() -> None:
+    """Test that the peak memory of each stage is measured while tracing."""
+    profile = MemoryProfile()
+    allocations: list[bytearray] = []
+
+    with profile.measure("untraced"):
+        allocations.append(bytearray(1_000_000))
+
+    with trace_memory(enabled=True):
+        assert tracemalloc.is_tracing()
+
+        with profile.measure("large"):
+            allocations.append(bytearray(1_000_000))
+
+        with profile.measure("small"):
+            allocations.append(bytearray(1_000))
+
+    assert not tracemalloc.is_tracing()
+    assert list(profile.peak_bytes) == ["large", "small"]
+    assert profile.peak_bytes["large"] >= 1_000_000
+    assert profile.peak_bytes["small"] < 1_000_000
+
+
+def test_trace_memory__disabled() -> None:
+    """Test that memory is not traced when disabled."""
+    with trace_memory(enabled=False):
+        assert not tracemalloc.is_tracing()